@@ -19,17 +19,85 @@ from src.main.python.datasets.contentwise.dataset import ContentWiseDataset
 from src.main.python.datasets.contentwise.statistics import ContentWiseStatistics
 from src.main.python.datasets.replayer.dataset import ReplayerDataset
 from src.main.python.datasets.replayer.statistics import ReplayerStatistics
+from src.main.python.inputoutput.array_storage import ArrayStorage
 from src.main.python.inputoutput.impressions import ImpressionDistributionWriter
 from src.main.python.inputoutput.pop import PopularityDistributionWriter
 from src.main.python.inputoutput.statistics import StatisticsWriter
 from src.main.python.inputoutput.temporal import TemporalDistributionWriter
 from src.main.python.properties.distributions.impression_distribution import ImpressionsDistribution
 from src.main.python.properties.distributions.popularity_distribution import PopularityDistribution
+from src.main.python.utils.memory import MemoryUsage
+from src.main.python.utils.progress import ProgressMonitor
+from src.main.python.utils.sampling import UserSampler
 
 import time
 
 CONTENTWISE = "ContentWise"
 REPLAYER = "Replayer"
+MEMORY = "--memory"
+PARALLEL = "--parallel"
+CACHE = "--cache"
+ARRAYS = "--arrays"
+STATE = "--state"
+SAMPLE = "--sample"
+SEED = "--seed"
+TWO_PASS = "--two-pass"
+PROGRESS = "--progress"
+
+# With the --memory option, the memory used by the dataset is printed after each step.
+print_memory = MEMORY in sys.argv
+if print_memory:
+    sys.argv.remove(MEMORY)
+# With the --parallel option, the input files are parsed by several processes.
+parallel = PARALLEL in sys.argv
+if parallel:
+    sys.argv.remove(PARALLEL)
+# With the --cache <folder> option, loaded datasets are stored in (and later read from) the given folder.
+cache_folder = None
+if CACHE in sys.argv:
+    cache_pos = sys.argv.index(CACHE)
+    cache_folder = sys.argv[cache_pos + 1]
+    del sys.argv[cache_pos:cache_pos + 2]
+# With the --arrays <folder> option, the dataset is opened (memory-mapped) from the given directory of arrays. If the
+# directory does not contain the dataset yet, or it was saved from different input files or options (as identified by
+# the key stored along with the arrays), the dataset is loaded from the input files and saved there.
+arrays_folder = None
+if ARRAYS in sys.argv:
+    arrays_pos = sys.argv.index(ARRAYS)
+    arrays_folder = sys.argv[arrays_pos + 1]
+    del sys.argv[arrays_pos:arrays_pos + 2]
+# With the --state <file> option (only for the Replayer dataset), the loaded dataset is kept in the given file, and
+# later runs only parse the new files of the dataset folder.
+state_file = None
+if STATE in sys.argv:
+    state_pos = sys.argv.index(STATE)
+    state_file = sys.argv[state_pos + 1]
+    del sys.argv[state_pos:state_pos + 2]
+# With the --sample <fraction> option, only the given fraction of the users (selected by a stable hash of their
+# identifiers) is loaded. The --seed <seed> option changes the selected users.
+sampler = None
+if SAMPLE in sys.argv:
+    sample_pos = sys.argv.index(SAMPLE)
+    sample_fraction = float(sys.argv[sample_pos + 1])
+    del sys.argv[sample_pos:sample_pos + 2]
+    sample_seed = 0
+    if SEED in sys.argv:
+        seed_pos = sys.argv.index(SEED)
+        sample_seed = int(sys.argv[seed_pos + 1])
+        del sys.argv[seed_pos:seed_pos + 2]
+    sampler = UserSampler(sample_fraction, sample_seed)
+# With the --two-pass option (only for the Replayer dataset, with a minimum number of interactions per user), the files
+# are read twice, so that only the interactions of the kept users are ever stored.
+two_pass = TWO_PASS in sys.argv
+if two_pass:
+    sys.argv.remove(TWO_PASS)
+# With the --progress <seconds> option, the throughput of the loader (rows/s, bytes/s, current file and number of users,
+# items and impressions) is printed to the standard error every given number of seconds.
+monitor = None
+if PROGRESS in sys.argv:
+    progress_pos = sys.argv.index(PROGRESS)
+    monitor = ProgressMonitor(interval=float(sys.argv[progress_pos + 1]))
+    del sys.argv[progress_pos:progress_pos + 2]
 
 dataset = sys.argv[1]
 
@@ -40,15 +108,26 @@ if dataset == CONTENTWISE:
     impr_no_direct = sys.argv[4]
 
     # Step 1: read the dataset.
-    data = ContentWiseDataset.load(inter, impr_direct, impr_no_direct)
+    key = ContentWiseDataset.key(inter, impr_direct, impr_no_direct, sampler=sampler)
+    if arrays_folder is not None and ArrayStorage.is_saved(arrays_folder, ContentWiseDataset.NAME, key):
+        data = ContentWiseDataset.open(arrays_folder, key)
+    else:
+        data = ContentWiseDataset.load(inter, impr_direct, impr_no_direct, parallel=parallel,
+                                       cache_folder=cache_folder, sampler=sampler, monitor=monitor)
+        if arrays_folder is not None:
+            data.save(arrays_folder, key)
     time_b = time.time()
     print("Data read (" + str(time_b - time_a) + "s.)")
+    if print_memory:
+        print(MemoryUsage.format(data.memory_report()))
 
     # Step 2: find the statistics
     stats = ContentWiseStatistics(data)
     StatisticsWriter.write(stats, sys.argv[5] + "stats.txt")
     time_b = time.time()
     print("Stats computed (" + str(time_b - time_a) + "s.)")
+    if print_memory:
+        print(MemoryUsage.format(data.memory_report()))
 
     # Step 3: print the popularity distributions
     pop = PopularityDistribution(data.get_user_2_item_interactions())
@@ -61,6 +140,8 @@ if dataset == CONTENTWISE:
     PopularityDistributionWriter.write(pop, sys.argv[5] + "pop-user-series-impr.txt")
     time_b = time.time()
     print("Popularity distributions computed (" + str(time_b - time_a) + "s.)")
+    if print_memory:
+        print(MemoryUsage.format(data.memory_report()))
 
     # Step 4: print the distributions for the impressions:
     impr = ImpressionsDistribution(data.get_impressions())
@@ -68,6 +149,8 @@ if dataset == CONTENTWISE:
     ImpressionDistributionWriter.write_item_distribution(impr, sys.argv[5] + "impr-series.txt")
     time_b = time.time()
     print("Impressions distributions computed (" + str(time_b - time_a) + "s.)")
+    if print_memory:
+        print(MemoryUsage.format(data.memory_report()))
 
     # Step 5: print the temporal distribution for users, items and series
     temp = data.get_user_2_item_interactions_temporal_distribution()
@@ -97,6 +180,8 @@ if dataset == CONTENTWISE:
 
     time_b = time.time()
     print("Temporal distributions computed (" + str(time_b - time_a) + "s.)")
+    if print_memory:
+        print(MemoryUsage.format(data.memory_report()))
 elif dataset == REPLAYER:
     time_a = time.time()
 
@@ -104,15 +189,32 @@ elif dataset == REPLAYER:
     min_ratings = int(sys.argv[4] if len(sys.argv) > 4 else 0)
 
     # Step 1: read the dataset.
-    data = ReplayerDataset.load_yahoo_r6b(inter, min_interactions_per_user=min_ratings)
+    key = ReplayerDataset.key(inter, min_ratings, sampler)
+    if arrays_folder is not None and ArrayStorage.is_saved(arrays_folder, ReplayerDataset.NAME, key):
+        data = ReplayerDataset.open(arrays_folder, key)
+    else:
+        if state_file is not None:
+            data = ReplayerDataset.load_yahoo_r6b_incremental(inter, state_file,
+                                                              min_interactions_per_user=min_ratings,
+                                                              parallel=parallel, sampler=sampler, monitor=monitor)
+        else:
+            data = ReplayerDataset.load_yahoo_r6b(inter, min_interactions_per_user=min_ratings, parallel=parallel,
+                                                  cache_folder=cache_folder, sampler=sampler, two_pass=two_pass,
+                                                  monitor=monitor)
+        if arrays_folder is not None:
+            data.save(arrays_folder, key)
     time_b = time.time()
     print("Data read (" + str(time_b - time_a) + "s.)")
+    if print_memory:
+        print(MemoryUsage.format(data.memory_report()))
 
     # Step 2: find the statistics
     stats = ReplayerStatistics(data)
     StatisticsWriter.write(stats, sys.argv[3] + "stats.txt")
     time_b = time.time()
     print("Stats computed (" + str(time_b - time_a) + "s.)")
+    if print_memory:
+        print(MemoryUsage.format(data.memory_report()))
 
     # Step 3: print the popularity distributions
     pop = PopularityDistribution(data.get_user_2_item_interactions())
@@ -121,6 +223,8 @@ elif dataset == REPLAYER:
 
     time_b = time.time()
     print("Popularity distributions computed (" + str(time_b - time_a) + "s.)")
+    if print_memory:
+        print(MemoryUsage.format(data.memory_report()))
 
     # Step 4: print the distributions for the impressions:
     impr = ImpressionsDistribution(data.get_impressions())
@@ -128,6 +232,8 @@ elif dataset == REPLAYER:
     ImpressionDistributionWriter.write_item_distribution(impr, sys.argv[3] + "impr-items.txt")
     time_b = time.time()
     print("Impressions distributions computed (" + str(time_b - time_a) + "s.)")
+    if print_memory:
+        print(MemoryUsage.format(data.memory_report()))
 
     # Step 5: print the temporal distribution for users, items and series
     temp = data.get_user_2_item_interactions_temporal_distribution()
@@ -136,5 +242,7 @@ elif dataset == REPLAYER:
 
     time_b = time.time()
     print("Temporal distributions computed (" + str(time_b - time_a) + "s.)")
+    if print_memory:
+        print(MemoryUsage.format(data.memory_report()))
 else:
     print("ERROR: The dataset you are trying to analyze is not correct.")
@@ -12,5 +12,10 @@ __copyright__ = """
 __license__ = "Mozilla Public License v. 2.0"
 
 from .adding_return import AddingReturn
+from .array_impressions import ArrayImpressions
+from .array_rating_matrix import ArrayRatingMatrix
+from .id_index import IdIndex
 from .impressions import Impressions
+from .impressions_view import ImpressionsView
 from .rating_matrix import RatingMatrix
+from .rating_matrix_view import RatingMatrixView
@@ -0,0 +1,411 @@
+"""
+Array-backed representation of the impressions included in a dataset.
+"""
+
+__version__ = '0.1'
+__author__ = 'Javier Sanz-Cruzado, Pablo Castells'
+__email__ = 'javier.sanz-cruzado@uam.es, pablo.castells@uam.es'
+__copyright__ = """
+ Copyright (C) 2021 Information Retrieval Group at Universidad Autónoma
+ de Madrid, http://ir.ii.uam.es.
+
+ This Source Code Form is subject to the terms of the Mozilla Public
+ License, v. 2.0. If a copy of the MPL was not distributed with this
+ file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+__license__ = 'Mozilla Public License v. 2.0'
+
+import typing
+
+import numpy as np
+
+from .array_rating_matrix import ArrayRatingMatrix
+from .filters import Filter
+from .id_index import IdIndex
+from .impressions_view import ImpressionsView
+from .rating_matrix_view import RatingMatrixView
+from ..utils.memory import MemoryUsage
+
+
+class ArrayImpressions:
+    """
+    Read-only representation of the impressions, i.e. the set of items which have been shown to a user. It offers the
+    same reading methods as Impressions, but the impressions are stored as sorted int32 arrays of dense item indices
+    per user (compressed sparse rows) and of dense user indices per item (compressed sparse columns).
+    Repeated impressions are removed when the structure is built.
+    """
+
+    # Names of the arrays storing the impressions (see to_arrays).
+    ARRAYS = ("user_mask", "item_mask", "user_indptr", "user_indices", "item_indptr", "item_indices")
+
+    def __init__(self,
+                 user_index: IdIndex,
+                 item_index: IdIndex,
+                 rows: np.ndarray,
+                 cols: np.ndarray,
+                 user_mask: np.ndarray = None,
+                 item_mask: np.ndarray = None):
+        """
+        Initializes the impressions from a list of (possibly repeated) impressions.
+        :param user_index: the index of the users.
+        :param item_index: the index of the items.
+        :param rows: the dense user index of each impression.
+        :param cols: the dense item index of each impression.
+        :param user_mask: (OPTIONAL) boolean array indicating which users of the index belong to the impressions.
+                          By default, all the users in the index do.
+        :param item_mask: (OPTIONAL) boolean array indicating which items of the index belong to the impressions.
+                          By default, all the items in the index do.
+        """
+        self.user_index = user_index
+        self.item_index = item_index
+
+        self.user_mask = np.ones(len(user_index), dtype=bool) if user_mask is None else user_mask
+        self.item_mask = np.ones(len(item_index), dtype=bool) if item_mask is None else item_mask
+        self.num_users = int(np.count_nonzero(self.user_mask))
+        self.num_items = int(np.count_nonzero(self.item_mask))
+
+        num_users = len(self.user_mask)
+        num_items = len(self.item_mask)
+
+        # Sorting the (user, item) keys removes the repeated impressions, and leaves them grouped by user.
+        keys = np.unique(np.asarray(rows, dtype=np.int64) * num_items + np.asarray(cols, dtype=np.int64))
+        rows = keys // num_items if num_items > 0 else keys
+        cols = keys - rows * num_items
+
+        self.user_indptr = ArrayRatingMatrix.build_indptr(rows, num_users)
+        self.user_indices = cols.astype(np.int32)
+
+        order = np.argsort(cols, kind='stable')
+        self.item_indptr = ArrayRatingMatrix.build_indptr(cols, num_items)
+        self.item_indices = rows[order].astype(np.int32)
+
+        self.num_impressions = len(keys)
+
+        for array in (self.user_indptr, self.user_indices, self.item_indptr, self.item_indices):
+            array.setflags(write=False)
+
+    @staticmethod
+    def from_coo(users,
+                 items,
+                 user_index: IdIndex = None,
+                 item_index: IdIndex = None):
+        """
+        Builds the impressions from a list of (possibly repeated) (user, item) pairs, in a single vectorized step.
+        :param users: the identifier of the user of each impression.
+        :param items: the identifier of the item of each impression.
+        :param user_index: (OPTIONAL) the index of the users, shared with other structures of the dataset. All the
+                           users in the index belong to the impressions. By default, a new index is created.
+        :param item_index: (OPTIONAL) the index of the items, shared with other structures of the dataset. All the
+                           items in the index belong to the impressions. By default, a new index is created.
+        :return: the array-backed impressions.
+        """
+        user_index = IdIndex() if user_index is None else user_index
+        item_index = IdIndex() if item_index is None else item_index
+
+        rows = user_index.add_all(users)
+        cols = item_index.add_all(items)
+        return ArrayImpressions(user_index, item_index, rows, cols)
+
+    @staticmethod
+    def from_impressions(impressions):
+        """
+        Builds the array-backed version of a set of impressions. It is meant to be called once, after the dataset has
+        been loaded. The array-backed impressions share the user and item indexes of the original ones.
+        :param impressions: the original impressions.
+        :return: the array-backed impressions.
+        """
+        user_index = impressions.user_index
+        item_index = impressions.item_index
+
+        user_mask = np.zeros(len(user_index), dtype=bool)
+        user_mask[user_index.get_indices(list(impressions.get_users()))] = True
+        item_mask = np.zeros(len(item_index), dtype=bool)
+        item_mask[item_index.get_indices(list(impressions.get_items()))] = True
+
+        rows = []
+        cols = []
+        for user, user_impressions in impressions.user_impressions.items():
+            rows.extend([user_index.get_index(user)] * len(user_impressions))
+            cols.extend(map(item_index.get_index, user_impressions))
+
+        return ArrayImpressions(user_index, item_index, np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64),
+                                user_mask, item_mask)
+
+    @staticmethod
+    def from_arrays(user_index: IdIndex,
+                    item_index: IdIndex,
+                    arrays: typing.Dict[str, np.ndarray]):
+        """
+        Rebuilds array-backed impressions (or a view of them) from the arrays returned by to_arrays. The arrays are
+        used as they are (they might be memory-mapped), without copying them.
+        :param user_index: the index of the users.
+        :param item_index: the index of the items.
+        :param arrays: the arrays of the impressions.
+        :return: the array-backed impressions or, if the arrays were obtained from a view, the view.
+        """
+        aux_impr = ArrayImpressions.__new__(ArrayImpressions)
+        aux_impr.user_index = user_index
+        aux_impr.item_index = item_index
+        for name in ArrayImpressions.ARRAYS:
+            setattr(aux_impr, name, arrays[name])
+            if name not in ("user_mask", "item_mask"):
+                arrays[name].setflags(write=False)
+        aux_impr.num_users = int(np.count_nonzero(aux_impr.user_mask))
+        aux_impr.num_items = int(np.count_nonzero(aux_impr.item_mask))
+        aux_impr.num_impressions = len(aux_impr.user_indices)
+
+        if "view_user_mask" in arrays:
+            return ImpressionsView(aux_impr, arrays["view_user_mask"], arrays["view_item_mask"])
+        return aux_impr
+
+    def extend(self,
+               rows: np.ndarray,
+               cols: np.ndarray):
+        """
+        Builds new impressions containing these ones, plus some new (possibly repeated) impressions. The users and
+        items of the new impressions must have been registered in the indexes. The new impressions contain all the
+        users and items of these ones, plus those added to the indexes since these impressions were built.
+        :param rows: the dense user index of each new impression.
+        :param cols: the dense item index of each new impression.
+        :return: the new array-backed impressions.
+        """
+        old_rows = np.repeat(np.arange(len(self.user_mask), dtype=np.int64), np.diff(self.user_indptr))
+
+        user_mask = np.ones(len(self.user_index), dtype=bool)
+        user_mask[:len(self.user_mask)] = self.user_mask
+        item_mask = np.ones(len(self.item_index), dtype=bool)
+        item_mask[:len(self.item_mask)] = self.item_mask
+
+        return ArrayImpressions(self.user_index, self.item_index, np.concatenate((old_rows, rows)),
+                                np.concatenate((self.user_indices.astype(np.int64), cols)), user_mask, item_mask)
+
+    def to_arrays(self) -> typing.Dict[str, np.ndarray]:
+        """
+        Obtains the arrays storing the impressions, so they can be saved (see from_arrays). The indexes of users and
+        items are not included.
+        :return: a dictionary containing the arrays of the impressions.
+        """
+        return {name: getattr(self, name) for name in ArrayImpressions.ARRAYS}
+
+    def get_user_idx(self, user) -> int:
+        """
+        Obtains the dense index of a user.
+        :param user: the identifier of the user.
+        :return: the dense index of the user, -1 if the user does not belong to the impressions.
+        """
+        idx = self.user_index.get_index(user)
+        return idx if 0 <= idx < len(self.user_mask) and self.user_mask[idx] else -1
+
+    def get_item_idx(self, item) -> int:
+        """
+        Obtains the dense index of an item.
+        :param item: the identifier of the item.
+        :return: the dense index of the item, -1 if the item does not belong to the impressions.
+        """
+        idx = self.item_index.get_index(item)
+        return idx if 0 <= idx < len(self.item_mask) and self.item_mask[idx] else -1
+
+    def add_user(self, user_id):
+        """
+        Array-backed impressions cannot be modified.
+        :raises TypeError: always.
+        """
+        raise TypeError("Array-backed impressions cannot be modified")
+
+    def add_item(self, item_id):
+        """
+        Array-backed impressions cannot be modified.
+        :raises TypeError: always.
+        """
+        raise TypeError("Array-backed impressions cannot be modified")
+
+    def add_impression(self, user_id, item_id):
+        """
+        Array-backed impressions cannot be modified.
+        :raises TypeError: always.
+        """
+        raise TypeError("Array-backed impressions cannot be modified")
+
+    def add_impressions(self, user_id, item_ids):
+        """
+        Array-backed impressions cannot be modified.
+        :raises TypeError: always.
+        """
+        raise TypeError("Array-backed impressions cannot be modified")
+
+    def freeze(self):
+        """
+        The impressions are already immutable.
+        :return: the impressions themselves.
+        """
+        return self
+
+    def get_users(self):
+        """
+        Obtains the set of users.
+        :return: the set of users.
+        """
+        return iter(self.user_index.get_ids(np.flatnonzero(self.user_mask)).tolist())
+
+    def get_items(self):
+        """
+        Obtains the set of items.
+        :return: the set of items.
+        """
+        return iter(self.item_index.get_ids(np.flatnonzero(self.item_mask)).tolist())
+
+    def get_user_impressions(self, user_id):
+        """
+        Obtains the set of impressions for a user.
+        :param user_id: the identifier of the user.
+        :return: an iterator of the impressions for the user.
+        """
+        idx = self.get_user_idx(user_id)
+        if idx < 0:
+            return iter(())
+        start, end = self.user_indptr[idx], self.user_indptr[idx + 1]
+        return iter(self.item_index.get_ids(self.user_indices[start:end]).tolist())
+
+    def get_item_impressions(self, item_id):
+        """
+        Obtains the set of users including an item in their impressions.
+        :param item_id: the identifier of the item.
+        :return: an iterator of the impressed users.
+        """
+        idx = self.get_item_idx(item_id)
+        if idx < 0:
+            return iter(())
+        start, end = self.item_indptr[idx], self.item_indptr[idx + 1]
+        return iter(self.user_index.get_ids(self.item_indices[start:end]).tolist())
+
+    def get_num_impressions(self):
+        """
+        Obtains the number of impressions.
+        :return: the number of impressions.
+        """
+        return self.num_impressions
+
+    def get_num_users(self):
+        """
+        Obtains the number of users.
+        :return: the number of users.
+        """
+        return self.num_users
+
+    def get_num_items(self):
+        """
+        Obtains the number of items.
+        :return: the number of items.
+        """
+        return self.num_items
+
+    def get_num_user_impressions(self, user):
+        """
+        Obtains the number of impressions for a user.
+        :param user: the identifier of the user.
+        :return: the number of impressions for the user.
+        """
+        idx = self.get_user_idx(user)
+        return 0 if idx < 0 else int(self.user_indptr[idx + 1] - self.user_indptr[idx])
+
+    def get_num_item_impressions(self, item):
+        """
+        Obtains the number of impressions in which an item appears.
+        :param item: the item identifier.
+        :return: the number of impressions in which the item appears.
+        """
+        idx = self.get_item_idx(item)
+        return 0 if idx < 0 else int(self.item_indptr[idx + 1] - self.item_indptr[idx])
+
+    def memory_report(self) -> typing.Dict[str, int]:
+        """
+        Measures the memory used by the impressions.
+        :return: the number of bytes used by each of its components (see MemoryUsage.report).
+        """
+        return MemoryUsage.report(self)
+
+    def filter(self,
+               user_filter: typing.Callable[[int], bool] = None,
+               item_filter: typing.Callable[[int], bool] = None,
+               impressions_filter: typing.Callable[[int, int], bool] = None
+               ):
+        """
+        Obtains a set of impressions containing only a fraction of the impressions. Declarative filters (see
+        filters.Filter) are applied as boolean masks over the arrays. Any other callable is applied element by element.
+        :param user_filter: (OPTIONAL) a filter for selecting the users to keep. By default, no filter is applied.
+        :param item_filter: (OPTIONAL) a filter for selecting the items to keep. By default, no filter is applied.
+        :param impressions_filter: (OPTIONAL) a filter for selecting the impressions to keep.
+                                    By default, no filter is applied.
+        :returns: array-backed impressions containing the selected ones.
+        """
+        user_mask, item_mask = self.filter_masks(user_filter, item_filter)
+        return self.select(user_mask, item_mask, impressions_filter)
+
+    def filter_masks(self,
+                     user_filter: typing.Callable[[int], bool] = None,
+                     item_filter: typing.Callable[[int], bool] = None):
+        """
+        Obtains the users and items of the impressions passing a pair of filters.
+        :param user_filter: (OPTIONAL) a filter for selecting the users to keep. By default, no filter is applied.
+        :param item_filter: (OPTIONAL) a filter for selecting the items to keep. By default, no filter is applied.
+        :return: a pair of boolean arrays, indexed by dense index, for the users and the items passing the filters.
+        """
+        user_mask = self.user_mask.copy()
+        item_mask = self.item_mask.copy()
+        if user_filter is not None:
+            user_mask &= Filter.to_mask(user_filter, self.user_index.get_ids_array()[:len(self.user_mask)])
+        if item_filter is not None:
+            item_mask &= Filter.to_mask(item_filter, self.item_index.get_ids_array()[:len(self.item_mask)])
+        return user_mask, item_mask
+
+    def select(self,
+               user_mask: np.ndarray,
+               item_mask: np.ndarray,
+               impressions_filter: typing.Callable[[int, int], bool] = None):
+        """
+        Builds a new set of impressions containing the impressions between a subset of the users and items.
+        :param user_mask: boolean array, indexed by dense index, indicating which users to keep.
+        :param item_mask: boolean array, indexed by dense index, indicating which items to keep.
+        :param impressions_filter: (OPTIONAL) a filter for selecting the impressions to keep.
+                                    By default, no filter is applied.
+        :return: array-backed impressions containing the selected ones.
+        """
+        rows = np.repeat(np.arange(len(user_mask), dtype=np.int64), np.diff(self.user_indptr))
+        cols = self.user_indices.astype(np.int64)
+
+        impressions_mask = user_mask[rows] & item_mask[cols]
+        if impressions_filter is not None:
+            rows, cols = rows[impressions_mask], cols[impressions_mask]
+            impressions_mask = Filter.to_mask(impressions_filter, self.user_index.get_ids(rows),
+                                              self.item_index.get_ids(cols))
+
+        return ArrayImpressions(self.user_index, self.item_index, rows[impressions_mask], cols[impressions_mask],
+                                user_mask, item_mask)
+
+    def view(self,
+             user_filter: typing.Callable[[int], bool] = None,
+             item_filter: typing.Callable[[int], bool] = None):
+        """
+        Obtains a view of the impressions restricted to the users and items passing a pair of filters. Unlike filter,
+        the impressions are not copied: the view just stores which users and items are visible.
+        :param user_filter: (OPTIONAL) a filter for selecting the users to keep. By default, no filter is applied.
+        :param item_filter: (OPTIONAL) a filter for selecting the items to keep. By default, no filter is applied.
+        :return: the view of the impressions.
+        """
+        user_mask, item_mask = self.filter_masks(user_filter, item_filter)
+        return ImpressionsView(self, user_mask, item_mask)
+
+    def view_masks(self,
+                   user_mask: np.ndarray = None,
+                   item_mask: np.ndarray = None):
+        """
+        Obtains a view of the impressions restricted to the users and items selected by a pair of boolean masks.
+        Unlike view, the identifiers of the users and items are not looked up.
+        :param user_mask: (OPTIONAL) boolean array, indexed by dense index, indicating which users to keep. By
+                          default, all the users are kept.
+        :param item_mask: (OPTIONAL) boolean array, indexed by dense index, indicating which items to keep. By
+                          default, all the items are kept.
+        :return: the view of the impressions.
+        """
+        return ImpressionsView(self, RatingMatrixView.combine_masks(self.user_mask, user_mask),
+                               RatingMatrixView.combine_masks(self.item_mask, item_mask))
@@ -0,0 +1,725 @@
+"""
+Array-backed representation of the rating matrix of a recommendation dataset.
+Ratings are stored twice, as CSR (by user) and CSC (by item) NumPy arrays.
+"""
+
+__version__ = '0.1'
+__author__ = 'Javier Sanz-Cruzado, Pablo Castells'
+__email__ = 'javier.sanz-cruzado@uam.es, pablo.castells@uam.es'
+__copyright__ = """
+ Copyright (C) 2021 Information Retrieval Group at Universidad Autónoma
+ de Madrid, http://ir.ii.uam.es.
+
+ This Source Code Form is subject to the terms of the Mozilla Public
+ License, v. 2.0. If a copy of the MPL was not distributed with this
+ file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+__license__ = 'Mozilla Public License v. 2.0'
+
+import typing
+
+import numpy as np
+
+from .filters import Filter
+from .id_index import IdIndex
+from .rating_matrix_view import RatingMatrixView
+from ..utils.memory import MemoryUsage
+from ..utils.optional import Optional
+
+
+class ArrayRatingMatrix:
+    """
+    Read-only representation of the basic rating matrix of a recommendation dataset. It offers the same reading
+    methods as RatingMatrix, but users and items are mapped to dense indices (through IdIndex objects, which might be
+    shared with other structures of the dataset), and the ratings are stored in compressed sparse row (by user) and
+    compressed sparse column (by item) arrays, so the ratings of a user or an item are contiguous slices of memory.
+    """
+
+    # Names of the arrays storing the matrix (see to_arrays).
+    ARRAYS = ("user_mask", "item_mask", "user_indptr", "user_indices", "user_values", "item_indptr", "item_indices",
+              "item_values", "user_degrees", "item_degrees")
+
+    def __init__(self,
+                 user_index: IdIndex,
+                 item_index: IdIndex,
+                 rows: np.ndarray,
+                 cols: np.ndarray,
+                 values: np.ndarray,
+                 threshold: float,
+                 binarize: bool,
+                 update: bool,
+                 num_total_ratings: int,
+                 num_total_rel_ratings: int,
+                 user_mask: np.ndarray = None,
+                 item_mask: np.ndarray = None):
+        """
+        Initializes the rating matrix from the list of (not repeated) ratings.
+        :param user_index: the index of the users.
+        :param item_index: the index of the items.
+        :param rows: the dense user index of each rating.
+        :param cols: the dense item index of each rating.
+        :param values: the value of each rating.
+        :param threshold: the relevance threshold of the ratings.
+        :param binarize: true if the ratings were binarized, false otherwise.
+        :param update: true if the ratings were updated when repeated, false otherwise.
+        :param num_total_ratings: the number of ratings (with repetitions).
+        :param num_total_rel_ratings: the number of relevant ratings (with repetitions).
+        :param user_mask: (OPTIONAL) boolean array indicating which users of the index belong to the matrix. By
+                          default, all the users in the index do.
+        :param item_mask: (OPTIONAL) boolean array indicating which items of the index belong to the matrix. By
+                          default, all the items in the index do.
+        """
+        self.user_index = user_index
+        self.item_index = item_index
+
+        self.user_mask = np.ones(len(user_index), dtype=bool) if user_mask is None else user_mask
+        self.item_mask = np.ones(len(item_index), dtype=bool) if item_mask is None else item_mask
+        self.num_users = int(np.count_nonzero(self.user_mask))
+        self.num_items = int(np.count_nonzero(self.item_mask))
+
+        num_users = len(self.user_mask)
+        num_items = len(self.item_mask)
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+
+        # Compressed sparse rows: ratings sorted by user, and by item within each user.
+        order = np.lexsort((cols, rows))
+        self.user_indptr = ArrayRatingMatrix.build_indptr(rows, num_users)
+        self.user_indices = cols[order].astype(np.int32)
+        self.user_values = values[order]
+
+        # Compressed sparse columns: ratings sorted by item, and by user within each item.
+        order = np.lexsort((rows, cols))
+        self.item_indptr = ArrayRatingMatrix.build_indptr(cols, num_items)
+        self.item_indices = rows[order].astype(np.int32)
+        self.item_values = values[order]
+
+        self.threshold = threshold
+        self.binarize = binarize
+        self.update = update
+
+        # Number of ratings (first row) and relevant ratings (second row) of each user / item, by dense index.
+        rel = self.is_relevant(values)
+        self.user_degrees = np.stack((np.diff(self.user_indptr), np.bincount(rows[rel], minlength=num_users)))
+        self.item_degrees = np.stack((np.diff(self.item_indptr), np.bincount(cols[rel], minlength=num_items)))
+
+        self.num_ratings = len(values)
+        self.num_rel_ratings = int(np.count_nonzero(rel))
+        self.num_total_ratings = num_total_ratings
+        self.num_total_rel_ratings = num_total_rel_ratings
+
+        for array in (self.user_indptr, self.user_indices, self.user_values, self.item_indptr, self.item_indices,
+                      self.item_values, self.user_degrees, self.item_degrees):
+            array.setflags(write=False)
+
+    @staticmethod
+    def build_indptr(indices: np.ndarray,
+                     size: int) -> np.ndarray:
+        """
+        Builds the pointer array of a compressed sparse representation.
+        :param indices: the dense index of the row (or column) of each stored value.
+        :param size: the number of rows (or columns).
+        :return: an array of size + 1 elements, where the values of row i lie between positions indptr[i] and
+                 indptr[i+1].
+        """
+        indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(indices, minlength=size), out=indptr[1:])
+        return indptr
+
+    @staticmethod
+    def aggregate(rows: np.ndarray,
+                  cols: np.ndarray,
+                  ratings: np.ndarray,
+                  threshold: float,
+                  binarize: bool,
+                  update: bool,
+                  counts: np.ndarray = None):
+        """
+        Aggregates a list of (possibly repeated) ratings into a list of unique ratings, reproducing the result of
+        adding them one by one, in order, through RatingMatrix.rate:
+        a) when binarize and update, the value of a rating is the number of relevant repetitions.
+        b) when update (but not binarize), the value of a rating is the maximum value among its repetitions.
+        c) otherwise, the value of a rating is the value of its first appearance.
+        NaN ratings are discarded.
+        :param rows: the dense user index of each rating.
+        :param cols: the dense item index of each rating.
+        :param ratings: the value of each rating.
+        :param threshold: the relevance threshold of the ratings.
+        :param binarize: true if we want to store binarized ratings, false otherwise.
+        :param update: true if repeated ratings update the stored value, false otherwise.
+        :param counts: (OPTIONAL) the number of times each rating is repeated. By default, every rating appears once.
+        :return: a tuple containing a) the dense user index of the unique ratings, b) their dense item indices,
+                 c) their values, d) whether they are relevant, e) the number of valid ratings (with repetitions) and
+                 f) the number of relevant ratings (with repetitions).
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        ratings = np.asarray(ratings, dtype=np.float64)
+        counts = np.ones(len(ratings), dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+
+        valid = ~np.isnan(ratings)
+        if not valid.all():
+            rows, cols, ratings, counts = rows[valid], cols[valid], ratings[valid], counts[valid]
+
+        rel = ratings >= threshold
+        num_total = int(counts.sum())
+        num_total_rel = int(counts[rel].sum())
+        if len(ratings) == 0:
+            return rows, cols, ratings, rel, num_total, num_total_rel
+
+        if binarize:
+            values = rel.astype(np.float64) * counts if update else rel.astype(np.float64)
+        else:
+            values = ratings
+
+        rows, cols, values, rel = ArrayRatingMatrix.combine(rows, cols, values, rel, binarize, update)
+        return rows, cols, values, rel, num_total, num_total_rel
+
+    @staticmethod
+    def combine(rows: np.ndarray,
+                cols: np.ndarray,
+                values: np.ndarray,
+                rel: np.ndarray,
+                binarize: bool,
+                update: bool):
+        """
+        Combines the values of the repetitions of each rating, once binarized (when binarize and update, each value
+        is the number of relevant repetitions it stands for). Values are added when binarize and update, the maximum
+        value is kept when update (but not binarize), and the first value is kept otherwise.
+        :param rows: the dense user index of each rating.
+        :param cols: the dense item index of each rating.
+        :param values: the (binarized) value of each rating.
+        :param rel: whether each rating is relevant.
+        :param binarize: true if the ratings are binarized, false otherwise.
+        :param update: true if repeated ratings update the stored value, false otherwise.
+        :return: a tuple containing a) the dense user index of the unique ratings, b) their dense item indices,
+                 c) their values and d) whether they are relevant.
+        """
+        if len(values) == 0:
+            return rows, cols, values, rel
+
+        # A stable sort keeps the repetitions of each rating in order of arrival.
+        keys = rows * (int(cols.max()) + 1) + cols
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1])))
+        first = order[starts]
+
+        if update and binarize:
+            unique_values = np.add.reduceat(values[order], starts)
+            unique_rel = np.logical_or.reduceat(rel[order], starts)
+        elif update:
+            unique_values = np.maximum.reduceat(values[order], starts)
+            unique_rel = np.logical_or.reduceat(rel[order], starts)
+        else:
+            unique_values = values[first]
+            unique_rel = rel[first]
+
+        return rows[first], cols[first], unique_values, unique_rel
+
+    @staticmethod
+    def from_coo(users,
+                 items,
+                 ratings,
+                 threshold: float,
+                 binarize: bool,
+                 update: bool,
+                 counts=None,
+                 user_index: IdIndex = None,
+                 item_index: IdIndex = None):
+        """
+        Builds an array-backed rating matrix from a list of (possibly repeated) ratings, in a single vectorized step.
+        The result is the same as registering the users and items and calling RatingMatrix.rate for every rating, in
+        order.
+        :param users: the identifier of the user of each rating.
+        :param items: the identifier of the item of each rating.
+        :param ratings: the value of each rating.
+        :param threshold: the relevance threshold of the ratings.
+        :param binarize: true if we want to store binarized ratings, false otherwise.
+        :param update: true if repeated ratings update the stored value, false otherwise.
+        :param counts: (OPTIONAL) the number of times each rating is repeated. By default, every rating appears once.
+        :param user_index: (OPTIONAL) the index of the users, shared with other structures of the dataset. All the
+                           users in the index belong to the matrix. By default, a new index is created.
+        :param item_index: (OPTIONAL) the index of the items, shared with other structures of the dataset. All the
+                           items in the index belong to the matrix. By default, a new index is created.
+        :return: the array-backed rating matrix.
+        """
+        user_index = IdIndex() if user_index is None else user_index
+        item_index = IdIndex() if item_index is None else item_index
+
+        rows = user_index.add_all(users)
+        cols = item_index.add_all(items)
+        return ArrayRatingMatrix.from_indices(user_index, item_index, rows, cols, ratings, threshold, binarize, update,
+                                              counts)
+
+    @staticmethod
+    def from_indices(user_index: IdIndex,
+                     item_index: IdIndex,
+                     rows: np.ndarray,
+                     cols: np.ndarray,
+                     ratings: np.ndarray,
+                     threshold: float,
+                     binarize: bool,
+                     update: bool,
+                     counts: np.ndarray = None,
+                     user_mask: np.ndarray = None,
+                     item_mask: np.ndarray = None):
+        """
+        Builds an array-backed rating matrix from a list of (possibly repeated) ratings, whose users and items have
+        already been registered in the indexes. The result is the same as calling RatingMatrix.rate for every rating,
+        in order.
+        :param user_index: the index of the users.
+        :param item_index: the index of the items.
+        :param rows: the dense user index of each rating.
+        :param cols: the dense item index of each rating.
+        :param ratings: the value of each rating.
+        :param threshold: the relevance threshold of the ratings.
+        :param binarize: true if we want to store binarized ratings, false otherwise.
+        :param update: true if repeated ratings update the stored value, false otherwise.
+        :param counts: (OPTIONAL) the number of times each rating is repeated. By default, every rating appears once.
+        :param user_mask: (OPTIONAL) boolean array indicating which users of the index belong to the matrix. By
+                          default, all the users in the index do.
+        :param item_mask: (OPTIONAL) boolean array indicating which items of the index belong to the matrix. By
+                          default, all the items in the index do.
+        :return: the array-backed rating matrix.
+        """
+        rows, cols, values, rel, num_total, num_total_rel = ArrayRatingMatrix.aggregate(rows, cols, ratings,
+                                                                                         threshold, binarize, update,
+                                                                                         counts)
+        aux_matrix = ArrayRatingMatrix(user_index, item_index, rows, cols, values, threshold, binarize, update,
+                                       num_total, num_total_rel, user_mask, item_mask)
+        aux_matrix.num_rel_ratings = int(np.count_nonzero(rel))
+        return aux_matrix
+
+    @staticmethod
+    def from_rating_matrix(rating_matrix):
+        """
+        Builds the array-backed version of a rating matrix. It is meant to be called once, after the dataset has been
+        loaded. The array-backed matrix shares the user and item indexes of the original one.
+        :param rating_matrix: the original rating matrix.
+        :return: the array-backed rating matrix.
+        """
+        user_index = rating_matrix.user_index
+        item_index = rating_matrix.item_index
+
+        user_mask = np.zeros(len(user_index), dtype=bool)
+        user_mask[user_index.get_indices(list(rating_matrix.get_users()))] = True
+        item_mask = np.zeros(len(item_index), dtype=bool)
+        item_mask[item_index.get_indices(list(rating_matrix.get_items()))] = True
+
+        rows = []
+        cols = []
+        values = []
+        for user, user_ratings in rating_matrix.user_2_item_matrix.items():
+            rows.extend([user_index.get_index(user)] * len(user_ratings))
+            cols.extend(map(item_index.get_index, user_ratings.keys()))
+            values.extend(user_ratings.values())
+
+        aux_matrix = ArrayRatingMatrix(user_index, item_index, np.array(rows, dtype=np.int64),
+                                       np.array(cols, dtype=np.int64), np.array(values, dtype=np.float64),
+                                       rating_matrix.threshold, rating_matrix.binarize, rating_matrix.update,
+                                       rating_matrix.num_total_ratings, rating_matrix.num_total_rel_ratings,
+                                       user_mask, item_mask)
+        aux_matrix.num_rel_ratings = rating_matrix.num_rel_ratings
+        return aux_matrix
+
+    @staticmethod
+    def from_arrays(user_index: IdIndex,
+                    item_index: IdIndex,
+                    arrays: typing.Dict[str, np.ndarray]):
+        """
+        Rebuilds an array-backed rating matrix (or a view of it) from the arrays returned by to_arrays. The arrays
+        are used as they are (they might be memory-mapped), without copying them.
+        :param user_index: the index of the users.
+        :param item_index: the index of the items.
+        :param arrays: the arrays of the matrix.
+        :return: the array-backed rating matrix or, if the arrays were obtained from a view, the view.
+        """
+        aux_matrix = ArrayRatingMatrix.__new__(ArrayRatingMatrix)
+        aux_matrix.user_index = user_index
+        aux_matrix.item_index = item_index
+        for name in ArrayRatingMatrix.ARRAYS:
+            setattr(aux_matrix, name, arrays[name])
+            if name not in ("user_mask", "item_mask"):
+                arrays[name].setflags(write=False)
+        aux_matrix.num_users = int(np.count_nonzero(aux_matrix.user_mask))
+        aux_matrix.num_items = int(np.count_nonzero(aux_matrix.item_mask))
+
+        aux_matrix.threshold = float(arrays["threshold"])
+        aux_matrix.binarize = bool(arrays["binarize"])
+        aux_matrix.update = bool(arrays["update"])
+        aux_matrix.num_ratings = len(aux_matrix.user_values)
+        aux_matrix.num_rel_ratings = int(arrays["num_rel_ratings"])
+        aux_matrix.num_total_ratings = int(arrays["num_total_ratings"])
+        aux_matrix.num_total_rel_ratings = int(arrays["num_total_rel_ratings"])
+
+        if "view_user_mask" in arrays:
+            return RatingMatrixView(aux_matrix, arrays["view_user_mask"], arrays["view_item_mask"])
+        return aux_matrix
+
+    def extend(self,
+               rows: np.ndarray,
+               cols: np.ndarray,
+               ratings: np.ndarray):
+        """
+        Builds a new matrix containing the ratings of this one, plus some new (possibly repeated) ratings. The result
+        is the same as calling RatingMatrix.rate for every new rating, in order, after the ratings of this matrix.
+        The users and items of the new ratings must have been registered in the indexes. The new matrix contains all
+        the users and items of this matrix, plus those added to the indexes since this matrix was built.
+        :param rows: the dense user index of each new rating.
+        :param cols: the dense item index of each new rating.
+        :param ratings: the value of each new rating.
+        :return: the new array-backed rating matrix.
+        """
+        new_rows, new_cols, new_values, new_rel, num_total, num_total_rel = ArrayRatingMatrix.aggregate(
+            rows, cols, ratings, self.threshold, self.binarize, self.update)
+
+        old_rows = np.repeat(np.arange(len(self.user_mask), dtype=np.int64), np.diff(self.user_indptr))
+        old_cols = self.user_indices.astype(np.int64)
+        rows, cols, values, rel = ArrayRatingMatrix.combine(np.concatenate((old_rows, new_rows)),
+                                                            np.concatenate((old_cols, new_cols)),
+                                                            np.concatenate((self.user_values, new_values)),
+                                                            np.concatenate((self.is_relevant(self.user_values),
+                                                                            new_rel)),
+                                                            self.binarize, self.update)
+
+        user_mask = np.ones(len(self.user_index), dtype=bool)
+        user_mask[:len(self.user_mask)] = self.user_mask
+        item_mask = np.ones(len(self.item_index), dtype=bool)
+        item_mask[:len(self.item_mask)] = self.item_mask
+
+        aux_matrix = ArrayRatingMatrix(self.user_index, self.item_index, rows, cols, values, self.threshold,
+                                       self.binarize, self.update, self.num_total_ratings + num_total,
+                                       self.num_total_rel_ratings + num_total_rel, user_mask, item_mask)
+        aux_matrix.num_rel_ratings = int(np.count_nonzero(rel))
+        return aux_matrix
+
+    def to_arrays(self) -> typing.Dict[str, np.ndarray]:
+        """
+        Obtains the arrays storing the matrix, so it can be saved (see from_arrays). The indexes of users and items
+        are not included.
+        :return: a dictionary containing the arrays (and scalar values, as 0-dimensional arrays) of the matrix.
+        """
+        arrays = {name: getattr(self, name) for name in ArrayRatingMatrix.ARRAYS}
+        arrays.update(threshold=np.array(self.threshold), binarize=np.array(self.binarize),
+                      update=np.array(self.update), num_rel_ratings=np.array(self.num_rel_ratings),
+                      num_total_ratings=np.array(self.num_total_ratings),
+                      num_total_rel_ratings=np.array(self.num_total_rel_ratings))
+        return arrays
+
+    def get_user_idx(self, user) -> int:
+        """
+        Obtains the dense index of a user of the matrix.
+        :param user: the identifier of the user.
+        :return: the dense index of the user, -1 if the user does not belong to the matrix.
+        """
+        idx = self.user_index.get_index(user)
+        return idx if 0 <= idx < len(self.user_mask) and self.user_mask[idx] else -1
+
+    def get_item_idx(self, item) -> int:
+        """
+        Obtains the dense index of an item of the matrix.
+        :param item: the identifier of the item.
+        :return: the dense index of the item, -1 if the item does not belong to the matrix.
+        """
+        idx = self.item_index.get_index(item)
+        return idx if 0 <= idx < len(self.item_mask) and self.item_mask[idx] else -1
+
+    def add_user(self, user):
+        """
+        Array-backed matrices cannot be modified.
+        :raises TypeError: always.
+        """
+        raise TypeError("An array-backed rating matrix cannot be modified")
+
+    def add_item(self, item):
+        """
+        Array-backed matrices cannot be modified.
+        :raises TypeError: always.
+        """
+        raise TypeError("An array-backed rating matrix cannot be modified")
+
+    def rate(self, user, item, rating):
+        """
+        Array-backed matrices cannot be modified.
+        :raises TypeError: always.
+        """
+        raise TypeError("An array-backed rating matrix cannot be modified")
+
+    def rate_many(self, users, items, ratings, counts=None):
+        """
+        Array-backed matrices cannot be modified.
+        :raises TypeError: always.
+        """
+        raise TypeError("An array-backed rating matrix cannot be modified")
+
+    def freeze(self):
+        """
+        The matrix is already immutable.
+        :return: the matrix itself.
+        """
+        return self
+
+    def get_num_ratings(self,
+                        relevant: bool = False):
+        """
+        Obtains the number of ratings (not repeated).
+        :param relevant: True if we want to retrieve the number of relevant ratings, False otherwise
+        :return: the number of ratings (not repeated).
+        """
+        return self.num_rel_ratings if relevant else self.num_ratings
+
+    def get_num_total_ratings(self,
+                              relevant: bool = False):
+        """
+        Obtains the number of ratings (with repetitions).
+        :return: the number of ratings (with repetitions).
+        """
+        return self.num_total_rel_ratings if relevant else self.num_total_ratings
+
+    def get_num_user_ratings(self,
+                             user: int,
+                             relevant: bool = False):
+        """
+        Obtains the number of ratings of a user (not repeated)
+        :param user: the identifier of the user.
+        :param relevant: True if we want to retrieve the number of relevant ratings.
+        :return: the number of ratings of the user (not repeated)
+        """
+        idx = self.get_user_idx(user)
+        return 0 if idx < 0 else int(self.user_degrees[int(relevant), idx])
+
+    def get_num_item_ratings(self,
+                             item: int,
+                             relevant: bool = False):
+        """
+        Obtains the number of ratings of a item (not repeated)
+        :param item: the identifier of the item.
+        :param relevant: True if we want to retrieve the number of relevant ratings.
+        :return: the number of ratings of the item (not repeated)
+        """
+        idx = self.get_item_idx(item)
+        return 0 if idx < 0 else int(self.item_degrees[int(relevant), idx])
+
+    def get_user_degrees(self,
+                         relevant: bool = False) -> np.ndarray:
+        """
+        Obtains the number of ratings (not repeated) of every user, in a single array.
+        :param relevant: True if we want to retrieve the number of relevant ratings.
+        :return: an array containing the number of ratings of each user, in the same order as get_users().
+        """
+        return self.user_degrees[int(relevant)][self.user_mask]
+
+    def get_item_degrees(self,
+                         relevant: bool = False) -> np.ndarray:
+        """
+        Obtains the number of ratings (not repeated) of every item, in a single array.
+        :param relevant: True if we want to retrieve the number of relevant ratings.
+        :return: an array containing the number of ratings of each item, in the same order as get_items().
+        """
+        return self.item_degrees[int(relevant)][self.item_mask]
+
+    def get_num_users(self):
+        """
+        Obtains the number of users in the dataset.
+        :return: the number of users in the dataset.
+        """
+        return self.num_users
+
+    def get_num_items(self):
+        """
+        Obtains the number of items in the dataset.
+        :return: the number of items in the dataset.
+        """
+        return self.num_items
+
+    def get_users(self):
+        """
+        Obtains an iterator of the users in the system.
+        :return: the iterator of the users in the system.
+        """
+        return iter(self.user_index.get_ids(np.flatnonzero(self.user_mask)).tolist())
+
+    def get_items(self):
+        """
+        Obtains an iterator of the items in the system.
+        :return: the iterator of the items in the system.
+        """
+        return iter(self.item_index.get_ids(np.flatnonzero(self.item_mask)).tolist())
+
+    def get_rating(self,
+                   user_id: int,
+                   item_id: int):
+        """
+        Obtains an individual rating.
+        :param user_id: the identifier of the user
+        :param item_id: the identifier of the item
+        :return: the individual rating if exists, an empty object otherwise.
+        """
+        uidx = self.get_user_idx(user_id)
+        iidx = self.get_item_idx(item_id)
+        if uidx < 0 or iidx < 0:
+            return Optional.empty()
+
+        start, end = self.user_indptr[uidx], self.user_indptr[uidx + 1]
+        pos = start + np.searchsorted(self.user_indices[start:end], iidx)
+        if pos < end and self.user_indices[pos] == iidx:
+            return Optional.of(float(self.user_values[pos]))
+        return Optional.empty()
+
+    def get_user_ratings(self,
+                         user: int,
+                         relevant: bool = False):
+        """
+        Obtains all the ratings of an individual user.
+        :param user: the identifier of the user.
+        :param relevant: True if we want to retrieve the relevant ratings, False if we want to retrieve all.
+        :return: the ratings of the user
+        """
+        idx = self.get_user_idx(user)
+        if idx < 0:
+            return iter(())
+        start, end = self.user_indptr[idx], self.user_indptr[idx + 1]
+        return self._slice_ratings(self.item_index, self.user_indices[start:end], self.user_values[start:end],
+                                    relevant)
+
+    def get_item_ratings(self,
+                         item: int,
+                         relevant: bool = False):
+        """
+        Obtains all the ratings given to an individual item.
+        :param item: the identifier of the item.
+        :param relevant: True if we want to retrieve the relevant ratings, False if we want to retrieve all.
+        :return: the ratings given to the item.
+        """
+        idx = self.get_item_idx(item)
+        if idx < 0:
+            return iter(())
+        start, end = self.item_indptr[idx], self.item_indptr[idx + 1]
+        return self._slice_ratings(self.user_index, self.item_indices[start:end], self.item_values[start:end],
+                                    relevant)
+
+    def _slice_ratings(self,
+                        index: IdIndex,
+                        indices: np.ndarray,
+                        values: np.ndarray,
+                        relevant: bool):
+        """
+        Transforms a slice of the compressed arrays into an iterator of (identifier, rating) pairs.
+        :param index: the index of the users or items in the slice.
+        :param indices: the dense indices in the slice.
+        :param values: the rating values in the slice.
+        :param relevant: True if we only keep the relevant ratings, False otherwise.
+        :return: an iterator of (identifier, rating) pairs.
+        """
+        if relevant:
+            mask = self.is_relevant(values)
+            indices = indices[mask]
+            values = values[mask]
+        return zip(index.get_ids(indices).tolist(), values.tolist())
+
+    def is_relevant(self, value):
+        """
+        Checks whether a rating value is relevant for the dataset or not.
+        :param value: the rating value (or an array of rating values).
+        :return: whether the rating is relevant or not.
+        """
+        return value > 0.0 if self.binarize else value >= self.threshold
+
+    def memory_report(self) -> typing.Dict[str, int]:
+        """
+        Measures the memory used by the matrix.
+        :return: the number of bytes used by each of its components (see MemoryUsage.report).
+        """
+        return MemoryUsage.report(self)
+
+    def filter(self,
+               user_filter: typing.Callable[[int], bool] = None,
+               item_filter: typing.Callable[[int], bool] = None,
+               rating_filter: typing.Callable[[int, int, float], bool] = None
+               ):
+        """
+        Obtains a rating matrix containing only a fraction of the ratings. Declarative filters (see filters.Filter) are
+        applied as boolean masks over the arrays. Any other callable is applied element by element.
+        :param user_filter: (OPTIONAL) a filter for selecting the users to keep. By default, no filter is applied.
+        :param item_filter: (OPTIONAL) a filter for selecting the items to keep. By default, no filter is applied.
+        :param rating_filter: (OPTIONAL) a filter for selecting the ratings to keep. By default, no filter is applied.
+        :returns: an array-backed rating matrix containing the selected ratings.
+        """
+
+        user_mask, item_mask = self.filter_masks(user_filter, item_filter)
+        return self.select(user_mask, item_mask, rating_filter)
+
+    def filter_masks(self,
+                     user_filter: typing.Callable[[int], bool] = None,
+                     item_filter: typing.Callable[[int], bool] = None):
+        """
+        Obtains the users and items of the matrix passing a pair of filters.
+        :param user_filter: (OPTIONAL) a filter for selecting the users to keep. By default, no filter is applied.
+        :param item_filter: (OPTIONAL) a filter for selecting the items to keep. By default, no filter is applied.
+        :return: a pair of boolean arrays, indexed by dense index, for the users and the items passing the filters.
+        """
+        user_mask = self.user_mask.copy()
+        item_mask = self.item_mask.copy()
+        if user_filter is not None:
+            user_mask &= Filter.to_mask(user_filter, self.user_index.get_ids_array()[:len(self.user_mask)])
+        if item_filter is not None:
+            item_mask &= Filter.to_mask(item_filter, self.item_index.get_ids_array()[:len(self.item_mask)])
+        return user_mask, item_mask
+
+    def select(self,
+               user_mask: np.ndarray,
+               item_mask: np.ndarray,
+               rating_filter: typing.Callable[[int, int, float], bool] = None):
+        """
+        Builds a new rating matrix containing the ratings between a subset of the users and items of this one.
+        :param user_mask: boolean array, indexed by dense index, indicating which users to keep.
+        :param item_mask: boolean array, indexed by dense index, indicating which items to keep.
+        :param rating_filter: (OPTIONAL) a filter for selecting the ratings to keep. By default, no filter is applied.
+        :return: an array-backed rating matrix containing the selected ratings.
+        """
+        rows = np.repeat(np.arange(len(user_mask), dtype=np.int64), np.diff(self.user_indptr))
+        cols = self.user_indices.astype(np.int64)
+        values = self.user_values
+
+        rating_mask = user_mask[rows] & item_mask[cols]
+        if rating_filter is not None:
+            rows, cols, values = rows[rating_mask], cols[rating_mask], values[rating_mask]
+            rating_mask = Filter.to_mask(rating_filter, self.user_index.get_ids(rows), self.item_index.get_ids(cols),
+                                         values)
+
+        threshold = 0.5 if self.binarize else self.threshold
+        aux_matrix = ArrayRatingMatrix(self.user_index, self.item_index, rows[rating_mask], cols[rating_mask],
+                                       values[rating_mask], threshold, False, False, 0, 0, user_mask, item_mask)
+        aux_matrix.num_total_ratings = aux_matrix.num_ratings
+        aux_matrix.num_total_rel_ratings = aux_matrix.num_rel_ratings
+        return aux_matrix
+
+    def view(self,
+             user_filter: typing.Callable[[int], bool] = None,
+             item_filter: typing.Callable[[int], bool] = None):
+        """
+        Obtains a view of the matrix restricted to the users and items passing a pair of filters. Unlike filter, the
+        ratings are not copied: the view just stores which users and items are visible.
+        :param user_filter: (OPTIONAL) a filter for selecting the users to keep. By default, no filter is applied.
+        :param item_filter: (OPTIONAL) a filter for selecting the items to keep. By default, no filter is applied.
+        :return: the view of the matrix.
+        """
+        user_mask, item_mask = self.filter_masks(user_filter, item_filter)
+        return RatingMatrixView(self, user_mask, item_mask)
+
+    def view_masks(self,
+                   user_mask: np.ndarray = None,
+                   item_mask: np.ndarray = None):
+        """
+        Obtains a view of the matrix restricted to the users and items selected by a pair of boolean masks. Unlike
+        view, the identifiers of the users and items are not looked up.
+        :param user_mask: (OPTIONAL) boolean array, indexed by dense index, indicating which users to keep. By
+                          default, all the users are kept.
+        :param item_mask: (OPTIONAL) boolean array, indexed by dense index, indicating which items to keep. By
+                          default, all the items are kept.
+        :return: the view of the matrix.
+        """
+        return RatingMatrixView(self, RatingMatrixView.combine_masks(self.user_mask, user_mask),
+                                RatingMatrixView.combine_masks(self.item_mask, item_mask))
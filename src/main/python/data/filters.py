@@ -15,8 +15,11 @@ __copyright__ = """
 """
 __license__ = 'Mozilla Public License v. 2.0'
 
+from abc import ABC, abstractmethod
 from typing import Callable
 
+import numpy as np
+
 
 class UserFilter:
     """
@@ -66,3 +69,228 @@ class ImpressionsFilter:
     def default():
         func: Callable[[int, int], bool] = lambda user, item: True
         return func
+
+
+class Filter(ABC):
+    """
+    Declarative filter. Filters can be applied to individual elements (as the lambdas above), but they can also be
+    transformed into boolean masks over whole arrays of users / items / ratings, so that the structures backed by
+    NumPy arrays can apply them in a vectorized way. Filters can be combined with the &, | and ~ operators.
+    """
+
+    @abstractmethod
+    def __call__(self, *args) -> bool:
+        """
+        Checks whether an individual element passes the filter.
+        :param args: the element (an identifier, a (user, item) pair, a (user, item, rating) triplet...)
+        :return: True if the element passes the filter, False otherwise.
+        """
+        pass
+
+    @abstractmethod
+    def mask(self, *arrays) -> np.ndarray:
+        """
+        Applies the filter to a collection of elements.
+        :param arrays: arrays containing the elements (one array per component of the elements).
+        :return: a boolean array, True for those elements passing the filter.
+        """
+        pass
+
+    def __and__(self, other):
+        return AndFilter(self, other)
+
+    def __or__(self, other):
+        return OrFilter(self, other)
+
+    def __invert__(self):
+        return NotFilter(self)
+
+    @staticmethod
+    def to_mask(func: Callable[..., bool],
+                *arrays) -> np.ndarray:
+        """
+        Transforms any filter into a boolean mask over a collection of elements. Declarative filters are applied in
+        a vectorized way. Any other callable is applied element by element (slow).
+        :param func: the filter.
+        :param arrays: arrays containing the elements (one array per component of the elements).
+        :return: a boolean array, True for those elements passing the filter.
+        """
+        if isinstance(func, Filter):
+            return np.asarray(func.mask(*arrays), dtype=bool)
+
+        size = len(arrays[0])
+        lists = [array.tolist() if isinstance(array, np.ndarray) else array for array in arrays]
+        return np.fromiter(map(func, *lists), dtype=bool, count=size)
+
+
+class IdSetFilter(Filter):
+    """
+    Selects the users / items whose identifiers belong to a given set.
+    """
+
+    def __init__(self, ids):
+        """
+        Initializes the filter.
+        :param ids: the identifiers to keep.
+        """
+        self.ids = set(ids)
+        self.ids_array = np.asarray(list(self.ids))
+
+    def __call__(self, element) -> bool:
+        return element in self.ids
+
+    def mask(self, elements) -> np.ndarray:
+        elements = np.asarray(elements)
+        if elements.dtype.kind in "biuf" and self.ids_array.dtype.kind in "biuf":
+            return np.isin(elements, self.ids_array)
+        # NumPy compares object (and mixed) arrays pair by pair: hashing is linear in the number of elements.
+        return np.fromiter(map(self.ids.__contains__, elements.tolist()), dtype=bool, count=len(elements))
+
+
+class IdRangeFilter(Filter):
+    """
+    Selects the users / items whose (numerical) identifiers lie in a range [lower, upper).
+    """
+
+    def __init__(self,
+                 lower=None,
+                 upper=None):
+        """
+        Initializes the filter.
+        :param lower: (OPTIONAL) the minimum identifier to keep (included). By default, there is no minimum.
+        :param upper: (OPTIONAL) the maximum identifier to keep (excluded). By default, there is no maximum.
+        """
+        self.lower = lower
+        self.upper = upper
+
+    def __call__(self, element) -> bool:
+        return (self.lower is None or element >= self.lower) and (self.upper is None or element < self.upper)
+
+    def mask(self, elements) -> np.ndarray:
+        elements = np.asarray(elements)
+        result = np.ones(len(elements), dtype=bool)
+        if self.lower is not None:
+            result &= elements >= self.lower
+        if self.upper is not None:
+            result &= elements < self.upper
+        return result
+
+
+class RatingThresholdFilter(Filter):
+    """
+    Selects the ratings whose value is greater than or equal to a threshold (and, optionally, smaller than a second
+    one). It receives (user, item, rating) triplets.
+    """
+
+    def __init__(self,
+                 threshold: float,
+                 upper: float = None):
+        """
+        Initializes the filter.
+        :param threshold: the minimum value of the ratings to keep (included).
+        :param upper: (OPTIONAL) the maximum value of the ratings to keep (excluded). By default, there is no maximum.
+        """
+        self.threshold = threshold
+        self.upper = upper
+
+    def __call__(self, user, item, rating) -> bool:
+        return rating >= self.threshold and (self.upper is None or rating < self.upper)
+
+    def mask(self, users, items, ratings) -> np.ndarray:
+        ratings = np.asarray(ratings)
+        result = ratings >= self.threshold
+        if self.upper is not None:
+            result &= ratings < self.upper
+        return result
+
+
+class TimestampWindowFilter(Filter):
+    """
+    Selects the time points lying in a time window [start, end). It receives (user, item, timestamp) triplets.
+    """
+
+    def __init__(self,
+                 start=None,
+                 end=None):
+        """
+        Initializes the filter.
+        :param start: (OPTIONAL) the first timestamp of the window (included). By default, there is no start.
+        :param end: (OPTIONAL) the last timestamp of the window (excluded). By default, there is no end.
+        """
+        self.start = start
+        self.end = end
+
+    def __call__(self, user, item, timestamp) -> bool:
+        return (self.start is None or timestamp >= self.start) and (self.end is None or timestamp < self.end)
+
+    def mask(self, users, items, timestamps) -> np.ndarray:
+        timestamps = np.asarray(timestamps)
+        result = np.ones(len(timestamps), dtype=bool)
+        if self.start is not None:
+            result &= timestamps >= self.start
+        if self.end is not None:
+            result &= timestamps < self.end
+        return result
+
+
+class AndFilter(Filter):
+    """
+    Selects the elements passing all the given filters. The filters can be declarative filters or any callable.
+    """
+
+    def __init__(self, *filters):
+        """
+        Initializes the filter.
+        :param filters: the filters to combine.
+        """
+        self.filters = filters
+
+    def __call__(self, *args) -> bool:
+        return all(func(*args) for func in self.filters)
+
+    def mask(self, *arrays) -> np.ndarray:
+        result = np.ones(len(arrays[0]), dtype=bool)
+        for func in self.filters:
+            result &= Filter.to_mask(func, *arrays)
+        return result
+
+
+class OrFilter(Filter):
+    """
+    Selects the elements passing any of the given filters. The filters can be declarative filters or any callable.
+    """
+
+    def __init__(self, *filters):
+        """
+        Initializes the filter.
+        :param filters: the filters to combine.
+        """
+        self.filters = filters
+
+    def __call__(self, *args) -> bool:
+        return any(func(*args) for func in self.filters)
+
+    def mask(self, *arrays) -> np.ndarray:
+        result = np.zeros(len(arrays[0]), dtype=bool)
+        for func in self.filters:
+            result |= Filter.to_mask(func, *arrays)
+        return result
+
+
+class NotFilter(Filter):
+    """
+    Selects the elements which do not pass a given filter (a declarative filter or any callable).
+    """
+
+    def __init__(self, func):
+        """
+        Initializes the filter.
+        :param func: the filter to negate.
+        """
+        self.func = func
+
+    def __call__(self, *args) -> bool:
+        return not self.func(*args)
+
+    def mask(self, *arrays) -> np.ndarray:
+        return ~Filter.to_mask(self.func, *arrays)
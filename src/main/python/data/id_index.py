@@ -0,0 +1,158 @@
+"""
+Index for mapping the external identifiers of users and items to dense integer indices.
+"""
+
+__version__ = '0.1'
+__author__ = 'Javier Sanz-Cruzado, Pablo Castells'
+__email__ = 'javier.sanz-cruzado@uam.es, pablo.castells@uam.es'
+__copyright__ = """
+ Copyright (C) 2021 Information Retrieval Group at Universidad Autónoma
+ de Madrid, http://ir.ii.uam.es.
+
+ This Source Code Form is subject to the terms of the Mozilla Public
+ License, v. 2.0. If a copy of the MPL was not distributed with this
+ file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+__license__ = 'Mozilla Public License v. 2.0'
+
+import typing
+
+import numpy as np
+from ..utils.memory import MemoryUsage
+
+
+class IdIndex:
+    """
+    Maps external identifiers (of users, items, series...) to dense indices 0..n-1, and back. Identifiers receive
+    their index in order of arrival. A single index can be shared by all the structures of a dataset, so the dense
+    index of an element is the same everywhere, and it can be used as position in flat NumPy arrays.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty index.
+        """
+        self.id_2_idx = dict()
+        self.idx_2_id = list()
+        self.ids_array = None
+
+    @staticmethod
+    def from_ids(ext_ids):
+        """
+        Builds an index from the list of its identifiers.
+        :param ext_ids: the (not repeated) external identifiers, sorted by dense index (a list or an array).
+        :return: the index.
+        """
+        index = IdIndex()
+        index.idx_2_id = ext_ids.tolist() if isinstance(ext_ids, np.ndarray) else list(ext_ids)
+        index.id_2_idx = dict(zip(index.idx_2_id, range(len(index.idx_2_id))))
+        return index
+
+    def add(self, ext_id) -> int:
+        """
+        Adds an identifier to the index (if it was not already present).
+        :param ext_id: the external identifier.
+        :return: the dense index of the identifier.
+        """
+        idx = self.id_2_idx.get(ext_id)
+        if idx is None:
+            idx = len(self.idx_2_id)
+            self.id_2_idx[ext_id] = idx
+            self.idx_2_id.append(ext_id)
+            self.ids_array = None
+        return idx
+
+    def add_all(self, ext_ids) -> np.ndarray:
+        """
+        Adds a collection of identifiers to the index. New identifiers receive their indices in order of first
+        appearance, as if they were added one by one.
+        :param ext_ids: the external identifiers (possibly repeated).
+        :return: an array with the dense index of each of the identifiers.
+        """
+        ext_ids = np.asarray(ext_ids)
+        if len(ext_ids) == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        uniques, first, inverse = np.unique(ext_ids, return_index=True, return_inverse=True)
+        order = np.argsort(first, kind='stable')
+        indices = np.empty(len(uniques), dtype=np.int64)
+        for pos, ext_id in zip(order.tolist(), uniques[order].tolist()):
+            indices[pos] = self.add(ext_id)
+        return indices[inverse.reshape(-1)]
+
+    def get_index(self, ext_id) -> int:
+        """
+        Obtains the dense index of an identifier.
+        :param ext_id: the external identifier.
+        :return: the dense index of the identifier, -1 if it is not in the index.
+        """
+        return self.id_2_idx.get(ext_id, -1)
+
+    def get_indices(self, ext_ids) -> np.ndarray:
+        """
+        Obtains the dense indices of a collection of identifiers.
+        :param ext_ids: the external identifiers.
+        :return: an array with the dense index of each identifier (-1 for those not in the index).
+        """
+        ext_ids = np.asarray(ext_ids)
+        if len(ext_ids) == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        uniques, inverse = np.unique(ext_ids, return_inverse=True)
+        indices = np.fromiter((self.id_2_idx.get(ext_id, -1) for ext_id in uniques.tolist()), dtype=np.int64,
+                              count=len(uniques))
+        return indices[inverse.reshape(-1)]
+
+    def get_id(self, idx: int):
+        """
+        Obtains the external identifier for a dense index.
+        :param idx: the dense index.
+        :return: the external identifier.
+        """
+        return self.idx_2_id[idx]
+
+    def get_ids(self, indices: np.ndarray) -> np.ndarray:
+        """
+        Obtains the external identifiers for a collection of dense indices.
+        :param indices: the dense indices.
+        :return: an array containing the external identifiers.
+        """
+        return self.get_ids_array()[indices]
+
+    def get_ids_array(self) -> np.ndarray:
+        """
+        Obtains all the external identifiers, sorted by dense index.
+        :return: an array containing the external identifiers.
+        """
+        if self.ids_array is None or len(self.ids_array) != len(self.idx_2_id):
+            self.ids_array = np.asarray(self.idx_2_id)
+        return self.ids_array
+
+    def contains(self, ext_id) -> bool:
+        """
+        Checks whether an identifier is in the index.
+        :param ext_id: the external identifier.
+        :return: True if the identifier is in the index, False otherwise.
+        """
+        return ext_id in self.id_2_idx
+
+    def get_ids_iterator(self) -> typing.Iterator:
+        """
+        Obtains an iterator over the external identifiers, sorted by dense index.
+        :return: the iterator over the identifiers.
+        """
+        return iter(self.idx_2_id)
+
+    def __len__(self) -> int:
+        """
+        Obtains the number of identifiers in the index.
+        :return: the number of identifiers in the index.
+        """
+        return len(self.idx_2_id)
+
+    def memory_report(self) -> typing.Dict[str, int]:
+        """
+        Measures the memory used by the index.
+        :return: the number of bytes used by each of its components (see MemoryUsage.report).
+        """
+        return MemoryUsage.report(self)
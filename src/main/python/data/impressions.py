@@ -17,8 +17,13 @@ __license__ = 'Mozilla Public License v. 2.0'
 
 import typing
 
+import numpy as np
+
 from .adding_return import AddingReturn
+from .array_impressions import ArrayImpressions
 from .filters import UserFilter, ItemFilter, RatingFilter, ImpressionsFilter
+from .id_index import IdIndex
+from ..utils.memory import MemoryUsage
 
 
 class Impressions:
@@ -26,10 +31,18 @@ class Impressions:
     Class that represents the impressions, i.e. the set of items which have been shown to a user.
     """
 
-    def __init__(self):
+    def __init__(self,
+                 user_index: IdIndex = None,
+                 item_index: IdIndex = None):
         """
         Initializes the impressions in the system.
+        :param user_index: (OPTIONAL) the index of the users, shared with other structures of the dataset.
+                           By default, a new index is created.
+        :param item_index: (OPTIONAL) the index of the items, shared with other structures of the dataset.
+                           By default, a new index is created.
         """
+        self.user_index = IdIndex() if user_index is None else user_index
+        self.item_index = IdIndex() if item_index is None else item_index
         self.user_impressions = dict()
         self.item_impressions = dict()
         self.num_impressions = 0
@@ -44,6 +57,7 @@ class Impressions:
             return False
         else:
             self.user_impressions[user_id] = set()
+            self.user_index.add(user_id)
             return True
 
     def add_item(self, item_id):
@@ -56,6 +70,7 @@ class Impressions:
             return False
         else:
             self.item_impressions[item_id] = set()
+            self.item_index.add(item_id)
             return True
 
     def add_impression(self, user_id, item_id):
@@ -77,6 +92,35 @@ class Impressions:
                 return AddingReturn.ADDED
         return AddingReturn.ERROR
 
+    def add_impressions(self, user_id, item_ids):
+        """
+        Adds a whole list of impressions for a user (for instance, a recommendation list shown to them). As in
+        add_impression, the user and the items must have been previously added: the impressions of unknown users or
+        items are discarded. Repeated impressions are discarded using set operations, instead of checking each
+        impression separately.
+        :param user_id: the identifier of the user.
+        :param item_ids: the identifiers of the items shown to the user (a list or a NumPy array).
+        :return: the number of new impressions.
+        """
+        if isinstance(item_ids, np.ndarray):
+            item_ids = item_ids.tolist()
+
+        user_impressions = self.user_impressions.get(user_id)
+        if user_impressions is None:
+            return 0
+        new_items = set(item_ids)
+        new_items.intersection_update(self.item_impressions.keys())
+        new_items.difference_update(user_impressions)
+        if not new_items:
+            return 0
+
+        for item_id in new_items:
+            self.item_impressions[item_id].add(user_id)
+
+        user_impressions.update(new_items)
+        self.num_impressions += len(new_items)
+        return len(new_items)
+
     def get_users(self):
         """
         Obtains the set of users.
@@ -144,6 +188,21 @@ class Impressions:
         """
         return len(self.item_impressions.get(item, []))
 
+    def freeze(self):
+        """
+        Obtains an immutable, array-backed copy of the impressions (see ArrayImpressions), sharing their user and item
+        indexes. It is meant to be called once all the impressions have been added.
+        :return: the array-backed impressions.
+        """
+        return ArrayImpressions.from_impressions(self)
+
+    def memory_report(self) -> typing.Dict[str, int]:
+        """
+        Measures the memory used by the impressions.
+        :return: the number of bytes used by each of its components (see MemoryUsage.report).
+        """
+        return MemoryUsage.report(self)
+
     def filter(self,
                user_filter: typing.Callable[[int], bool] = None,
                item_filter: typing.Callable[[int], bool] = None,
@@ -165,7 +224,7 @@ class Impressions:
         if impressions_filter is None:
             impressions_filter = ImpressionsFilter.default()
 
-        aux_matrix = Impressions()
+        aux_matrix = Impressions(self.user_index, self.item_index)
 
         for item in filter(item_filter, self.get_items()):
             aux_matrix.add_item(item)
@@ -0,0 +1,288 @@
+"""
+Filtered view of array-backed impressions, which does not copy the impressions.
+"""
+
+__version__ = '0.1'
+__author__ = 'Javier Sanz-Cruzado, Pablo Castells'
+__email__ = 'javier.sanz-cruzado@uam.es, pablo.castells@uam.es'
+__copyright__ = """
+ Copyright (C) 2021 Information Retrieval Group at Universidad Autónoma
+ de Madrid, http://ir.ii.uam.es.
+
+ This Source Code Form is subject to the terms of the Mozilla Public
+ License, v. 2.0. If a copy of the MPL was not distributed with this
+ file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+__license__ = 'Mozilla Public License v. 2.0'
+
+import typing
+
+import numpy as np
+
+from .filters import Filter
+from .rating_matrix_view import RatingMatrixView
+from ..utils.memory import MemoryUsage
+
+
+class ImpressionsView:
+    """
+    Read-only view of array-backed impressions (ArrayImpressions), restricted to a subset of their users and items.
+    The view only stores a user mask and an item mask over the dense indices of the parent impressions, together with
+    the number of impressions of each user and item (counted when first needed). It offers the same reading methods as
+    the impressions, and it can be transformed into independent impressions by calling materialize.
+    """
+
+    def __init__(self,
+                 parent,
+                 user_mask: np.ndarray,
+                 item_mask: np.ndarray):
+        """
+        Initializes the view.
+        :param parent: the array-backed impressions.
+        :param user_mask: boolean array, indexed by dense index, indicating which users of the parent are visible.
+        :param item_mask: boolean array, indexed by dense index, indicating which items of the parent are visible.
+        """
+        self.parent = parent
+        self.user_index = parent.user_index
+        self.item_index = parent.item_index
+        self.user_mask = user_mask
+        self.item_mask = item_mask
+
+        self.num_users = int(np.count_nonzero(user_mask))
+        self.num_items = int(np.count_nonzero(item_mask))
+
+        # Number of visible impressions of each user / item, by dense index. They are only counted when first needed
+        # (see get_user_degrees_array and get_item_degrees_array).
+        self.user_degrees = None
+        self.item_degrees = None
+        self.num_impressions = None
+
+    @staticmethod
+    def count_degrees(own_mask: np.ndarray,
+                      other_mask: np.ndarray,
+                      indptr: np.ndarray,
+                      indices: np.ndarray) -> np.ndarray:
+        """
+        Counts the visible impressions of each user (item). An impression is visible if both its user and its item
+        are.
+        :param own_mask: the mask of the visible users (items).
+        :param other_mask: the mask of the visible items (users).
+        :param indptr: the pointer array of the impressions of the parent, by user (item).
+        :param indices: the dense item (user) index of the impressions of the parent, by user (item).
+        :return: an array containing the number of visible impressions of each user (item), by dense index.
+        """
+        if other_mask.all():
+            degrees = np.diff(indptr).astype(np.int64)
+        else:
+            degrees = RatingMatrixView.count_visible(other_mask[indices], indptr)
+        degrees[~own_mask] = 0
+        return degrees
+
+    def get_user_degrees_array(self) -> np.ndarray:
+        """
+        Obtains the number of visible impressions of each user, by dense index. They are counted the first time they
+        are needed.
+        :return: the array of user degrees.
+        """
+        if self.user_degrees is None:
+            self.user_degrees = ImpressionsView.count_degrees(self.user_mask, self.item_mask, self.parent.user_indptr,
+                                                              self.parent.user_indices)
+        return self.user_degrees
+
+    def get_item_degrees_array(self) -> np.ndarray:
+        """
+        Obtains the number of visible impressions of each item, by dense index. They are counted the first time they
+        are needed.
+        :return: the array of item degrees.
+        """
+        if self.item_degrees is None:
+            self.item_degrees = ImpressionsView.count_degrees(self.item_mask, self.user_mask, self.parent.item_indptr,
+                                                              self.parent.item_indices)
+        return self.item_degrees
+
+    def get_user_idx(self, user) -> int:
+        """
+        Obtains the dense index of a visible user.
+        :param user: the identifier of the user.
+        :return: the dense index of the user, -1 if the user is not visible.
+        """
+        idx = self.user_index.get_index(user)
+        return idx if 0 <= idx < len(self.user_mask) and self.user_mask[idx] else -1
+
+    def get_item_idx(self, item) -> int:
+        """
+        Obtains the dense index of a visible item.
+        :param item: the identifier of the item.
+        :return: the dense index of the item, -1 if the item is not visible.
+        """
+        idx = self.item_index.get_index(item)
+        return idx if 0 <= idx < len(self.item_mask) and self.item_mask[idx] else -1
+
+    def get_users(self):
+        """
+        Obtains the set of users.
+        :return: the set of users.
+        """
+        return iter(self.user_index.get_ids(np.flatnonzero(self.user_mask)).tolist())
+
+    def get_items(self):
+        """
+        Obtains the set of items.
+        :return: the set of items.
+        """
+        return iter(self.item_index.get_ids(np.flatnonzero(self.item_mask)).tolist())
+
+    def get_user_impressions(self, user_id):
+        """
+        Obtains the set of impressions for a user.
+        :param user_id: the identifier of the user.
+        :return: an iterator of the impressions for the user.
+        """
+        idx = self.get_user_idx(user_id)
+        if idx < 0:
+            return iter(())
+        indices = self.parent.user_indices[self.parent.user_indptr[idx]:self.parent.user_indptr[idx + 1]]
+        return iter(self.item_index.get_ids(indices[self.item_mask[indices]]).tolist())
+
+    def get_item_impressions(self, item_id):
+        """
+        Obtains the set of users including an item in their impressions.
+        :param item_id: the identifier of the item.
+        :return: an iterator of the impressed users.
+        """
+        idx = self.get_item_idx(item_id)
+        if idx < 0:
+            return iter(())
+        indices = self.parent.item_indices[self.parent.item_indptr[idx]:self.parent.item_indptr[idx + 1]]
+        return iter(self.user_index.get_ids(indices[self.user_mask[indices]]).tolist())
+
+    def get_num_impressions(self):
+        """
+        Obtains the number of impressions.
+        :return: the number of impressions.
+        """
+        if self.num_impressions is None:
+            self.num_impressions = int(self.get_user_degrees_array().sum())
+        return self.num_impressions
+
+    def get_num_users(self):
+        """
+        Obtains the number of users.
+        :return: the number of users.
+        """
+        return self.num_users
+
+    def get_num_items(self):
+        """
+        Obtains the number of items.
+        :return: the number of items.
+        """
+        return self.num_items
+
+    def get_num_user_impressions(self, user):
+        """
+        Obtains the number of impressions for a user.
+        :param user: the identifier of the user.
+        :return: the number of impressions for the user.
+        """
+        idx = self.get_user_idx(user)
+        return 0 if idx < 0 else int(self.get_user_degrees_array()[idx])
+
+    def get_num_item_impressions(self, item):
+        """
+        Obtains the number of impressions in which an item appears.
+        :param item: the item identifier.
+        :return: the number of impressions in which the item appears.
+        """
+        idx = self.get_item_idx(item)
+        return 0 if idx < 0 else int(self.get_item_degrees_array()[idx])
+
+    def view(self,
+             user_filter: typing.Callable[[int], bool] = None,
+             item_filter: typing.Callable[[int], bool] = None):
+        """
+        Obtains a narrower view, restricted to the visible users and items passing a pair of filters.
+        :param user_filter: (OPTIONAL) a filter for selecting the users to keep. By default, no filter is applied.
+        :param item_filter: (OPTIONAL) a filter for selecting the items to keep. By default, no filter is applied.
+        :return: the view of the parent impressions.
+        """
+        user_mask, item_mask = self.filter_masks(user_filter, item_filter)
+        return ImpressionsView(self.parent, user_mask, item_mask)
+
+    def view_masks(self,
+                   user_mask: np.ndarray = None,
+                   item_mask: np.ndarray = None):
+        """
+        Obtains a narrower view, restricted to the visible users and items selected by a pair of boolean masks.
+        :param user_mask: (OPTIONAL) boolean array, indexed by dense index, indicating which users to keep. By
+                          default, all the visible users are kept.
+        :param item_mask: (OPTIONAL) boolean array, indexed by dense index, indicating which items to keep. By
+                          default, all the visible items are kept.
+        :return: the view of the parent impressions.
+        """
+        return ImpressionsView(self.parent, RatingMatrixView.combine_masks(self.user_mask, user_mask),
+                               RatingMatrixView.combine_masks(self.item_mask, item_mask))
+
+    def freeze(self):
+        """
+        Views are already immutable.
+        :return: the view itself.
+        """
+        return self
+
+    def to_arrays(self) -> typing.Dict[str, np.ndarray]:
+        """
+        Obtains the arrays storing the view (those of the parent impressions, and the masks of the view), so it can
+        be saved. The view is rebuilt by ArrayImpressions.from_arrays.
+        :return: a dictionary containing the arrays.
+        """
+        arrays = self.parent.to_arrays()
+        arrays.update(view_user_mask=self.user_mask, view_item_mask=self.item_mask)
+        return arrays
+
+    def memory_report(self) -> typing.Dict[str, int]:
+        """
+        Measures the memory used by the view (including its parent impressions).
+        :return: the number of bytes used by each of its components (see MemoryUsage.report).
+        """
+        return MemoryUsage.report(self)
+
+    def filter(self,
+               user_filter: typing.Callable[[int], bool] = None,
+               item_filter: typing.Callable[[int], bool] = None,
+               impressions_filter: typing.Callable[[int, int], bool] = None
+               ):
+        """
+        Obtains a set of impressions containing only a fraction of the visible impressions.
+        :param user_filter: (OPTIONAL) a filter for selecting the users to keep. By default, no filter is applied.
+        :param item_filter: (OPTIONAL) a filter for selecting the items to keep. By default, no filter is applied.
+        :param impressions_filter: (OPTIONAL) a filter for selecting the impressions to keep.
+                                    By default, no filter is applied.
+        :returns: array-backed impressions containing the selected ones.
+        """
+        user_mask, item_mask = self.filter_masks(user_filter, item_filter)
+        return self.parent.select(user_mask, item_mask, impressions_filter)
+
+    def filter_masks(self,
+                     user_filter: typing.Callable[[int], bool] = None,
+                     item_filter: typing.Callable[[int], bool] = None):
+        """
+        Obtains the visible users and items passing a pair of filters.
+        :param user_filter: (OPTIONAL) a filter for selecting the users to keep. By default, no filter is applied.
+        :param item_filter: (OPTIONAL) a filter for selecting the items to keep. By default, no filter is applied.
+        :return: a pair of boolean arrays, indexed by dense index, for the users and the items passing the filters.
+        """
+        user_mask = self.user_mask.copy()
+        item_mask = self.item_mask.copy()
+        if user_filter is not None:
+            user_mask &= Filter.to_mask(user_filter, self.user_index.get_ids_array()[:len(self.user_mask)])
+        if item_filter is not None:
+            item_mask &= Filter.to_mask(item_filter, self.item_index.get_ids_array()[:len(self.item_mask)])
+        return user_mask, item_mask
+
+    def materialize(self):
+        """
+        Copies the visible impressions into independent array-backed impressions.
+        :return: the array-backed impressions.
+        """
+        return self.parent.select(self.user_mask, self.item_mask)
@@ -20,8 +20,13 @@ import math
 
 import typing
 
+import numpy as np
+
 from .adding_return import AddingReturn
+from .array_rating_matrix import ArrayRatingMatrix
 from .filters import UserFilter, ItemFilter, RatingFilter
+from .id_index import IdIndex
+from ..utils.memory import MemoryUsage
 from ..utils.optional import Optional
 
 
@@ -34,7 +39,9 @@ class RatingMatrix:
     def __init__(self,
                  threshold: float,
                  binarize: bool,
-                 update: bool):
+                 update: bool,
+                 user_index: IdIndex = None,
+                 item_index: IdIndex = None):
         """
         Initializes the rating matrix.
         :param threshold: the relevance threshold of the ratings.
@@ -42,13 +49,24 @@ class RatingMatrix:
         :param update:  true if a) we want to add the number of relevant ratings to a user (when binarizing) or
                         b) we want to take the maximum possible value for a rating (when we do not binarize).
                         False otherwise.
+        :param user_index: (OPTIONAL) the index of the users, shared with other structures of the dataset.
+                           By default, a new index is created.
+        :param item_index: (OPTIONAL) the index of the items, shared with other structures of the dataset.
+                           By default, a new index is created.
         """
         self.users = set()
         self.items = set()
 
+        self.user_index = IdIndex() if user_index is None else user_index
+        self.item_index = IdIndex() if item_index is None else item_index
+
         self.user_2_item_matrix = dict()
         self.item_2_user_matrix = dict()
 
+        # Number of ratings (first row) and relevant ratings (second row) of each user / item, by dense index.
+        self.user_degrees = np.zeros((2, max(len(self.user_index), 16)), dtype=np.int64)
+        self.item_degrees = np.zeros((2, max(len(self.item_index), 16)), dtype=np.int64)
+
         self.num_ratings = 0
         self.num_rel_ratings = 0
 
@@ -70,6 +88,7 @@ class RatingMatrix:
             return False
         else:
             self.users.add(user)
+            self.user_index.add(user)
             self.user_2_item_matrix[user] = dict()
             return True
 
@@ -84,6 +103,7 @@ class RatingMatrix:
             return False
         else:
             self.items.add(item)
+            self.item_index.add(item)
             self.item_2_user_matrix[item] = dict()
             return True
 
@@ -115,17 +135,22 @@ class RatingMatrix:
                 self.item_2_user_matrix[item][user] = val
                 self.num_rel_ratings += 1 if rel else 0
                 self.num_ratings += 1
+                self.update_degrees(user, item, True, rel)
                 return AddingReturn.ADDED
             elif self.binarize and self.update:  # The rating already exists, and we count the number of positives.
                 oldrel = oldval > 0
                 self.user_2_item_matrix[user][item] = val + oldval
                 self.item_2_user_matrix[item][user] = val + oldval
-                self.num_rel_ratings += 1 if (not oldrel and rel) else 0
+                if not oldrel and rel:
+                    self.num_rel_ratings += 1
+                    self.update_degrees(user, item, False, True)
                 return AddingReturn.UPDATED
             elif self.update and val > oldval:
                 oldrel = oldval >= self.threshold
                 val = max(oldval, val)
-                self.num_rel_ratings += 1 if (not oldrel and rel) else 0
+                if not oldrel and rel:
+                    self.num_rel_ratings += 1
+                    self.update_degrees(user, item, False, True)
                 self.user_2_item_matrix[user][item] = val
                 self.item_2_user_matrix[item][user] = val
                 return AddingReturn.UPDATED
@@ -134,6 +159,127 @@ class RatingMatrix:
         else:
             return AddingReturn.ERROR
 
+    def rate_many(self,
+                  users,
+                  items,
+                  ratings,
+                  counts=None):
+        """
+        Adds a list of ratings to the matrix. The result is the same as calling rate for every rating, in order, but
+        repeated ratings are aggregated in a single vectorized step, so each (user, item) pair is only written once.
+        Ratings of users / items which are not in the matrix are discarded.
+        :param users: the identifier of the user of each rating.
+        :param items: the identifier of the item of each rating.
+        :param ratings: the value of each rating.
+        :param counts: (OPTIONAL) the number of times each rating is repeated. By default, every rating appears once.
+        :return: the number of new (not repeated) ratings added to the matrix.
+        """
+        users = np.asarray(users)
+        items = np.asarray(items)
+        ratings = np.asarray(ratings, dtype=np.float64)
+        if len(ratings) == 0:
+            return 0
+
+        # We only keep the ratings whose user and item are in the matrix.
+        unique_users, user_inverse = np.unique(users, return_inverse=True)
+        unique_items, item_inverse = np.unique(items, return_inverse=True)
+        valid_users = np.fromiter(map(self.users.__contains__, unique_users.tolist()), dtype=bool,
+                                  count=len(unique_users))
+        valid_items = np.fromiter(map(self.items.__contains__, unique_items.tolist()), dtype=bool,
+                                  count=len(unique_items))
+        valid = valid_users[user_inverse.reshape(-1)] & valid_items[item_inverse.reshape(-1)]
+        if counts is not None:
+            counts = np.asarray(counts)[valid]
+
+        rows, cols, values, rel, num_total, num_total_rel = ArrayRatingMatrix.aggregate(
+            user_inverse.reshape(-1)[valid], item_inverse.reshape(-1)[valid], ratings[valid], self.threshold,
+            self.binarize, self.update, counts)
+
+        self.num_total_ratings += num_total
+        self.num_total_rel_ratings += num_total_rel
+
+        num_added = 0
+        for user, item, val, is_rel in zip(unique_users[rows].tolist(), unique_items[cols].tolist(), values.tolist(),
+                                           rel.tolist()):
+            user_ratings = self.user_2_item_matrix[user]
+            oldval = user_ratings.get(item)
+            if oldval is None:  # The rating does not exist.
+                user_ratings[item] = val
+                self.item_2_user_matrix[item][user] = val
+                self.num_rel_ratings += 1 if is_rel else 0
+                self.num_ratings += 1
+                self.update_degrees(user, item, True, is_rel)
+                num_added += 1
+            elif self.binarize and self.update:  # The rating already exists, and we count the number of positives.
+                user_ratings[item] = val + oldval
+                self.item_2_user_matrix[item][user] = val + oldval
+                if not oldval > 0 and is_rel:
+                    self.num_rel_ratings += 1
+                    self.update_degrees(user, item, False, True)
+            elif self.update and val > oldval:
+                if not oldval >= self.threshold and is_rel:
+                    self.num_rel_ratings += 1
+                    self.update_degrees(user, item, False, True)
+                user_ratings[item] = val
+                self.item_2_user_matrix[item][user] = val
+        return num_added
+
+    def contains_ratings(self,
+                         users,
+                         items) -> np.ndarray:
+        """
+        Checks which of a list of (user, item) pairs already have a rating in the matrix.
+        :param users: the identifier of the user of each pair.
+        :param items: the identifier of the item of each pair.
+        :return: a boolean array, True for the pairs having a rating.
+        """
+        if isinstance(users, np.ndarray):
+            users = users.tolist()
+        if isinstance(items, np.ndarray):
+            items = items.tolist()
+        empty = dict()
+        return np.fromiter((item in self.user_2_item_matrix.get(user, empty) for user, item in zip(users, items)),
+                           dtype=bool, count=len(users))
+
+    def update_degrees(self,
+                       user: int,
+                       item: int,
+                       new: bool,
+                       relevant: bool):
+        """
+        Updates the number of ratings of a user and an item after adding or updating a rating between them.
+        :param user: the identifier of the user.
+        :param item: the identifier of the item.
+        :param new: True if the rating has just been added, False if it has just been updated.
+        :param relevant: True if the rating is relevant (and it was not before the update), False otherwise.
+        """
+        user_idx = self.user_index.get_index(user)
+        item_idx = self.item_index.get_index(item)
+        if user_idx >= self.user_degrees.shape[1]:
+            self.user_degrees = RatingMatrix.grow_degrees(self.user_degrees, max(user_idx + 1, len(self.user_index)))
+        if item_idx >= self.item_degrees.shape[1]:
+            self.item_degrees = RatingMatrix.grow_degrees(self.item_degrees, max(item_idx + 1, len(self.item_index)))
+
+        if new:
+            self.user_degrees[0, user_idx] += 1
+            self.item_degrees[0, item_idx] += 1
+        if relevant:
+            self.user_degrees[1, user_idx] += 1
+            self.item_degrees[1, item_idx] += 1
+
+    @staticmethod
+    def grow_degrees(degrees: np.ndarray,
+                     size: int) -> np.ndarray:
+        """
+        Enlarges an array of degrees, so it fits (at least) a given number of users / items.
+        :param degrees: the array of degrees.
+        :param size: the minimum number of users / items.
+        :return: the enlarged array (it doubles its capacity, if that is enough).
+        """
+        aux = np.zeros((2, max(size, 2 * degrees.shape[1])), dtype=np.int64)
+        aux[:, :degrees.shape[1]] = degrees
+        return aux
+
     def get_num_ratings(self,
                         relevant: bool = False):
         """
@@ -161,12 +307,10 @@ class RatingMatrix:
         :return: the number of ratings of the user (not repeated)
         """
 
-        if self.user_2_item_matrix.__contains__(user):
-            if relevant:
-                sum((1.0 for item, rating in self.user_2_item_matrix.get(user).items() if self.is_relevant(rating)))
-            else:
-                return len(self.user_2_item_matrix.get(user).items())
-        return 0
+        if not self.users.__contains__(user):
+            return 0
+        idx = self.user_index.get_index(user)
+        return int(self.user_degrees[int(relevant), idx]) if idx < self.user_degrees.shape[1] else 0
 
     def get_num_item_ratings(self,
                              item: int,
@@ -178,12 +322,32 @@ class RatingMatrix:
         :return: the number of ratings of the item (not repeated)
         """
 
-        if self.item_2_user_matrix.__contains__(item):
-            if relevant:
-                sum((1.0 for item, rating in self.item_2_user_matrix.get(item).items() if self.is_relevant(rating)))
-            else:
-                return len(self.item_2_user_matrix.get(item).items())
-        return 0
+        if not self.items.__contains__(item):
+            return 0
+        idx = self.item_index.get_index(item)
+        return int(self.item_degrees[int(relevant), idx]) if idx < self.item_degrees.shape[1] else 0
+
+    def get_user_degrees(self,
+                         relevant: bool = False) -> np.ndarray:
+        """
+        Obtains the number of ratings (not repeated) of every user, in a single array.
+        :param relevant: True if we want to retrieve the number of relevant ratings.
+        :return: an array containing the number of ratings of each user, in the same order as get_users().
+        """
+        indices = self.user_index.get_indices(list(self.users))
+        degrees = self.user_degrees[int(relevant)]
+        return np.where(indices < len(degrees), degrees[np.minimum(indices, len(degrees) - 1)], 0)
+
+    def get_item_degrees(self,
+                         relevant: bool = False) -> np.ndarray:
+        """
+        Obtains the number of ratings (not repeated) of every item, in a single array.
+        :param relevant: True if we want to retrieve the number of relevant ratings.
+        :return: an array containing the number of ratings of each item, in the same order as get_items().
+        """
+        indices = self.item_index.get_indices(list(self.items))
+        degrees = self.item_degrees[int(relevant)]
+        return np.where(indices < len(degrees), degrees[np.minimum(indices, len(degrees) - 1)], 0)
 
     def get_num_users(self):
         """
@@ -267,6 +431,21 @@ class RatingMatrix:
         """
         return value > 0.0 if self.binarize else value >= self.threshold
 
+    def freeze(self):
+        """
+        Obtains an immutable, array-backed copy of the rating matrix (see ArrayRatingMatrix), sharing its user and item
+        indexes. It is meant to be called once all the ratings have been added.
+        :return: the array-backed rating matrix.
+        """
+        return ArrayRatingMatrix.from_rating_matrix(self)
+
+    def memory_report(self) -> typing.Dict[str, int]:
+        """
+        Measures the memory used by the matrix.
+        :return: the number of bytes used by each of its components (see MemoryUsage.report).
+        """
+        return MemoryUsage.report(self)
+
     def filter(self,
                user_filter: typing.Callable[[int], bool] = None,
                item_filter: typing.Callable[[int], bool] = None,
@@ -288,9 +467,9 @@ class RatingMatrix:
             rating_filter = RatingFilter.default()
 
         if self.binarize:
-            aux_matrix = RatingMatrix(0.5, False, False)
+            aux_matrix = RatingMatrix(0.5, False, False, self.user_index, self.item_index)
         else:
-            aux_matrix = RatingMatrix(self.threshold, False, False)
+            aux_matrix = RatingMatrix(self.threshold, False, False, self.user_index, self.item_index)
 
         for item in filter(item_filter, self.get_items()):
             aux_matrix.add_item(item)
@@ -0,0 +1,429 @@
+"""
+Filtered view of an array-backed rating matrix, which does not copy the ratings.
+"""
+
+__version__ = '0.1'
+__author__ = 'Javier Sanz-Cruzado, Pablo Castells'
+__email__ = 'javier.sanz-cruzado@uam.es, pablo.castells@uam.es'
+__copyright__ = """
+ Copyright (C) 2021 Information Retrieval Group at Universidad Autónoma
+ de Madrid, http://ir.ii.uam.es.
+
+ This Source Code Form is subject to the terms of the Mozilla Public
+ License, v. 2.0. If a copy of the MPL was not distributed with this
+ file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+__license__ = 'Mozilla Public License v. 2.0'
+
+import typing
+
+import numpy as np
+
+from .filters import Filter
+from ..utils.memory import MemoryUsage
+from ..utils.optional import Optional
+
+
+class RatingMatrixView:
+    """
+    Read-only view of an array-backed rating matrix (ArrayRatingMatrix), restricted to a subset of its users and items.
+    The view only stores a user mask and an item mask over the dense indices of the parent matrix, together with the
+    number of ratings of each user and item (counted when first needed). The ratings themselves are read from the
+    arrays of the parent matrix. A view offers the same reading methods as the rating matrices, and it can be
+    transformed into an independent rating matrix by calling materialize.
+    """
+
+    def __init__(self,
+                 parent,
+                 user_mask: np.ndarray,
+                 item_mask: np.ndarray):
+        """
+        Initializes the view.
+        :param parent: the array-backed rating matrix.
+        :param user_mask: boolean array, indexed by dense index, indicating which users of the parent are visible.
+        :param item_mask: boolean array, indexed by dense index, indicating which items of the parent are visible.
+        """
+        self.parent = parent
+        self.user_index = parent.user_index
+        self.item_index = parent.item_index
+        self.user_mask = user_mask
+        self.item_mask = item_mask
+
+        self.threshold = 0.5 if parent.binarize else parent.threshold
+        self.binarize = False
+        self.update = False
+
+        self.num_users = int(np.count_nonzero(user_mask))
+        self.num_items = int(np.count_nonzero(item_mask))
+
+        # Number of visible ratings (first row) and relevant ratings (second row) of each user / item, by dense index.
+        # Counting them takes a pass over the ratings of the parent, so they are only counted when first needed (see
+        # get_user_degrees_array and get_item_degrees_array).
+        self.user_degrees = None
+        self.item_degrees = None
+        self.num_ratings = None
+
+    @staticmethod
+    def count_visible(visible: np.ndarray,
+                      indptr: np.ndarray,
+                      cumulative: np.ndarray = None) -> np.ndarray:
+        """
+        Counts the number of visible values in each row (or column) of a compressed sparse representation, as the
+        differences of the cumulative number of visible values at the limits of each row (column).
+        :param visible: boolean array indicating which of the stored values are visible.
+        :param indptr: the pointer array of the compressed representation.
+        :param cumulative: (OPTIONAL) an integer array of one more element than visible, where the cumulative number of
+                           visible values is written, so it can be reused by several counts. By default, a new array
+                           is allocated.
+        :return: an array containing the number of visible values in each row (or column).
+        """
+        if cumulative is None:
+            cumulative = np.empty(len(visible) + 1, dtype=np.int64)
+        cumulative[0] = 0
+        np.cumsum(visible, out=cumulative[1:])
+        return cumulative[indptr[1:]] - cumulative[indptr[:-1]]
+
+    def count_degrees(self,
+                      own_mask: np.ndarray,
+                      other_mask: np.ndarray,
+                      indptr: np.ndarray,
+                      indices: np.ndarray,
+                      values: np.ndarray,
+                      degrees: np.ndarray) -> np.ndarray:
+        """
+        Counts the visible ratings and relevant ratings of each user (item). A rating is visible if both its user and
+        its item are.
+        :param own_mask: the mask of the visible users (items).
+        :param other_mask: the mask of the visible items (users).
+        :param indptr: the pointer array of the ratings of the parent, by user (item).
+        :param indices: the dense item (user) index of the ratings of the parent, by user (item).
+        :param values: the values of the ratings of the parent, by user (item).
+        :param degrees: the number of ratings and relevant ratings of each user (item) in the parent.
+        :return: a two-row array containing the number of visible ratings (first row) and relevant ratings (second
+                 row) of each user (item), by dense index.
+        """
+        if other_mask.all():
+            # Every rating of a visible user (item) is visible.
+            result = np.array(degrees, dtype=np.int64)
+        else:
+            result = np.empty((2, len(own_mask)), dtype=np.int64)
+            visible = other_mask[indices]
+            cumulative = np.empty(len(visible) + 1, dtype=np.int64)
+            result[0] = RatingMatrixView.count_visible(visible, indptr, cumulative)
+            visible &= self.parent.is_relevant(values)
+            result[1] = RatingMatrixView.count_visible(visible, indptr, cumulative)
+        result[:, ~own_mask] = 0
+        return result
+
+    def get_user_degrees_array(self) -> np.ndarray:
+        """
+        Obtains the number of visible ratings (first row) and relevant ratings (second row) of each user, by dense
+        index. They are counted the first time they are needed.
+        :return: the two-row array of user degrees.
+        """
+        if self.user_degrees is None:
+            self.user_degrees = self.count_degrees(self.user_mask, self.item_mask, self.parent.user_indptr,
+                                                   self.parent.user_indices, self.parent.user_values,
+                                                   self.parent.user_degrees)
+        return self.user_degrees
+
+    def get_item_degrees_array(self) -> np.ndarray:
+        """
+        Obtains the number of visible ratings (first row) and relevant ratings (second row) of each item, by dense
+        index. They are counted the first time they are needed.
+        :return: the two-row array of item degrees.
+        """
+        if self.item_degrees is None:
+            self.item_degrees = self.count_degrees(self.item_mask, self.user_mask, self.parent.item_indptr,
+                                                   self.parent.item_indices, self.parent.item_values,
+                                                   self.parent.item_degrees)
+        return self.item_degrees
+
+    def get_user_idx(self, user) -> int:
+        """
+        Obtains the dense index of a visible user.
+        :param user: the identifier of the user.
+        :return: the dense index of the user, -1 if the user is not visible.
+        """
+        idx = self.user_index.get_index(user)
+        return idx if 0 <= idx < len(self.user_mask) and self.user_mask[idx] else -1
+
+    def get_item_idx(self, item) -> int:
+        """
+        Obtains the dense index of a visible item.
+        :param item: the identifier of the item.
+        :return: the dense index of the item, -1 if the item is not visible.
+        """
+        idx = self.item_index.get_index(item)
+        return idx if 0 <= idx < len(self.item_mask) and self.item_mask[idx] else -1
+
+    def get_num_ratings(self,
+                        relevant: bool = False):
+        """
+        Obtains the number of ratings (not repeated).
+        :param relevant: True if we want to retrieve the number of relevant ratings, False otherwise
+        :return: the number of ratings (not repeated).
+        """
+        if self.num_ratings is None:
+            self.num_ratings = self.get_user_degrees_array().sum(axis=1)
+        return int(self.num_ratings[int(relevant)])
+
+    def get_num_total_ratings(self,
+                              relevant: bool = False):
+        """
+        Obtains the number of ratings (with repetitions). As with filtered matrices, repetitions are not kept, so it
+        is equal to the number of ratings.
+        :return: the number of ratings (with repetitions).
+        """
+        return self.get_num_ratings(relevant)
+
+    def get_num_user_ratings(self,
+                             user: int,
+                             relevant: bool = False):
+        """
+        Obtains the number of ratings of a user (not repeated)
+        :param user: the identifier of the user.
+        :param relevant: True if we want to retrieve the number of relevant ratings.
+        :return: the number of ratings of the user (not repeated)
+        """
+        idx = self.get_user_idx(user)
+        return 0 if idx < 0 else int(self.get_user_degrees_array()[int(relevant), idx])
+
+    def get_num_item_ratings(self,
+                             item: int,
+                             relevant: bool = False):
+        """
+        Obtains the number of ratings of a item (not repeated)
+        :param item: the identifier of the item.
+        :param relevant: True if we want to retrieve the number of relevant ratings.
+        :return: the number of ratings of the item (not repeated)
+        """
+        idx = self.get_item_idx(item)
+        return 0 if idx < 0 else int(self.get_item_degrees_array()[int(relevant), idx])
+
+    def get_user_degrees(self,
+                         relevant: bool = False) -> np.ndarray:
+        """
+        Obtains the number of ratings (not repeated) of every user, in a single array.
+        :param relevant: True if we want to retrieve the number of relevant ratings.
+        :return: an array containing the number of ratings of each user, in the same order as get_users().
+        """
+        return self.get_user_degrees_array()[int(relevant)][self.user_mask]
+
+    def get_item_degrees(self,
+                         relevant: bool = False) -> np.ndarray:
+        """
+        Obtains the number of ratings (not repeated) of every item, in a single array.
+        :param relevant: True if we want to retrieve the number of relevant ratings.
+        :return: an array containing the number of ratings of each item, in the same order as get_items().
+        """
+        return self.get_item_degrees_array()[int(relevant)][self.item_mask]
+
+    def get_num_users(self):
+        """
+        Obtains the number of users in the dataset.
+        :return: the number of users in the dataset.
+        """
+        return self.num_users
+
+    def get_num_items(self):
+        """
+        Obtains the number of items in the dataset.
+        :return: the number of items in the dataset.
+        """
+        return self.num_items
+
+    def get_users(self):
+        """
+        Obtains an iterator of the users in the system.
+        :return: the iterator of the users in the system.
+        """
+        return iter(self.user_index.get_ids(np.flatnonzero(self.user_mask)).tolist())
+
+    def get_items(self):
+        """
+        Obtains an iterator of the items in the system.
+        :return: the iterator of the items in the system.
+        """
+        return iter(self.item_index.get_ids(np.flatnonzero(self.item_mask)).tolist())
+
+    def get_rating(self,
+                   user_id: int,
+                   item_id: int):
+        """
+        Obtains an individual rating.
+        :param user_id: the identifier of the user
+        :param item_id: the identifier of the item
+        :return: the individual rating if exists, an empty object otherwise.
+        """
+        if self.get_user_idx(user_id) < 0 or self.get_item_idx(item_id) < 0:
+            return Optional.empty()
+        return self.parent.get_rating(user_id, item_id)
+
+    def get_user_ratings(self,
+                         user: int,
+                         relevant: bool = False):
+        """
+        Obtains all the ratings of an individual user.
+        :param user: the identifier of the user.
+        :param relevant: True if we want to retrieve the relevant ratings, False if we want to retrieve all.
+        :return: the ratings of the user
+        """
+        idx = self.get_user_idx(user)
+        if idx < 0:
+            return iter(())
+        start, end = self.parent.user_indptr[idx], self.parent.user_indptr[idx + 1]
+        return self._slice_ratings(self.item_index, self.item_mask, self.parent.user_indices[start:end],
+                                   self.parent.user_values[start:end], relevant)
+
+    def get_item_ratings(self,
+                         item: int,
+                         relevant: bool = False):
+        """
+        Obtains all the ratings given to an individual item.
+        :param item: the identifier of the item.
+        :param relevant: True if we want to retrieve the relevant ratings, False if we want to retrieve all.
+        :return: the ratings given to the item.
+        """
+        idx = self.get_item_idx(item)
+        if idx < 0:
+            return iter(())
+        start, end = self.parent.item_indptr[idx], self.parent.item_indptr[idx + 1]
+        return self._slice_ratings(self.user_index, self.user_mask, self.parent.item_indices[start:end],
+                                   self.parent.item_values[start:end], relevant)
+
+    def _slice_ratings(self,
+                       index,
+                       mask: np.ndarray,
+                       indices: np.ndarray,
+                       values: np.ndarray,
+                       relevant: bool):
+        """
+        Transforms a slice of the compressed arrays of the parent into an iterator of (identifier, rating) pairs,
+        skipping those which are not visible.
+        :param index: the index of the users or items in the slice.
+        :param mask: the mask of the visible users or items in the slice.
+        :param indices: the dense indices in the slice.
+        :param values: the rating values in the slice.
+        :param relevant: True if we only keep the relevant ratings, False otherwise.
+        :return: an iterator of (identifier, rating) pairs.
+        """
+        visible = mask[indices]
+        if relevant:
+            visible &= self.parent.is_relevant(values)
+        return zip(index.get_ids(indices[visible]).tolist(), values[visible].tolist())
+
+    def is_relevant(self, value):
+        """
+        Checks whether a rating value is relevant for the dataset or not.
+        :param value: the rating value (or an array of rating values).
+        :return: whether the rating is relevant or not.
+        """
+        return value >= self.threshold
+
+    def view(self,
+             user_filter: typing.Callable[[int], bool] = None,
+             item_filter: typing.Callable[[int], bool] = None):
+        """
+        Obtains a narrower view, restricted to the visible users and items passing a pair of filters.
+        :param user_filter: (OPTIONAL) a filter for selecting the users to keep. By default, no filter is applied.
+        :param item_filter: (OPTIONAL) a filter for selecting the items to keep. By default, no filter is applied.
+        :return: the view of the parent matrix.
+        """
+        user_mask, item_mask = self.filter_masks(user_filter, item_filter)
+        return RatingMatrixView(self.parent, user_mask, item_mask)
+
+    def view_masks(self,
+                   user_mask: np.ndarray = None,
+                   item_mask: np.ndarray = None):
+        """
+        Obtains a narrower view, restricted to the visible users and items selected by a pair of boolean masks.
+        :param user_mask: (OPTIONAL) boolean array, indexed by dense index, indicating which users to keep. By
+                          default, all the visible users are kept.
+        :param item_mask: (OPTIONAL) boolean array, indexed by dense index, indicating which items to keep. By
+                          default, all the visible items are kept.
+        :return: the view of the parent matrix.
+        """
+        return RatingMatrixView(self.parent, RatingMatrixView.combine_masks(self.user_mask, user_mask),
+                                RatingMatrixView.combine_masks(self.item_mask, item_mask))
+
+    @staticmethod
+    def combine_masks(mask: np.ndarray,
+                      selected: np.ndarray = None) -> np.ndarray:
+        """
+        Restricts a mask of visible users (items) to those selected by another mask.
+        :param mask: boolean array, indexed by dense index, indicating the visible users (items).
+        :param selected: (OPTIONAL) boolean array, indexed by dense index, indicating the users (items) to keep. It
+                         might be shorter than the visible mask: the users (items) beyond its end are not kept. By
+                         default, all the visible users (items) are kept.
+        :return: a new boolean array, indexed by dense index, with the visible users (items) which are kept.
+        """
+        if selected is None:
+            return mask.copy()
+        result = np.zeros(len(mask), dtype=bool)
+        size = min(len(mask), len(selected))
+        result[:size] = mask[:size] & selected[:size]
+        return result
+
+    def freeze(self):
+        """
+        Views are already immutable.
+        :return: the view itself.
+        """
+        return self
+
+    def to_arrays(self) -> typing.Dict[str, np.ndarray]:
+        """
+        Obtains the arrays storing the view (those of the parent matrix, and the masks of the view), so it can be
+        saved. The view is rebuilt by ArrayRatingMatrix.from_arrays.
+        :return: a dictionary containing the arrays.
+        """
+        arrays = self.parent.to_arrays()
+        arrays.update(view_user_mask=self.user_mask, view_item_mask=self.item_mask)
+        return arrays
+
+    def memory_report(self) -> typing.Dict[str, int]:
+        """
+        Measures the memory used by the view (including its parent matrix).
+        :return: the number of bytes used by each of its components (see MemoryUsage.report).
+        """
+        return MemoryUsage.report(self)
+
+    def filter(self,
+               user_filter: typing.Callable[[int], bool] = None,
+               item_filter: typing.Callable[[int], bool] = None,
+               rating_filter: typing.Callable[[int, int, float], bool] = None
+               ):
+        """
+        Obtains a rating matrix containing only a fraction of the visible ratings.
+        :param user_filter: (OPTIONAL) a filter for selecting the users to keep. By default, no filter is applied.
+        :param item_filter: (OPTIONAL) a filter for selecting the items to keep. By default, no filter is applied.
+        :param rating_filter: (OPTIONAL) a filter for selecting the ratings to keep. By default, no filter is applied.
+        :returns: an array-backed rating matrix containing the selected ratings.
+        """
+        user_mask, item_mask = self.filter_masks(user_filter, item_filter)
+        return self.parent.select(user_mask, item_mask, rating_filter)
+
+    def filter_masks(self,
+                     user_filter: typing.Callable[[int], bool] = None,
+                     item_filter: typing.Callable[[int], bool] = None):
+        """
+        Obtains the visible users and items passing a pair of filters.
+        :param user_filter: (OPTIONAL) a filter for selecting the users to keep. By default, no filter is applied.
+        :param item_filter: (OPTIONAL) a filter for selecting the items to keep. By default, no filter is applied.
+        :return: a pair of boolean arrays, indexed by dense index, for the users and the items passing the filters.
+        """
+        user_mask = self.user_mask.copy()
+        item_mask = self.item_mask.copy()
+        if user_filter is not None:
+            user_mask &= Filter.to_mask(user_filter, self.user_index.get_ids_array()[:len(self.user_mask)])
+        if item_filter is not None:
+            item_mask &= Filter.to_mask(item_filter, self.item_index.get_ids_array()[:len(self.item_mask)])
+        return user_mask, item_mask
+
+    def materialize(self):
+        """
+        Copies the visible ratings into an independent array-backed rating matrix.
+        :return: the array-backed rating matrix.
+        """
+        return self.parent.select(self.user_mask, self.item_mask)
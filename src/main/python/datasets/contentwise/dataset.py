@@ -15,14 +15,23 @@ __copyright__ = """
 """
 __license__ = 'Mozilla Public License v. 2.0'
 
-from src.main.python.data import RatingMatrix, Impressions, AddingReturn
-from src.main.python.datasets.contentwise.item import ContentWiseItem
-from src.main.python.datasets.contentwise.item_type import ContentWiseItemType
-from src.main.python.datasets.contentwise.series import ContentWiseSeries
+from src.main.python.data import ArrayImpressions, ArrayRatingMatrix, RatingMatrix, Impressions, IdIndex
+from src.main.python.datasets.contentwise.registry import ContentWiseRegistry
+from src.main.python.datasets.ingestion import IngestionEngine, Relation, RecordSchema
+from src.main.python.inputoutput.array_storage import ArrayStorage
+from src.main.python.inputoutput.bracketed_lists import BracketedListReader
+from src.main.python.inputoutput.columnar_csv import ColumnarCsvReader
+from src.main.python.inputoutput.dataset_cache import DatasetCache
+from src.main.python.properties.distributions.array_temporal_distribution import ArrayTemporalDistribution
 from src.main.python.properties.distributions.temporal_distribution import TemporalDistribution
+from src.main.python.utils.memory import MemoryUsage
+from src.main.python.utils.progress import ProgressMonitor
+from src.main.python.utils.sampling import UserSampler
 import typing
 
-import csv
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 
 
 class ContentWiseDataset:
@@ -37,20 +46,46 @@ class ContentWiseDataset:
     URL: https://github.com/ContentWise/contentwise-impressions
     """
 
+    # Name of the dataset, when stored on disk.
+    NAME = "contentwise"
+
+    # Columns of the interactions file read by the loader, and their types.
+    INTERACTION_COLUMNS = {"utc_ts_milliseconds": np.int64,
+                           "user_id": np.int64,
+                           "item_id": np.int64,
+                           "series_id": np.int64,
+                           "episode_number": np.int32,
+                           "series_length": np.int32,
+                           "item_type": np.int8,
+                           "recommendation_id": np.int64}
+
+    # Names of the rating matrices and the temporal distributions of the dataset, and whether they relate users to
+    # items (True) or to series (False).
+    RATING_MATRICES = {"user_2_item": True, "user_2_series": False, "user_2_item_impr": True,
+                       "user_2_series_impr": False}
+    TEMPORAL_DISTRIBUTIONS = {"user_2_item_ts": True, "user_2_series_ts": False, "user_2_item_impr_ts": True,
+                              "user_2_series_impr_ts": False}
+
+    # Components which can be selected when loading the dataset (see load): the rating matrices (and the name of each
+    # one), the temporal distributions of the selected rating matrices, the impressions and the information about the
+    # items and series.
+    MATRIX_COMPONENTS = {"user_item": "user_2_item", "user_series": "user_2_series",
+                         "user_item_impr": "user_2_item_impr", "user_series_impr": "user_2_series_impr"}
+    COMPONENTS = frozenset(MATRIX_COMPONENTS.keys()) | {"temporal", "impressions", "registry"}
+
     def __init__(self,
-                 user_2_item: RatingMatrix,
-                 user_2_series: RatingMatrix,
-                 user_2_item_impr: RatingMatrix,
-                 user_2_series_impr: RatingMatrix,
-                 user_2_item_ts: TemporalDistribution,
-                 user_2_series_ts: TemporalDistribution,
-                 user_2_item_impr_ts: TemporalDistribution,
-                 user_2_series_impr_ts: TemporalDistribution,
-                 items: typing.Dict[int, ContentWiseItem],
-                 series: typing.Dict[int, ContentWiseSeries],
-                 impressions: Impressions):
-        """
-        Initializes the dataset.
+                 user_2_item: RatingMatrix = None,
+                 user_2_series: RatingMatrix = None,
+                 user_2_item_impr: RatingMatrix = None,
+                 user_2_series_impr: RatingMatrix = None,
+                 user_2_item_ts: TemporalDistribution = None,
+                 user_2_series_ts: TemporalDistribution = None,
+                 user_2_item_impr_ts: TemporalDistribution = None,
+                 user_2_series_impr_ts: TemporalDistribution = None,
+                 registry: ContentWiseRegistry = None,
+                 impressions: Impressions = None):
+        """
+        Initializes the dataset. Components which have not been loaded are None.
         :param user_2_item: the rating matrix relating users to items.
         :param user_2_series: the rating matrix relating users to series.
         :param user_2_item_impr: the user-item rating matrix, limited to those ratings coming from impressions.
@@ -61,8 +96,7 @@ class ContentWiseDataset:
                                     coming from impressions.
         :param user_2_series_impr_ts: the temporal distribution of user-series interactions, limited to those ratings
                                       coming from impressions.
-        :param items: a dictionary containing information about the items.
-        :param series: a dictionary containing information about the series.
+        :param registry: the information about the items and series.
         :param impressions: the impressions of the different users (stores the series shown to the different users).
         """
 
@@ -74,143 +108,466 @@ class ContentWiseDataset:
         self.user_2_series_ts = user_2_series_ts
         self.user_2_item_impr_ts = user_2_item_impr_ts
         self.user_2_series_impr_ts = user_2_series_impr_ts
-        self.items = items
-        self.series = series
+        self.registry = registry
         self.impressions = impressions
 
     @staticmethod
     def load(interactions_file: str,
              impressions_direct_link_file: str,
-             impressions_no_direct_link_file: str):
+             impressions_no_direct_link_file: str,
+             chunk_size: int = ColumnarCsvReader.DEFAULT_CHUNK_SIZE,
+             parallel: bool = False,
+             cache_folder: str = None,
+             components: typing.Iterable[str] = None,
+             sampler: UserSampler = None,
+             monitor: ProgressMonitor = None):
         """
-        Loads the dataset from files.
+        Loads the dataset from files. Files compressed with gzip, bz2 or xz are decompressed on the fly.
         :param interactions_file: the file containing the interactions between users and items/series.
         :param impressions_direct_link_file: impressions related to a recommendation.
         :param impressions_no_direct_link_file: impressions not related to a recommendation.
-        :return: the fully loaded ContentWise dataset.
+        :param chunk_size: (OPTIONAL) the number of interactions parsed at once. By default, one million.
+        :param parallel: (OPTIONAL) True if the three files are parsed concurrently, in different processes. Otherwise,
+                         they are read one after another. By default, False.
+        :param cache_folder: (OPTIONAL) a folder where loaded datasets are stored (see DatasetCache). If the dataset
+                             was already loaded from the same files, it is read from the folder instead. By default,
+                             no cache is used.
+        :param components: (OPTIONAL) the components to build (see COMPONENTS): "user_item", "user_series",
+                           "user_item_impr" and "user_series_impr" for the rating matrices, "temporal" for the
+                           temporal distributions of the selected rating matrices, "impressions", and "registry" for
+                           the information about items and series. The rest of components are None, and the columns
+                           and files they need are not parsed. By default, all the components are built.
+        :param sampler: (OPTIONAL) selects the users to load. The interactions and impressions of the rest of users
+                        are dropped while parsing. By default, all the users are loaded.
+        :param monitor: (OPTIONAL) receives the progress of the loader (rows and bytes read from each file, and
+                        current number of users, items and impressions). When parallel, each file is notified once it
+                        has been parsed. By default, the progress is not reported.
+        :return: the loaded ContentWise dataset.
+        :raises ValueError: if some of the components is unknown.
         """
+        components = ContentWiseDataset.COMPONENTS if components is None else frozenset(components)
+        unknown = components - ContentWiseDataset.COMPONENTS
+        if unknown:
+            raise ValueError("Unknown components of the ContentWise dataset: " + ", ".join(sorted(unknown)))
+
+        if cache_folder is not None:
+            key = ContentWiseDataset.key(interactions_file, impressions_direct_link_file,
+                                         impressions_no_direct_link_file, components, sampler)
+            return DatasetCache.get_or_load(cache_folder, key, ContentWiseDataset.from_arrays,
+                                            lambda: ContentWiseDataset.load(interactions_file,
+                                                                            impressions_direct_link_file,
+                                                                            impressions_no_direct_link_file,
+                                                                            chunk_size, parallel,
+                                                                            components=components, sampler=sampler,
+                                                                            monitor=monitor))
+
+        # The indexes of users, items and series are shared by all the structures of the dataset. Only the selected
+        # structures are built (see select_schema).
+        user_index = IdIndex()
+        item_index = IdIndex()
+        series_index = IdIndex()
+        columns = ContentWiseDataset.select_columns(components)
+        engine = IngestionEngine(ContentWiseDataset.select_schema(components),
+                                 {"users": user_index, "items": item_index, "series": series_index})
+        registry = ContentWiseRegistry(item_index, series_index) if "registry" in components else None
+        rec_2_user = dict()
 
-        items = dict()
-        series = dict()
+        direct_impressions = None
+        no_direct_impressions = None
+        if parallel:
+            # The three files are independent: each one is parsed into compact arrays by a different process.
+            with ProcessPoolExecutor(max_workers=3) as executor:
+                interactions = executor.submit(ContentWiseDataset.read_interactions, interactions_file, chunk_size,
+                                               columns, sampler)
+                if "impressions" in components:
+                    direct = executor.submit(ContentWiseDataset.read_impressions, impressions_direct_link_file,
+                                             "recommendation_id")
+                    no_direct = executor.submit(ContentWiseDataset.read_impressions, impressions_no_direct_link_file,
+                                                "user_id", sampler)
+                    direct_impressions = direct.result()
+                    no_direct_impressions = no_direct.result()
+                interactions = interactions.result()
+                chunks = ContentWiseDataset.split_chunks(interactions, chunk_size)
+            if monitor is not None:
+                monitor.add_file(interactions_file, len(interactions["user_id"]))
+                if "impressions" in components:
+                    monitor.add_file(impressions_direct_link_file, len(direct_impressions[0]))
+                    monitor.add_file(impressions_no_direct_link_file, len(no_direct_impressions[0]))
+        else:
+            chunks = ContentWiseDataset.read_chunks(interactions_file, columns, chunk_size, sampler, monitor)
+
+        for chunk in chunks:
+            # In this loader, we assume that all the interactions are positive feedback.
+            # STEP 1: We add the users, items and series to their indexes (in order of appearance), and the ratings
+            # (and time points) of the selected rating matrices.
+            engine.add_records(chunk)
+
+            # STEP 2: We store the information of the items and series (the last appearance of each one prevails).
+            if registry is not None:
+                registry.register(chunk["item_id"], chunk["series_id"], chunk["episode_number"], chunk["item_type"],
+                                  chunk["series_length"])
+
+            # STEP 3: We keep the user of each recommendation, to join it with the impressions.
+            if "impressions" in components:
+                from_impr = ContentWiseDataset.from_impressions(chunk)
+                rec_2_user.update(zip(chunk["recommendation_id"][from_impr].tolist(),
+                                      chunk["user_id"][from_impr].tolist()))
+
+            if monitor is not None:
+                monitor.set_sizes(users=len(user_index), items=len(item_index))
+
+        if "impressions" in components:
+            # Read the impressions with interactions, and join them with the users through the recommendation
+            # identifier (when sampling, the recommendations of the users which were not sampled are unknown).
+            if direct_impressions is None:
+                direct_impressions = ContentWiseDataset.read_impressions(impressions_direct_link_file,
+                                                                         "recommendation_id", monitor=monitor)
+            rec_ids, offsets, impressions = direct_impressions
+            if sampler is not None:
+                known = np.fromiter(map(rec_2_user.__contains__, rec_ids.tolist()), dtype=bool, count=len(rec_ids))
+                rec_ids, offsets, impressions = BracketedListReader.select_lists(rec_ids, offsets, impressions, known)
+            users = np.fromiter(map(rec_2_user.__getitem__, rec_ids.tolist()), dtype=np.int64, count=len(rec_ids))
+            engine.add_impressions(np.repeat(users, np.diff(offsets)), impressions)
+
+            # Read the impressions without interactions. Only those of the users and series found in the interactions
+            # are stored, as in Impressions.add_impression.
+            if no_direct_impressions is None:
+                no_direct_impressions = ContentWiseDataset.read_impressions(impressions_no_direct_link_file, "user_id",
+                                                                            sampler, monitor)
+            users, offsets, impressions = no_direct_impressions
+            engine.add_impressions(np.repeat(users, np.diff(offsets)), impressions, register=False)
+
+        # Once loaded, the dataset is no longer modified: we store it in compact, immutable arrays.
+        structures = engine.build()
+        if monitor is not None:
+            monitor.set_sizes(users=len(user_index), items=len(item_index),
+                              impressions=structures["impressions"].get_num_impressions()
+                              if "impressions" in structures else None)
+            monitor.finish()
+        return ContentWiseDataset(registry=registry.freeze() if registry is not None else None, **structures)
+
+    @staticmethod
+    def select_schema(components: typing.AbstractSet[str]) -> RecordSchema:
+        """
+        Describes the records of the interactions file needed to build a set of components of the dataset: the rating
+        matrices (relating the users to the items or the series) and the impressions (relating the users to the
+        series). Time points are only stored for new user-item and user-series pairs, except for the interactions
+        coming from impressions, for which we store every time point.
+        :param components: the components (see load).
+        :return: the schema of the records (see RecordSchema).
+        """
+        relations = dict()
+        for component, name in ContentWiseDataset.MATRIX_COMPONENTS.items():
+            if component in components:
+                from_impr = name.endswith("_impr")
+                relations[name] = Relation("user_id", "item_id" if ContentWiseDataset.RATING_MATRICES[name]
+                                           else "series_id",
+                                           timestamp_column="utc_ts_milliseconds" if "temporal" in components else None,
+                                           all_timepoints=from_impr,
+                                           select=ContentWiseDataset.from_impressions if from_impr else None)
+
+        # The users, items and series are only added to the indexes if some structure contains them.
+        targets = {relation.item_column for relation in relations.values()}
+        entities = dict()
+        if relations or "impressions" in components:
+            entities["user_id"] = "users"
+        if "item_id" in targets:
+            entities["item_id"] = "items"
+        if "series_id" in targets or "impressions" in components:
+            entities["series_id"] = "series"
+        return RecordSchema(entities, relations, ("users", "series") if "impressions" in components else None)
 
-        user_2_item = RatingMatrix(0.0, True, True)
-        user_2_series = RatingMatrix(0.0, True, True)
-        user_2_item_impr = RatingMatrix(0.0, True, True)
-        user_2_series_impr = RatingMatrix(0.0, True, True)
+    @staticmethod
+    def from_impressions(chunk: typing.Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Selects the interactions coming from impressions (i.e. related to a recommendation).
+        :param chunk: a chunk of the interactions file.
+        :return: a boolean array, true for the interactions coming from impressions.
+        """
+        return chunk["recommendation_id"] >= 0
 
-        user_2_item_ts = TemporalDistribution()
-        user_2_series_ts = TemporalDistribution()
-        user_2_item_impr_ts = TemporalDistribution()
-        user_2_series_impr_ts = TemporalDistribution()
+    @staticmethod
+    def select_columns(components: typing.AbstractSet[str]) -> typing.Dict[str, typing.Any]:
+        """
+        Selects the columns of the interactions file needed to build a set of components of the dataset.
+        :param components: the components (see load).
+        :return: the selected columns, and their types (see INTERACTION_COLUMNS).
+        """
+        matrices = [name for component, name in ContentWiseDataset.MATRIX_COMPONENTS.items()
+                    if component in components]
+        names = {"user_id"}
+        if "registry" in components:
+            names.update(("item_id", "series_id", "episode_number", "series_length", "item_type"))
+        if any(ContentWiseDataset.RATING_MATRICES[name] for name in matrices):
+            names.add("item_id")
+        if "impressions" in components or not all(ContentWiseDataset.RATING_MATRICES[name] for name in matrices):
+            names.add("series_id")
+        if "impressions" in components or any(name.endswith("_impr") for name in matrices):
+            names.add("recommendation_id")
+        if "temporal" in components and matrices:
+            names.add("utc_ts_milliseconds")
+        return {name: dtype for name, dtype in ContentWiseDataset.INTERACTION_COLUMNS.items() if name in names}
 
-        rec_2_user = dict()
-        impr = Impressions()
-
-        with open(interactions_file, mode='r') as csv_file:
-            csv_reader = csv.DictReader(csv_file)
-            line_count = 0
-            for record in csv_reader:
-                ts = int(record["utc_ts_milliseconds"])
-                user = int(record["user_id"])
-                item = int(record["item_id"])
-                series_id = int(record["series_id"])
-                episode = int(record["episode_number"])
-                length = int(record["series_length"])
-                item_type = ContentWiseItemType.from_value(int(record["item_type"]))
-                rec_id = int(record["recommendation_id"])
-
-                from_impr = rec_id >= 0
-
-                # In this loader, we assume that all the interactions are positive feedback.
-                # STEP 1: We add the a) user and b) item to their indexes
-                items[item] = ContentWiseItem(item, series_id, episode, item_type)
-                series[series_id] = ContentWiseSeries(series_id, length)
-
-                user_2_item.add_user(user)
-                user_2_item.add_item(item)
-                user_2_item_impr.add_user(user)
-                user_2_item_impr.add_item(item)
-
-                user_2_series.add_user(user)
-                user_2_series.add_item(series_id)
-                user_2_series_impr.add_user(user)
-                user_2_series_impr.add_item(series_id)
-
-                impr.add_user(user)
-                impr.add_item(series_id)
-
-                ret_item = user_2_item.rate(user, item, 1.0)
-                ret_series = user_2_series.rate(user, series_id, 1.0)
-                if ret_item == AddingReturn.ADDED:
-                    user_2_item_ts.add_timepoint(user, item, ts)
-                if ret_series == AddingReturn.ADDED:
-                    user_2_series_ts.add_timepoint(user, series_id, ts)
-
-                if from_impr:
-                    rec_2_user[rec_id] = user
-                    ret_item = user_2_item_impr.rate(user, item, 1.0)
-                    ret_series = user_2_series_impr.rate(user, series_id, 1.0)
-                    if ret_item:
-                        user_2_item_impr_ts.add_timepoint(user, item, ts)
-                    if ret_series:
-                        user_2_series_impr_ts.add_timepoint(user, series_id, ts)
-                line_count += 1
-
-            # Read the impressions with interactions
-            with open(impressions_direct_link_file, mode='r') as csv_file:
-                csv_reader = csv.DictReader(csv_file)
-                line_count = 0
-                for record in csv_reader:
-                    rec_id = int(record["recommendation_id"])
-                    listed_impr = str(record["recommended_series_list"])
-
-                    actual_list = listed_impr[1:len(listed_impr) - 1]
-                    impressions = actual_list.split()
-                    user_id = rec_2_user[rec_id]
-                    for impression in impressions:
-                        series_id = int(impression)
-                        impr.add_item(series_id)
-                        impr.add_impression(user_id, series_id)
-                    line_count += 1
-
-        # Read the impressions without interactions
-        with open(impressions_no_direct_link_file, mode='r') as csv_file:
-            csv_reader = csv.DictReader(csv_file)
-            line_count = 0
-            for record in csv_reader:
-                user = record["user_id"]
-                listed_impr = str(record["recommended_series_list"])
-
-                actual_list = listed_impr[1:len(listed_impr) - 1]
-                impressions = actual_list.split()
-                for impression in impressions:
-                    impr.add_impression(user, int(impression))
-                line_count += 1
-
-        return ContentWiseDataset(user_2_item, user_2_series, user_2_item_impr, user_2_series_impr, user_2_item_ts,
-                                  user_2_series_ts, user_2_item_impr_ts, user_2_series_impr_ts,
-                                  items, series, impr)
+    @staticmethod
+    def read_interactions(interactions_file: str,
+                          chunk_size: int = ColumnarCsvReader.DEFAULT_CHUNK_SIZE,
+                          columns: typing.Dict[str, typing.Any] = None,
+                          sampler: UserSampler = None) -> typing.Dict[str, np.ndarray]:
+        """
+        Reads the whole interactions file into typed arrays.
+        :param interactions_file: the file containing the interactions between users and items/series.
+        :param chunk_size: (OPTIONAL) the number of interactions parsed at once. By default, one million.
+        :param columns: (OPTIONAL) the columns to read, and their types. By default, all the columns read by the
+                        loader (see INTERACTION_COLUMNS).
+        :param sampler: (OPTIONAL) selects the users whose interactions are read. By default, all the users.
+        :return: a dictionary containing an array for each of the columns.
+        """
+        columns = ContentWiseDataset.INTERACTION_COLUMNS if columns is None else columns
+        chunks = list(ContentWiseDataset.read_chunks(interactions_file, columns, chunk_size, sampler))
+        return {name: np.concatenate([chunk[name] for chunk in chunks]) if chunks else np.zeros(0, dtype=dtype)
+                for name, dtype in columns.items()}
+
+    @staticmethod
+    def read_chunks(interactions_file: str,
+                    columns: typing.Dict[str, typing.Any],
+                    chunk_size: int = ColumnarCsvReader.DEFAULT_CHUNK_SIZE,
+                    sampler: UserSampler = None,
+                    monitor: ProgressMonitor = None) -> typing.Iterator[typing.Dict[str, np.ndarray]]:
+        """
+        Reads the interactions file chunk by chunk (see ColumnarCsvReader).
+        :param interactions_file: the file containing the interactions between users and items/series.
+        :param columns: the columns to read (including the user), and their types.
+        :param chunk_size: (OPTIONAL) the number of interactions parsed at once. By default, one million.
+        :param sampler: (OPTIONAL) selects the users whose interactions are kept. The rest of interactions are dropped
+                        as soon as their chunk is parsed. By default, all the interactions are kept.
+        :param monitor: (OPTIONAL) receives the number of lines read after each chunk. By default, none.
+        :return: an iterator over the chunks. Each chunk contains an array for each of the columns.
+        """
+        for chunk in ColumnarCsvReader.read_file(interactions_file, columns, chunk_size, monitor=monitor):
+            if sampler is not None:
+                selected = sampler.select(chunk["user_id"])
+                chunk = {name: values[selected] for name, values in chunk.items()}
+            yield chunk
+
+    @staticmethod
+    def split_chunks(interactions: typing.Dict[str, np.ndarray],
+                     chunk_size: int) -> typing.Iterator[typing.Dict[str, np.ndarray]]:
+        """
+        Splits the arrays of the interactions file into chunks.
+        :param interactions: a dictionary containing an array for each of the columns read by the loader.
+        :param chunk_size: the maximum number of interactions of each chunk.
+        :return: an iterator over the chunks.
+        """
+        num_rows = len(interactions["user_id"])
+        for start in range(0, num_rows, chunk_size):
+            yield {name: values[start:start + chunk_size] for name, values in interactions.items()}
+
+    @staticmethod
+    def read_impressions(impressions_file: str,
+                         key_column: str,
+                         sampler: UserSampler = None,
+                         monitor: ProgressMonitor = None) -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Reads an impressions file into compact arrays.
+        :param impressions_file: the file containing the recommendation lists.
+        :param key_column: the column identifying each recommendation list (the recommendation or the user).
+        :param sampler: (OPTIONAL) when the lists are identified by the user, selects the users whose lists are kept.
+                        By default, all the lists are kept.
+        :param monitor: (OPTIONAL) receives the number of lists read after each chunk. By default, none.
+        :return: a tuple containing a) the key of each recommendation list, b) the offsets of the lists (list i lies
+                 between positions offsets[i] and offsets[i+1] of the next array) and c) the recommended series.
+        """
+        return BracketedListReader.read_file(impressions_file, key_column,
+                                             select=sampler.select if sampler is not None else None,
+                                             monitor=monitor)
+
+    @staticmethod
+    def key(interactions_file: str,
+            impressions_direct_link_file: str,
+            impressions_no_direct_link_file: str,
+            components: typing.Iterable[str] = None,
+            sampler: UserSampler = None) -> str:
+        """
+        Computes the key identifying the dataset loaded from some files (see DatasetCache.key), so a stored copy of
+        the dataset can be checked against the input files and loading parameters.
+        :param interactions_file: the file containing the interactions between users and items/series.
+        :param impressions_direct_link_file: impressions related to a recommendation.
+        :param impressions_no_direct_link_file: impressions not related to a recommendation.
+        :param components: (OPTIONAL) the components to build (see load). By default, all of them.
+        :param sampler: (OPTIONAL) selects the users to load (see load). By default, all the users are loaded.
+        :return: the key.
+        """
+        components = ContentWiseDataset.COMPONENTS if components is None else components
+        return DatasetCache.key(ContentWiseDataset.NAME, [interactions_file, impressions_direct_link_file,
+                                                          impressions_no_direct_link_file],
+                                {"components": sorted(components),
+                                 "sample": sampler.get_params() if sampler is not None else None})
+
+    @staticmethod
+    def from_arrays(arrays: typing.Dict[str, np.ndarray]):
+        """
+        Rebuilds the dataset from the arrays returned by to_arrays.
+        :param arrays: the arrays of the dataset.
+        :return: the dataset.
+        """
+        user_index = IdIndex.from_ids(arrays["user_ids"])
+        item_index = IdIndex.from_ids(arrays["item_ids"])
+        series_index = IdIndex.from_ids(arrays["series_ids"])
+
+        # Only the components which were loaded are stored.
+        structures = dict()
+        for name, to_items in ContentWiseDataset.RATING_MATRICES.items():
+            structure_arrays = ArrayStorage.get_prefix(name, arrays)
+            if structure_arrays:
+                structures[name] = ArrayRatingMatrix.from_arrays(user_index, item_index if to_items else series_index,
+                                                                 structure_arrays)
+        for name, to_items in ContentWiseDataset.TEMPORAL_DISTRIBUTIONS.items():
+            structure_arrays = ArrayStorage.get_prefix(name, arrays)
+            if structure_arrays:
+                structures[name] = ArrayTemporalDistribution.from_arrays(user_index,
+                                                                         item_index if to_items else series_index,
+                                                                         structure_arrays)
+        structure_arrays = ArrayStorage.get_prefix("impressions", arrays)
+        if structure_arrays:
+            structures["impressions"] = ArrayImpressions.from_arrays(user_index, series_index, structure_arrays)
+        structure_arrays = ArrayStorage.get_prefix("registry", arrays)
+        if structure_arrays:
+            structures["registry"] = ContentWiseRegistry.from_arrays(item_index, series_index, structure_arrays)
+        return ContentWiseDataset(**structures)
+
+    def to_arrays(self) -> typing.Dict[str, np.ndarray]:
+        """
+        Obtains the arrays storing the dataset, so it can be saved: the identifiers of users, items and series, and the
+        arrays of each structure (including the information of the items and series), prefixed by its name.
+        :return: a dictionary containing the arrays.
+        """
+        user_index, item_index, series_index = self.get_indexes()
+        arrays = {"user_ids": np.array(list(user_index.get_ids_iterator()), dtype=np.int64),
+                  "item_ids": np.array(list(item_index.get_ids_iterator()), dtype=np.int64),
+                  "series_ids": np.array(list(series_index.get_ids_iterator()), dtype=np.int64)}
+        for name in list(ContentWiseDataset.RATING_MATRICES) + list(ContentWiseDataset.TEMPORAL_DISTRIBUTIONS) + \
+                ["impressions", "registry"]:
+            if getattr(self, name) is not None:
+                arrays.update(ArrayStorage.add_prefix(name, getattr(self, name).to_arrays()))
+        return arrays
+
+    def save(self,
+             folder: str,
+             key: str = None):
+        """
+        Saves the dataset into a directory of raw NumPy arrays (see ArrayStorage), which can be later opened, by
+        several processes at the same time, without parsing or copying the data.
+        :param folder: the directory.
+        :param key: (OPTIONAL) the key identifying the input files and loading parameters of the dataset (see key),
+                    stored along with the arrays. By default, none is stored.
+        """
+        ArrayStorage.save_directory(folder, self.to_arrays(), ContentWiseDataset.NAME, key)
+
+    @staticmethod
+    def open(folder: str,
+             key: str = None):
+        """
+        Opens a dataset saved into a directory. The arrays of the structures are memory-mapped, so they are shared
+        (through the page cache of the operating system) by all the processes opening the same directory. Only the
+        indexes of users, items and series are built in memory.
+        :param folder: the directory.
+        :param key: (OPTIONAL) the key identifying the input files and loading parameters of the dataset (see key).
+                    By default, the dataset is opened whatever files and parameters it was loaded from.
+        :return: the dataset.
+        :raises ValueError: if the directory does not contain the dataset (loaded with the given key).
+        """
+        return ContentWiseDataset.from_arrays(ArrayStorage.open_directory(folder, ContentWiseDataset.NAME, key))
+
+    def memory_report(self) -> typing.Dict[str, int]:
+        """
+        Measures the memory used by the dataset, broken down by component. The indexes of users and items, shared by
+        all the structures, are reported separately.
+        :return: the number of bytes used by each component of the dataset (see MemoryUsage.report).
+        """
+        user_index, item_index, series_index = self.get_indexes()
+        return MemoryUsage.report(self, {"user_index": user_index, "item_index": item_index,
+                                         "series_index": series_index})
+
+    def get_indexes(self) -> typing.Tuple[IdIndex, IdIndex, IdIndex]:
+        """
+        Obtains the indexes of users, items and series, shared by all the loaded components of the dataset.
+        :return: a tuple containing the indexes of a) users, b) items and c) series. Indexes which are not used by any
+                 of the loaded components are empty.
+        """
+        user_index = None
+        item_index = None
+        series_index = None
+        structures = list(ContentWiseDataset.RATING_MATRICES.items()) + \
+            list(ContentWiseDataset.TEMPORAL_DISTRIBUTIONS.items()) + [("impressions", False)]
+        for name, to_items in structures:
+            structure = getattr(self, name)
+            if structure is not None:
+                user_index = structure.user_index
+                if to_items:
+                    item_index = structure.item_index
+                else:
+                    series_index = structure.item_index
+        if self.registry is not None:
+            item_index = self.registry.item_index
+            series_index = self.registry.series_index
+        return (IdIndex() if user_index is None else user_index, IdIndex() if item_index is None else item_index,
+                IdIndex() if series_index is None else series_index)
+
+    def find_component(self, *names):
+        """
+        Finds the first loaded component of the dataset among several candidates.
+        :param names: the names of the candidate components (rating matrices, "impressions" or "registry").
+        :return: the first component which was loaded, None if none of them was.
+        """
+        for name in names:
+            component = getattr(self, name)
+            if component is not None:
+                return component
+        return None
 
     def num_users(self):
         """
-        Obtains the number of users in the dataset.
+        Obtains the number of users in the dataset: those with some interaction or, if no rating matrix was loaded,
+        those with some impression.
         :return: the number of users in the dataset.
+        :raises ValueError: if neither the rating matrices nor the impressions were loaded.
         """
-        return self.user_2_item.get_num_users()
+        component = self.find_component(*ContentWiseDataset.RATING_MATRICES.keys(), "impressions")
+        if component is None:
+            raise ValueError("The number of users of the ContentWise dataset requires loading some rating matrix or "
+                             "the impressions")
+        return component.get_num_users()
 
     def num_items(self):
         """
-        Obtains the number of items in the dataset.
+        Obtains the number of items in the dataset, from the user-item rating matrices or the registry.
         :return: the number of items in the dataset.
+        :raises ValueError: if neither the user-item rating matrices nor the registry were loaded.
         """
-        return self.user_2_item.get_num_items()
+        component = self.find_component("user_2_item", "user_2_item_impr")
+        if component is not None:
+            return component.get_num_items()
+        if self.registry is None:
+            raise ValueError("The number of items of the ContentWise dataset requires loading the user_item or "
+                             "user_item_impr matrices, or the registry")
+        return self.registry.get_num_items()
 
     def num_series(self):
         """
-        Obtains the number of series in the dataset.
+        Obtains the number of series in the dataset, from the user-series rating matrices, the registry or, in the
+        last place, the impressions (which only contain the impressed series).
         :return: the number of series in the dataset.
+        :raises ValueError: if none of the user-series rating matrices, the registry or the impressions were loaded.
         """
-        return self.user_2_series.get_num_items()
+        component = self.find_component("user_2_series", "user_2_series_impr")
+        if component is not None:
+            return component.get_num_items()
+        if self.registry is not None:
+            return self.registry.get_num_series()
+        if self.impressions is None:
+            raise ValueError("The number of series of the ContentWise dataset requires loading the user_series or "
+                             "user_series_impr matrices, the registry or the impressions")
+        return self.impressions.get_num_items()
 
     def get_user_2_item_interactions(self):
         """
@@ -247,6 +604,14 @@ class ContentWiseDataset:
         """
         return self.impressions
 
+    def get_registry(self):
+        """
+        Obtains the information about the items and series (series, episode and type of each item, length of each
+        series).
+        :return: the registry of items and series.
+        """
+        return self.registry
+
     def get_user_2_item_interactions_temporal_distribution(self):
         """
         Obtains the temporal distribution of user-item ratings.
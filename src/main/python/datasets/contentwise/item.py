@@ -22,6 +22,8 @@ class ContentWiseItem:
     """
     Class for storing the information of the ContentWise dataset items.
     """
+    __slots__ = ("item_id", "series_id", "episode", "type")
+
     def __init__(self,
                  item_id: int,
                  series_id: int,
@@ -0,0 +1,283 @@
+"""
+Columnar storage of the information of the items and series of the ContentWise dataset.
+"""
+
+__version__ = '0.1'
+__author__ = 'Javier Sanz-Cruzado, Pablo Castells'
+__email__ = 'javier.sanz-cruzado@uam.es, pablo.castells@uam.es'
+__copyright__ = """
+ Copyright (C) 2021 Information Retrieval Group at Universidad Autónoma
+ de Madrid, http://ir.ii.uam.es.
+
+ This Source Code Form is subject to the terms of the Mozilla Public
+ License, v. 2.0. If a copy of the MPL was not distributed with this
+ file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+__license__ = 'Mozilla Public License v. 2.0'
+
+import typing
+
+import numpy as np
+
+from src.main.python.data import IdIndex
+from src.main.python.datasets.contentwise.item import ContentWiseItem
+from src.main.python.datasets.contentwise.item_type import ContentWiseItemType
+from src.main.python.datasets.contentwise.series import ContentWiseSeries
+from src.main.python.utils.memory import MemoryUsage
+
+
+class ContentWiseRegistry:
+    """
+    Information about the items and series of the ContentWise dataset. Instead of an object per item / series, the
+    information is stored in parallel arrays, indexed by the dense indices of the items and series (the indexes are
+    shared with the rest of the structures of the dataset):
+    a) for each item: the dense index of its series, its episode number and the value of its type (-1 if unknown).
+    b) for each series: its length.
+    A mask indicates which items and series have been registered.
+    """
+
+    # Names of the arrays storing the registry (see to_arrays).
+    ARRAYS = ("item_known", "item_series", "item_episodes", "item_types", "series_known", "series_lengths")
+
+    __slots__ = ("item_index", "series_index") + ARRAYS
+
+    def __init__(self,
+                 item_index: IdIndex,
+                 series_index: IdIndex):
+        """
+        Initializes an empty registry.
+        :param item_index: the index of the items.
+        :param series_index: the index of the series.
+        """
+        self.item_index = item_index
+        self.series_index = series_index
+
+        self.item_known = np.zeros(0, dtype=bool)
+        self.item_series = np.zeros(0, dtype=np.int64)
+        self.item_episodes = np.zeros(0, dtype=np.int32)
+        self.item_types = np.zeros(0, dtype=np.int8)
+        self.series_known = np.zeros(0, dtype=bool)
+        self.series_lengths = np.zeros(0, dtype=np.int32)
+
+    def register(self,
+                 items: np.ndarray,
+                 series: np.ndarray,
+                 episodes: np.ndarray,
+                 item_types: np.ndarray,
+                 lengths: np.ndarray):
+        """
+        Stores the information of the items and series of a chunk of interactions. Items and series which are not
+        in their indexes yet are added, in order of appearance. When an item or a series appears several times, its
+        last appearance prevails.
+        :param items: the identifier of the item of each interaction.
+        :param series: the identifier of the series of each interaction.
+        :param episodes: the episode number of the item of each interaction.
+        :param item_types: the value of the type of the item of each interaction.
+        :param lengths: the length of the series of each interaction.
+        """
+        item_idx = self.item_index.add_all(items)
+        series_idx = self.series_index.add_all(series)
+        self.grow(len(self.item_index), len(self.series_index))
+
+        last = ContentWiseRegistry.last_occurrences(item_idx)
+        self.item_known[item_idx[last]] = True
+        self.item_series[item_idx[last]] = series_idx[last]
+        self.item_episodes[item_idx[last]] = episodes[last]
+        self.item_types[item_idx[last]] = item_types[last]
+
+        last = ContentWiseRegistry.last_occurrences(series_idx)
+        self.series_known[series_idx[last]] = True
+        self.series_lengths[series_idx[last]] = lengths[last]
+
+    @staticmethod
+    def last_occurrences(indices: np.ndarray) -> np.ndarray:
+        """
+        Finds the last occurrence of each value in an array.
+        :param indices: the array.
+        :return: the positions of the last occurrence of each value.
+        """
+        _, last = np.unique(indices[::-1], return_index=True)
+        return len(indices) - 1 - last
+
+    def grow(self,
+             num_items: int,
+             num_series: int):
+        """
+        Enlarges the arrays, so they fit (at least) a given number of items and series. The capacity is doubled, if
+        that is enough.
+        :param num_items: the minimum number of items.
+        :param num_series: the minimum number of series.
+        """
+        if num_items > len(self.item_known):
+            size = max(num_items, 2 * len(self.item_known))
+            self.item_known = ContentWiseRegistry.grow_array(self.item_known, size)
+            self.item_series = ContentWiseRegistry.grow_array(self.item_series, size)
+            self.item_episodes = ContentWiseRegistry.grow_array(self.item_episodes, size)
+            self.item_types = ContentWiseRegistry.grow_array(self.item_types, size, -1)
+        if num_series > len(self.series_known):
+            size = max(num_series, 2 * len(self.series_known))
+            self.series_known = ContentWiseRegistry.grow_array(self.series_known, size)
+            self.series_lengths = ContentWiseRegistry.grow_array(self.series_lengths, size)
+
+    @staticmethod
+    def grow_array(array: np.ndarray,
+                   size: int,
+                   fill=0) -> np.ndarray:
+        """
+        Enlarges an array.
+        :param array: the array.
+        :param size: the new size of the array.
+        :param fill: (OPTIONAL) the value of the new positions. By default, 0.
+        :return: the enlarged array.
+        """
+        aux = np.full(size, fill, dtype=array.dtype)
+        aux[:len(array)] = array
+        return aux
+
+    def freeze(self):
+        """
+        Trims the arrays to the size of the indexes, and makes them read-only.
+        :return: the registry itself.
+        """
+        self.grow(len(self.item_index), len(self.series_index))
+        for name in ContentWiseRegistry.ARRAYS:
+            size = len(self.item_index) if name.startswith("item") else len(self.series_index)
+            array = getattr(self, name)[:size]
+            array.setflags(write=False)
+            setattr(self, name, array)
+        return self
+
+    def get_item_idx(self, item_id) -> int:
+        """
+        Obtains the dense index of a registered item.
+        :param item_id: the identifier of the item.
+        :return: the dense index of the item, -1 if the item is not registered.
+        """
+        idx = self.item_index.get_index(item_id)
+        return idx if 0 <= idx < len(self.item_known) and self.item_known[idx] else -1
+
+    def get_series_idx(self, series_id) -> int:
+        """
+        Obtains the dense index of a registered series.
+        :param series_id: the identifier of the series.
+        :return: the dense index of the series, -1 if the series is not registered.
+        """
+        idx = self.series_index.get_index(series_id)
+        return idx if 0 <= idx < len(self.series_known) and self.series_known[idx] else -1
+
+    def get_series_id(self, item_id) -> typing.Optional[int]:
+        """
+        Obtains the identifier of the series an item belongs to.
+        :param item_id: the identifier of the item.
+        :return: the identifier of the series, None if the item is not registered.
+        """
+        idx = self.get_item_idx(item_id)
+        return None if idx < 0 else self.series_index.get_id(int(self.item_series[idx]))
+
+    def get_episode(self, item_id) -> typing.Optional[int]:
+        """
+        Obtains the episode number of an item in its series.
+        :param item_id: the identifier of the item.
+        :return: the episode number, None if the item is not registered.
+        """
+        idx = self.get_item_idx(item_id)
+        return None if idx < 0 else int(self.item_episodes[idx])
+
+    def get_item_type(self, item_id) -> typing.Optional[ContentWiseItemType]:
+        """
+        Obtains the type of an item.
+        :param item_id: the identifier of the item.
+        :return: the type of the item, None if the item is not registered, or its type is unknown.
+        """
+        idx = self.get_item_idx(item_id)
+        return None if idx < 0 else ContentWiseItemType.from_value(int(self.item_types[idx]))
+
+    def get_length(self, series_id) -> typing.Optional[int]:
+        """
+        Obtains the length of a series.
+        :param series_id: the identifier of the series.
+        :return: the length of the series, None if the series is not registered.
+        """
+        idx = self.get_series_idx(series_id)
+        return None if idx < 0 else int(self.series_lengths[idx])
+
+    def get_item(self, item_id) -> typing.Optional[ContentWiseItem]:
+        """
+        Obtains all the information about an item.
+        :param item_id: the identifier of the item.
+        :return: the item, None if it is not registered.
+        """
+        if self.get_item_idx(item_id) < 0:
+            return None
+        return ContentWiseItem(item_id, self.get_series_id(item_id), self.get_episode(item_id),
+                               self.get_item_type(item_id))
+
+    def get_series(self, series_id) -> typing.Optional[ContentWiseSeries]:
+        """
+        Obtains all the information about a series.
+        :param series_id: the identifier of the series.
+        :return: the series, None if it is not registered.
+        """
+        if self.get_series_idx(series_id) < 0:
+            return None
+        return ContentWiseSeries(series_id, self.get_length(series_id))
+
+    def get_items(self) -> typing.Iterator:
+        """
+        Obtains the registered items.
+        :return: an iterator over the identifiers of the items.
+        """
+        return iter(self.item_index.get_ids(np.flatnonzero(self.item_known)).tolist())
+
+    def get_series_ids(self) -> typing.Iterator:
+        """
+        Obtains the registered series.
+        :return: an iterator over the identifiers of the series.
+        """
+        return iter(self.series_index.get_ids(np.flatnonzero(self.series_known)).tolist())
+
+    def get_num_items(self) -> int:
+        """
+        Obtains the number of registered items.
+        :return: the number of items.
+        """
+        return int(np.count_nonzero(self.item_known))
+
+    def get_num_series(self) -> int:
+        """
+        Obtains the number of registered series.
+        :return: the number of series.
+        """
+        return int(np.count_nonzero(self.series_known))
+
+    @staticmethod
+    def from_arrays(item_index: IdIndex,
+                    series_index: IdIndex,
+                    arrays: typing.Dict[str, np.ndarray]):
+        """
+        Rebuilds a registry from the arrays returned by to_arrays, without copying them.
+        :param item_index: the index of the items.
+        :param series_index: the index of the series.
+        :param arrays: the arrays of the registry.
+        :return: the registry.
+        """
+        registry = ContentWiseRegistry(item_index, series_index)
+        for name in ContentWiseRegistry.ARRAYS:
+            arrays[name].setflags(write=False)
+            setattr(registry, name, arrays[name])
+        return registry
+
+    def to_arrays(self) -> typing.Dict[str, np.ndarray]:
+        """
+        Obtains the arrays storing the registry, so it can be saved (see from_arrays). The indexes of items and series
+        are not included.
+        :return: a dictionary containing the arrays of the registry.
+        """
+        return {name: getattr(self, name) for name in ContentWiseRegistry.ARRAYS}
+
+    def memory_report(self) -> typing.Dict[str, int]:
+        """
+        Measures the memory used by the registry.
+        :return: the number of bytes used by each of its components (see MemoryUsage.report).
+        """
+        return MemoryUsage.report(self)
@@ -20,6 +20,8 @@ class ContentWiseSeries:
     """
     Class for storing the information of the series in the ContentWise dataset.
     """
+    __slots__ = ("series_id", "length")
+
     def __init__(self,
                  series_id: int,
                  length: int):
@@ -0,0 +1,390 @@
+"""
+Shared ingestion engine for the dataset loaders.
+"""
+
+__version__ = '0.1'
+__author__ = 'Javier Sanz-Cruzado, Pablo Castells'
+__email__ = 'javier.sanz-cruzado@uam.es, pablo.castells@uam.es'
+__copyright__ = """
+ Copyright (C) 2021 Information Retrieval Group at Universidad Autónoma
+ de Madrid, http://ir.ii.uam.es.
+
+ This Source Code Form is subject to the terms of the Mozilla Public
+ License, v. 2.0. If a copy of the MPL was not distributed with this
+ file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+__license__ = 'Mozilla Public License v. 2.0'
+
+import typing
+
+import numpy as np
+
+from src.main.python.data import ArrayImpressions, ArrayRatingMatrix, IdIndex
+from src.main.python.inputoutput.columnar_csv import ColumnarCsvReader
+from src.main.python.properties.distributions.array_temporal_distribution import ArrayTemporalDistribution
+from src.main.python.utils.progress import ProgressMonitor
+
+
+class Relation:
+    """
+    Describes a relation stored in the records of a dataset (for instance, the interactions between users and items),
+    which is built into a rating matrix and, optionally, a temporal distribution.
+    """
+
+    def __init__(self,
+                 user_column: str,
+                 item_column: str,
+                 rating_column: str = None,
+                 timestamp_column: str = None,
+                 all_timepoints: bool = False,
+                 select: typing.Callable[[typing.Dict[str, np.ndarray]], np.ndarray] = None,
+                 threshold: float = 0.0,
+                 binarize: bool = True,
+                 update: bool = True):
+        """
+        Describes the relation.
+        :param user_column: the column identifying the user of each record.
+        :param item_column: the column identifying the item of each record.
+        :param rating_column: (OPTIONAL) the column containing the rating of each record. By default, every record is
+                              a positive interaction (its rating is 1).
+        :param timestamp_column: (OPTIONAL) the column containing the timestamp of each record. If it is given, the
+                                 temporal distribution of the relation is built. By default, it is not.
+        :param all_timepoints: (OPTIONAL) true if the temporal distribution stores the time point of every record.
+                               Otherwise, only the first record of each (user, item) pair is stored. By default, False.
+        :param select: (OPTIONAL) a function receiving a chunk of records, and returning a boolean array, true for the
+                       records belonging to the relation. By default, all the records do.
+        :param threshold: (OPTIONAL) the relevance threshold of the ratings (see RatingMatrix). By default, 0.
+        :param binarize: (OPTIONAL) true if the ratings are binarized (see RatingMatrix). By default, True.
+        :param update: (OPTIONAL) true if repeated ratings update the stored value (see RatingMatrix). By default,
+                       True.
+        """
+        self.user_column = user_column
+        self.item_column = item_column
+        self.rating_column = rating_column
+        self.timestamp_column = timestamp_column
+        self.all_timepoints = all_timepoints
+        self.select = select
+        self.threshold = threshold
+        self.binarize = binarize
+        self.update = update
+
+
+class RecordSchema:
+    """
+    Describes the records of a dataset, as read by its loader: a record is a row of a chunk (a dictionary containing
+    one array per column). The schema indicates:
+    a) which columns identify entities (users, items, series...), and the kind of entity of each one. The columns
+       identifying the same kind of entity share a single index (see IdIndex). By convention, the kinds of entities
+       named "users" and "items" are reported to progress monitors.
+    b) the relations built from the records (see Relation), by name.
+    c) the kinds of entities related by the impressions, if the dataset has them.
+    """
+
+    def __init__(self,
+                 entities: typing.Dict[str, str],
+                 relations: typing.Dict[str, Relation] = None,
+                 impressions: typing.Tuple[str, str] = None):
+        """
+        Describes the records.
+        :param entities: the columns identifying entities, and the kind of entity of each one.
+        :param relations: (OPTIONAL) the relations built from the records, by name. By default, none.
+        :param impressions: (OPTIONAL) the kinds of entities of the users and the items of the impressions. By
+                            default, the dataset has no impressions.
+        :raises ValueError: if some relation uses a column which does not identify entities.
+        """
+        self.entities = entities
+        self.relations = dict() if relations is None else relations
+        self.impressions = impressions
+
+        for name, relation in self.relations.items():
+            for column in (relation.user_column, relation.item_column):
+                if column not in entities:
+                    raise ValueError("The relation " + name + " uses the column " + column + ", which does not "
+                                     "identify entities")
+
+    def get_entities(self) -> typing.List[str]:
+        """
+        Obtains the kinds of entities of the records (and the impressions).
+        :return: the kinds of entities, in order of declaration.
+        """
+        entities = list(dict.fromkeys(self.entities.values()))
+        if self.impressions is not None:
+            entities += [entity for entity in self.impressions if entity not in entities]
+        return entities
+
+
+class IngestionEngine:
+    """
+    Builds the structures of a dataset from its records, described by a schema (see RecordSchema). Loaders parse
+    their files into chunks of columnar arrays, and the engine:
+    a) interns the identifiers of each chunk into the indexes of the entities, in order of first appearance (see
+       IdIndex.add_all). Identifiers might also be given dictionary-encoded: as the codes of the records, plus the
+       identifier of each code (for instance, local indices assigned by a process parsing a single file).
+    b) keeps the dense indices, ratings and timestamps of each relation as arrays, chunk after chunk.
+    c) once all the records have been added, builds the rating matrix and the temporal distribution of each relation,
+       and the impressions, in a single vectorized step each (see build).
+    The result is the same as adding the records one by one to RatingMatrix, TemporalDistribution and Impressions
+    objects. The rating matrices contain the entities found in the records (and those already in the indexes when the
+    engine was created). The impressions contain all the entities of their indexes.
+    """
+
+    def __init__(self,
+                 schema: RecordSchema,
+                 indexes: typing.Dict[str, IdIndex] = None):
+        """
+        Initializes the engine.
+        :param schema: the schema of the records.
+        :param indexes: (OPTIONAL) the index of each kind of entity, shared with other structures of the dataset. The
+                        entities already in them belong to the rating matrices. By default, new indexes are created.
+        """
+        indexes = dict() if indexes is None else indexes
+        self.schema = schema
+        self.indexes = {entity: indexes[entity] if entity in indexes else IdIndex()
+                        for entity in list(indexes.keys()) + schema.get_entities()}
+
+        # Dense indices of the entities found in the records, by kind of entity.
+        self.members = {entity: [np.arange(len(index), dtype=np.int64)] for entity, index in self.indexes.items()}
+        # Arrays of each relation, chunk after chunk.
+        self.relations = {name: {"rows": [], "cols": [], "ratings": [], "timestamps": []}
+                          for name in schema.relations.keys()}
+        self.impression_rows = []
+        self.impression_cols = []
+        # Last dictionary of each kind of entity, and the dense index of each one of its identifiers.
+        self.dictionaries = dict()
+
+    def get_index(self,
+                  entity: str) -> IdIndex:
+        """
+        Obtains the index of a kind of entity.
+        :param entity: the kind of entity.
+        :return: the index.
+        """
+        return self.indexes[entity]
+
+    def intern(self,
+               entity: str,
+               values: np.ndarray,
+               dictionary: typing.Sequence = None) -> np.ndarray:
+        """
+        Adds the identifiers of some entities to their index (in order of first appearance).
+        :param entity: the kind of entity.
+        :param values: the identifiers or, if a dictionary is given, the codes of the entities.
+        :param dictionary: (OPTIONAL) the identifier of each code. All of them are added to the index, in order. The
+                           dense indices of the last dictionary of each kind of entity are kept, so the same
+                           dictionary can be used in several calls. By default, the values are the identifiers.
+        :return: the dense index of each value.
+        """
+        index = self.indexes[entity]
+        if dictionary is None:
+            return index.add_all(values)
+
+        cached = self.dictionaries.get(entity)
+        if cached is None or cached[0] is not dictionary:
+            cached = (dictionary, index.add_all(dictionary))
+            self.dictionaries[entity] = cached
+        return cached[1][np.asarray(values, dtype=np.int64)]
+
+    def lookup(self,
+               entity: str,
+               values: np.ndarray,
+               dictionary: typing.Sequence = None) -> np.ndarray:
+        """
+        Finds the dense indices of some entities, without adding them to their index.
+        :param entity: the kind of entity.
+        :param values: the identifiers or, if a dictionary is given, the codes of the entities.
+        :param dictionary: (OPTIONAL) the identifier of each code. By default, the values are the identifiers.
+        :return: the dense index of each value, -1 for those entities which are not in the index.
+        """
+        index = self.indexes[entity]
+        if dictionary is None:
+            return index.get_indices(values)
+        return index.get_indices(dictionary)[np.asarray(values, dtype=np.int64)]
+
+    def add_records(self,
+                    records: typing.Dict[str, np.ndarray],
+                    dictionaries: typing.Dict[str, typing.Sequence] = None):
+        """
+        Adds a chunk of records.
+        :param records: the records: an array for each of the columns (at least, those used by the relations).
+        :param dictionaries: (OPTIONAL) the dictionaries of the dictionary-encoded kinds of entities (see intern). The
+                             columns identifying those entities contain codes. By default, the columns contain the
+                             identifiers.
+        """
+        dictionaries = dict() if dictionaries is None else dictionaries
+
+        indices = dict()
+        for column, entity in self.schema.entities.items():
+            if column in records:
+                dictionary = dictionaries.get(entity)
+                indices[column] = self.intern(entity, records[column], dictionary)
+                self.members[entity].append(np.unique(indices[column]) if dictionary is None
+                                            else self.dictionaries[entity][1])
+
+        for name, relation in self.schema.relations.items():
+            selected = relation.select(records) if relation.select is not None else slice(None)
+            stored = self.relations[name]
+            stored["rows"].append(indices[relation.user_column][selected])
+            stored["cols"].append(indices[relation.item_column][selected])
+            if relation.rating_column is not None:
+                stored["ratings"].append(np.asarray(records[relation.rating_column], dtype=np.float64)[selected])
+            if relation.timestamp_column is not None:
+                stored["timestamps"].append(np.asarray(records[relation.timestamp_column])[selected])
+
+    def add_impressions(self,
+                        users: np.ndarray,
+                        items: np.ndarray,
+                        dictionaries: typing.Dict[str, typing.Sequence] = None,
+                        register: bool = True):
+        """
+        Adds a list of (possibly repeated) impressions.
+        :param users: the user of each impression.
+        :param items: the item shown in each impression.
+        :param dictionaries: (OPTIONAL) the dictionaries of the dictionary-encoded kinds of entities (see intern). By
+                             default, users and items are given by their identifiers.
+        :param register: (OPTIONAL) True if the unknown users and items are added to their indexes, False if the
+                         impressions of unknown users or items are discarded (as in Impressions.add_impression). By
+                         default, they are added.
+        :raises ValueError: if the schema has no impressions.
+        """
+        if self.schema.impressions is None:
+            raise ValueError("The schema of the records has no impressions")
+        dictionaries = dict() if dictionaries is None else dictionaries
+
+        user_entity, item_entity = self.schema.impressions
+        if register:
+            self.impression_rows.append(self.intern(user_entity, users, dictionaries.get(user_entity)))
+            self.impression_cols.append(self.intern(item_entity, items, dictionaries.get(item_entity)))
+        else:
+            rows = self.lookup(user_entity, users, dictionaries.get(user_entity))
+            cols = self.lookup(item_entity, items, dictionaries.get(item_entity))
+            known = (rows >= 0) & (cols >= 0)
+            self.impression_rows.append(rows[known])
+            self.impression_cols.append(cols[known])
+
+    def ingest_csv(self,
+                   file_name: str,
+                   columns: typing.Dict[str, typing.Any],
+                   chunk_size: int = ColumnarCsvReader.DEFAULT_CHUNK_SIZE,
+                   delimiter: str = ',',
+                   monitor: ProgressMonitor = None):
+        """
+        Adds the records of a CSV file with header (for instance, a MovieLens-like file of ratings), chunk by chunk
+        (see ColumnarCsvReader).
+        :param file_name: the name of the file (possibly compressed, see Decompression).
+        :param columns: the columns to read (at least, those used by the relations), and the NumPy type of each one.
+        :param chunk_size: (OPTIONAL) the number of records parsed at once. By default, one million.
+        :param delimiter: (OPTIONAL) the delimiter of the fields. By default, a comma.
+        :param monitor: (OPTIONAL) receives the progress of the reading. By default, none.
+        """
+        for chunk in ColumnarCsvReader.read_file(file_name, columns, chunk_size, delimiter, monitor=monitor):
+            self.add_records(chunk)
+            if monitor is not None:
+                monitor.set_sizes(users=len(self.indexes["users"]) if "users" in self.indexes else None,
+                                  items=len(self.indexes["items"]) if "items" in self.indexes else None)
+
+    def count_users(self,
+                    name: str) -> np.ndarray:
+        """
+        Counts the records of each user in a relation (including repetitions).
+        :param name: the name of the relation.
+        :return: the number of records of each user, by dense index.
+        """
+        user_index = self.indexes[self.schema.entities[self.schema.relations[name].user_column]]
+        rows = IngestionEngine.concatenate(self.relations[name]["rows"], np.int64)
+        return np.bincount(rows, minlength=len(user_index))
+
+    def build(self,
+              previous: typing.Dict[str, typing.Any] = None) -> typing.Dict[str, typing.Any]:
+        """
+        Builds the structures of the dataset from the records and the impressions added so far.
+        :param previous: (OPTIONAL) array-backed structures built from previous records (with the same indexes), by
+                         name. They are extended with the new records, after the previous ones. By default, new
+                         structures are built.
+        :return: a dictionary containing a) the rating matrix of each relation (see ArrayRatingMatrix), by name, b) the
+                 temporal distribution of each relation with timestamps, named as the relation followed by "_ts", and
+                 c) the impressions (named "impressions"), if the schema has them.
+        :raises ValueError: if a previous temporal distribution only stores the first record of each pair.
+        """
+        previous = dict() if previous is None else previous
+        structures = dict()
+        for name, relation in self.schema.relations.items():
+            user_entity = self.schema.entities[relation.user_column]
+            item_entity = self.schema.entities[relation.item_column]
+            user_index = self.indexes[user_entity]
+            item_index = self.indexes[item_entity]
+
+            stored = self.relations[name]
+            rows = IngestionEngine.concatenate(stored["rows"], np.int64)
+            cols = IngestionEngine.concatenate(stored["cols"], np.int64)
+            ratings = IngestionEngine.concatenate(stored["ratings"], np.float64) \
+                if relation.rating_column is not None else np.ones(len(rows))
+
+            if name in previous:
+                structures[name] = previous[name].extend(rows, cols, ratings)
+            else:
+                structures[name] = ArrayRatingMatrix.from_indices(user_index, item_index, rows, cols, ratings,
+                                                                  relation.threshold, relation.binarize,
+                                                                  relation.update,
+                                                                  user_mask=self.get_members(user_entity),
+                                                                  item_mask=self.get_members(item_entity))
+
+            if relation.timestamp_column is not None:
+                timestamps = IngestionEngine.concatenate(stored["timestamps"], np.int64)
+                if not relation.all_timepoints:
+                    if name + "_ts" in previous:
+                        raise ValueError("The temporal distribution of the relation " + name + " only stores the "
+                                         "first record of each pair, so it cannot be extended")
+                    first = IngestionEngine.first_pairs(rows, cols, len(item_index))
+                    rows, cols, timestamps = rows[first], cols[first], timestamps[first]
+
+                if name + "_ts" in previous:
+                    structures[name + "_ts"] = previous[name + "_ts"].extend(rows, cols, timestamps)
+                else:
+                    structures[name + "_ts"] = ArrayTemporalDistribution(user_index, item_index, rows, cols,
+                                                                         timestamps)
+
+        if self.schema.impressions is not None:
+            user_entity, item_entity = self.schema.impressions
+            rows = IngestionEngine.concatenate(self.impression_rows, np.int64)
+            cols = IngestionEngine.concatenate(self.impression_cols, np.int64)
+            if "impressions" in previous:
+                structures["impressions"] = previous["impressions"].extend(rows, cols)
+            else:
+                structures["impressions"] = ArrayImpressions(self.indexes[user_entity], self.indexes[item_entity],
+                                                             rows, cols)
+        return structures
+
+    def get_members(self,
+                    entity: str) -> np.ndarray:
+        """
+        Finds the entities of a kind found in the records (or already in the index when the engine was created).
+        :param entity: the kind of entity.
+        :return: a boolean array, true for the dense indices of those entities.
+        """
+        mask = np.zeros(len(self.indexes[entity]), dtype=bool)
+        mask[np.concatenate(self.members[entity])] = True
+        return mask
+
+    @staticmethod
+    def first_pairs(rows: np.ndarray,
+                    cols: np.ndarray,
+                    num_cols: int) -> np.ndarray:
+        """
+        Finds the first occurrence of each (row, column) pair in a list of pairs.
+        :param rows: the row of each pair.
+        :param cols: the column of each pair.
+        :param num_cols: the number of columns.
+        :return: the positions of the first occurrence of each pair, in ascending order.
+        """
+        return np.sort(np.unique(rows * num_cols + cols, return_index=True)[1])
+
+    @staticmethod
+    def concatenate(arrays: typing.List[np.ndarray],
+                    dtype) -> np.ndarray:
+        """
+        Joins the arrays stored chunk after chunk.
+        :param arrays: the arrays.
+        :param dtype: the type of the result, if there are no arrays.
+        :return: the joined array.
+        """
+        return np.concatenate(arrays) if arrays else np.zeros(0, dtype=dtype)
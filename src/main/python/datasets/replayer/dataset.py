@@ -15,11 +15,25 @@ __copyright__ = """
 """
 __license__ = 'Mozilla Public License v. 2.0'
 
-from src.main.python.data import RatingMatrix, Impressions
-from src.main.python.properties.distributions.temporal_distribution import TemporalDistribution
+from src.main.python.data import ArrayImpressions, ArrayRatingMatrix, IdIndex
+from src.main.python.datasets.ingestion import IngestionEngine, Relation, RecordSchema
+from src.main.python.datasets.replayer.fingerprint import UserFingerprint
+from src.main.python.inputoutput.array_storage import ArrayStorage
+from src.main.python.inputoutput.dataset_cache import DatasetCache
+from src.main.python.inputoutput.decompression import Decompression
+from src.main.python.properties.distributions.array_temporal_distribution import ArrayTemporalDistribution
+from src.main.python.utils.memory import MemoryUsage
+from src.main.python.utils.progress import ProgressMonitor
+from src.main.python.utils.sampling import UserSampler
 
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import json
 from os import listdir
-from os.path import isfile, join
+from os.path import basename, isfile, join
+import typing
+
+import numpy as np
 
 
 class ReplayerDataset:
@@ -27,10 +41,21 @@ class ReplayerDataset:
     Representation of the replayer dataset given by Yahoo (Yahoo R6B dataset)
     """
 
+    # Name of the dataset, when stored on disk.
+    NAME = "yahoo-r6b"
+    # Number of lines read between two notifications to the progress monitor.
+    MONITOR_LINES = 16384
+    # Records of the dataset, as merged from the partial results of the files (see merge_files): each line is a
+    # rating, and every time point is stored.
+    SCHEMA = RecordSchema({"user": "users", "item": "items"},
+                          {"user_2_item": Relation("user", "item", rating_column="rating", timestamp_column="timestamp",
+                                                   all_timepoints=True)},
+                          ("users", "items"))
+
     def __init__(self,
-                 user_2_item: RatingMatrix,
-                 user_2_item_ts: TemporalDistribution,
-                 impressions: Impressions):
+                 user_2_item,
+                 user_2_item_ts,
+                 impressions):
         """
         Initialization of the dataset.
         :param user_2_item: the user-item interaction matrix.
@@ -43,97 +68,531 @@ class ReplayerDataset:
 
     @staticmethod
     def load_yahoo_r6b(interactions_folder: str,
-                       min_interactions_per_user: int = 0):
+                       min_interactions_per_user: int = 0,
+                       parallel: bool = False,
+                       num_workers: int = None,
+                       cache_folder: str = None,
+                       sampler: UserSampler = None,
+                       two_pass: bool = False,
+                       monitor: ProgressMonitor = None):
         """
-        Loads the Yahoo! R6B dataset.
+        Loads the Yahoo! R6B dataset. Each file is parsed independently (see parse_file), and the partial results are
+        then merged, in order of file name, into the dataset (see merge_files). Files compressed with gzip, bz2 or xz
+        are decompressed on the fly.
         :param interactions_folder: a directory containing the different files.
+        :param min_interactions_per_user: (OPTIONAL) the minimum number of interactions of the users to keep. By
+                                          default, all the users are kept.
+        :param parallel: (OPTIONAL) true if the files are parsed in parallel, in separate processes. The loaded
+                         dataset is exactly the same in both cases. By default, the files are parsed sequentially.
+        :param num_workers: (OPTIONAL) the number of processes parsing the files, when parallel. By default, as many
+                            as the number of processors of the machine.
+        :param cache_folder: (OPTIONAL) a folder where loaded datasets are stored (see DatasetCache). If the dataset
+                             was already loaded from the same files and with the same parameters, it is read from the
+                             folder instead. By default, no cache is used.
+        :param sampler: (OPTIONAL) selects the users to load, by their fingerprints. The lines of the rest of users
+                        are dropped while parsing. By default, all the users are loaded.
+        :param two_pass: (OPTIONAL) when there is a minimum number of interactions per user, true if the files are
+                         read twice: first, to count the interactions of each user (see count_files), and then, to
+                         store only the interactions of the users with enough of them. Otherwise, the files are read
+                         once, and the rest of users are hidden afterwards (see filter_users). The loaded dataset is
+                         the same in both cases, but reading twice keeps the peak memory close to the size of the
+                         final dataset. By default, the files are read once.
+        :param monitor: (OPTIONAL) receives the progress of the loader (lines and bytes read from each file, and
+                        current number of users, items and impressions). When parallel, each file is notified once it
+                        has been parsed. By default, the progress is not reported.
         :return: the fully loaded dataset.
         """
-        user_2_item = RatingMatrix(0.0, True, True)
-        user_2_item_ts = TemporalDistribution()
-        impr = Impressions()
-        items = dict()
+        files = ReplayerDataset.list_files(interactions_folder)
+        if cache_folder is not None:
+            key = ReplayerDataset.key(interactions_folder, min_interactions_per_user, sampler)
+            return DatasetCache.get_or_load(cache_folder, key, ReplayerDataset.from_arrays,
+                                            lambda: ReplayerDataset.load_yahoo_r6b(interactions_folder,
+                                                                                   min_interactions_per_user,
+                                                                                   parallel, num_workers,
+                                                                                   sampler=sampler,
+                                                                                   two_pass=two_pass,
+                                                                                   monitor=monitor))
+        if two_pass and min_interactions_per_user > 0:
+            # The item index is built in the first pass, so the items (and their dense indices) are the same as when
+            # all the users are read.
+            user_index, user_count, item_index = ReplayerDataset.count_files(files, parallel, num_workers, sampler,
+                                                                             monitor)
+            selected_users = set(user_index.get_ids(np.flatnonzero(user_count >= min_interactions_per_user)).tolist())
+            dataset, user_count = ReplayerDataset.ingest_files(files, parallel=parallel, num_workers=num_workers,
+                                                               selected_users=selected_users, item_index=item_index,
+                                                               monitor=monitor)
+            if monitor is not None:
+                monitor.finish()
+            # All the stored users are kept, but the dataset is still presented as filtered (without repetitions).
+            return ReplayerDataset.filter_users(dataset, user_count, min_interactions_per_user)
+
+        dataset, user_count = ReplayerDataset.ingest_files(files, parallel=parallel, num_workers=num_workers,
+                                                           sampler=sampler, monitor=monitor)
+        if monitor is not None:
+            monitor.finish()
+
+        # Now, we check whether we want to limit the dataset to those users with, at least, X impressions,
+        # and filter the dataset appropriately.
+        return ReplayerDataset.filter_users(dataset, user_count, min_interactions_per_user)
+
+    @staticmethod
+    def load_yahoo_r6b_incremental(interactions_folder: str,
+                                   state_file: str,
+                                   min_interactions_per_user: int = 0,
+                                   parallel: bool = False,
+                                   num_workers: int = None,
+                                   sampler: UserSampler = None,
+                                   monitor: ProgressMonitor = None):
+        """
+        Loads the Yahoo! R6B dataset, reusing the state stored in a file by previous calls: only those files of the
+        folder which were not ingested before (for instance, new days) are parsed, and added to the stored dataset.
+        The updated state is stored back in the file. When the new files come after the previous ones (in order of
+        file name), the result is the same as loading the whole folder with load_yahoo_r6b.
+        :param interactions_folder: a directory containing the different files.
+        :param state_file: the .npz file storing the state: the full dataset (including the indexes of user
+                           fingerprints and items), the number of interactions of each user, the names of the
+                           ingested files, and the sampled users. It is created if it does not exist.
+        :param min_interactions_per_user: (OPTIONAL) the minimum number of interactions of the users to keep. By
+                                          default, all the users are kept.
+        :param parallel: (OPTIONAL) true if the new files are parsed in parallel, in separate processes. By default,
+                         the files are parsed sequentially.
+        :param num_workers: (OPTIONAL) the number of processes parsing the files, when parallel. By default, as many
+                            as the number of processors of the machine.
+        :param sampler: (OPTIONAL) selects the users to load, by their fingerprints (see load_yahoo_r6b). It must be
+                        the same used to build the stored state. By default, all the users are loaded.
+        :param monitor: (OPTIONAL) receives the progress of the loader, while the new files are parsed (see
+                        load_yahoo_r6b). By default, the progress is not reported.
+        :return: the fully loaded dataset.
+        :raises ValueError: if the stored state was built with a different sample of users.
+        """
+        dataset = None
+        user_count = None
+        ingested = []
+        sample = json.dumps(sampler.get_params() if sampler is not None else None, sort_keys=True)
+        if isfile(state_file):
+            state = ArrayStorage.load_npz(state_file)
+            if str(state.get("sample", "null")) != sample:
+                raise ValueError("The state file " + state_file + " was built with a different sample of users")
+            dataset = ReplayerDataset.from_arrays(state)
+            user_count = state["user_count"]
+            ingested = state["files"].tolist()
+
+        new_files = [f for f in ReplayerDataset.list_files(interactions_folder) if basename(f) not in set(ingested)]
+        if dataset is None or new_files:
+            dataset, user_count = ReplayerDataset.ingest_files(new_files, dataset, user_count, parallel, num_workers,
+                                                               sampler, monitor=monitor)
+            ingested += [basename(f) for f in new_files]
+            if monitor is not None:
+                monitor.finish()
+
+            state = dataset.to_arrays()
+            state["user_count"] = user_count
+            state["files"] = np.array(ingested, dtype=str)
+            state["sample"] = np.array(sample)
+            ArrayStorage.save_npz(state_file, state)
+
+        return ReplayerDataset.filter_users(dataset, user_count, min_interactions_per_user)
+
+    @staticmethod
+    def list_files(interactions_folder: str) -> typing.List[str]:
+        """
+        Finds the files of the dataset.
+        :param interactions_folder: a directory containing the different files.
+        :return: the paths of the files, sorted by name.
+        """
+        return [join(interactions_folder, f) for f in sorted(listdir(interactions_folder)) if
+                isfile(join(interactions_folder, f)) and not f == "README.txt"]
+
+    @staticmethod
+    def key(interactions_folder: str,
+            min_interactions_per_user: int = 0,
+            sampler: UserSampler = None) -> str:
+        """
+        Computes the key identifying the dataset loaded from a folder (see DatasetCache.key), so a stored copy of the
+        dataset can be checked against the files of the folder and the loading parameters.
+        :param interactions_folder: a directory containing the different files.
+        :param min_interactions_per_user: (OPTIONAL) the minimum number of interactions of the users to keep. By
+                                          default, all the users are kept.
+        :param sampler: (OPTIONAL) selects the users to load (see load_yahoo_r6b). By default, all the users are
+                        loaded.
+        :return: the key.
+        """
+        return DatasetCache.key(ReplayerDataset.NAME, ReplayerDataset.list_files(interactions_folder),
+                                {"min_interactions_per_user": min_interactions_per_user,
+                                 "sample": sampler.get_params() if sampler is not None else None})
+
+    @staticmethod
+    def parse_line(record: str) -> typing.Tuple[int, str, float, int, typing.List[str]]:
+        """
+        Parses a line of the dataset.
+        :param record: the line.
+        :return: a tuple containing a) the timestamp, b) the item, c) the rating, d) the fingerprint of the user (0 if
+                 the user cannot be identified from its features) and e) the items shown to the user.
+        """
+        # Each line contains the interaction (timestamp, item and rating), and then, preceded by '|', the features of
+        # the user and the items shown to the user.
+        sections = record.split(" |")
+        splitted = sections[0].split(" ")
+
+        item_list = list()
+        user = 0
+        for section in sections[1:]:
+            tokens = section.split(" ")
+            if tokens[0] == "user":
+                user |= UserFingerprint.encode(tokens[1:])
+            else:
+                item_list.append(tokens[0][:len(tokens[0]) - 1])
+        return int(splitted[0]), splitted[1], float(splitted[2]), user, item_list
+
+    @staticmethod
+    def parse_file(file_name: str,
+                   sampler: UserSampler = None,
+                   selected_users: typing.AbstractSet[int] = None,
+                   monitor: ProgressMonitor = None) -> typing.Dict[str, typing.Any]:
+        """
+        Parses a file of the dataset, independently of the rest of files. Users and items are identified by local
+        indices, given in order of first appearance (the item of a line before the items shown in it). Users are
+        identified by the fingerprint of their features (see UserFingerprint). Lines whose user cannot be identified
+        from its features, or whose user is not selected, are skipped.
+        :param file_name: the path of the file (possibly compressed with gzip, bz2 or xz, see Decompression).
+        :param sampler: (OPTIONAL) selects the users to keep, by their fingerprints. By default, all the users are
+                        kept.
+        :param selected_users: (OPTIONAL) the fingerprints of the users to keep. By default, all the users are kept.
+        :param monitor: (OPTIONAL) receives the number of lines read, every few thousands of lines (see
+                        MONITOR_LINES). The file is not ended, so the caller can notify the sizes of the dataset
+                        first. By default, none.
+        :return: a dictionary containing:
+                 a) "users": the identifiers of the users of the file, sorted by local index.
+                 b) "items": the identifiers of the items of the file, sorted by local index.
+                 c) "rows", "cols", "ratings", "timestamps": the local user index, local item index, rating and
+                    timestamp of each line.
+                 d) "impr_counts": the number of items shown in each line.
+                 e) "impr_items": the local indices of the items shown in each line, one line after the other.
+                 f) "lines": the number of lines of the file (including the skipped ones).
+        """
         users = dict()
+        items = dict()
+        lines = 0
+        rows = []
+        cols = []
+        ratings = []
+        timestamps = []
+        impr_counts = []
+        impr_items = []
 
-        user_count = dict()
+        with Decompression.open_text(file_name) as f:
+            if monitor is not None:
+                monitor.start_file(file_name, f)
+            for record in f:
+                lines += 1
+                if monitor is not None and lines % ReplayerDataset.MONITOR_LINES == 0:
+                    monitor.update(ReplayerDataset.MONITOR_LINES)
+                timestamp, item, rating, user, item_list = ReplayerDataset.parse_line(record)
+
+                # If we can identify the user from its features (and the user is selected), we store the interaction
+                # and the impressions.
+                if user != 0 and (selected_users is None or user in selected_users) and \
+                        (sampler is None or user in users or sampler.contains(user, UserFingerprint.NUM_WORDS)):
+                    rows.append(users.setdefault(user, len(users)))
+                    cols.append(items.setdefault(item, len(items)))
+                    ratings.append(rating)
+                    timestamps.append(timestamp)
+
+                    impr_counts.append(len(item_list))
+                    impr_items.extend(items.setdefault(item_id, len(items)) for item_id in item_list)
+            if monitor is not None:
+                monitor.update(lines % ReplayerDataset.MONITOR_LINES)
 
-        files = [f for f in listdir(interactions_folder) if
-                 isfile(join(interactions_folder, f)) and not f == "README.txt"]
+        return {"users": list(users.keys()), "items": list(items.keys()),
+                "rows": np.array(rows, dtype=np.int64), "cols": np.array(cols, dtype=np.int64),
+                "ratings": np.array(ratings, dtype=np.float64), "timestamps": np.array(timestamps, dtype=np.int64),
+                "impr_counts": np.array(impr_counts, dtype=np.int64),
+                "impr_items": np.array(impr_items, dtype=np.int64), "lines": lines}
 
-        for file in files:
-            f = open(join(interactions_folder, file), mode='r')
+    @staticmethod
+    def count_file(file_name: str,
+                   sampler: UserSampler = None,
+                   monitor: ProgressMonitor = None) -> typing.Dict[str, typing.Any]:
+        """
+        Counts the interactions of each user in a file of the dataset, without storing them. Users and items are
+        listed as in parse_file.
+        :param file_name: the path of the file (possibly compressed with gzip, bz2 or xz, see Decompression).
+        :param sampler: (OPTIONAL) selects the users to count, by their fingerprints. By default, all the users are
+                        counted.
+        :param monitor: (OPTIONAL) receives the number of lines read (see parse_file). By default, none.
+        :return: a dictionary containing:
+                 a) "users": the fingerprints of the users of the file, in order of first appearance.
+                 b) "counts": the number of interactions of each user.
+                 c) "items": the identifiers of the items of the file, in order of first appearance.
+                 d) "lines": the number of lines of the file.
+        """
+        users = dict()
+        items = dict()
+        lines = 0
+        with Decompression.open_text(file_name) as f:
+            if monitor is not None:
+                monitor.start_file(file_name, f)
             for record in f:
-                splitted = record.split(" ")
-                timestamp = int(splitted[0])
-                item = splitted[1]
-                rating = float(splitted[2])
-
-                item_list = list()
-                is_current_user = False
-                is_empty_user = True
-                user = list()
-                for i in range(0, 135):
-                    user.append('0')
-                for i in range(3, len(splitted)):
-                    if splitted[i] == "|user":
-                        is_current_user = True
-                    elif splitted[i].startswith('|'):
-                        is_current_user = False
-                        item_id = splitted[i][1:len(splitted[i]) - 1]
-                        item_list.append(item_id)
-                    elif is_current_user:
-                        idx = int(splitted[i])
-                        if idx > 1:
-                            is_empty_user = False
-                            user[idx - 2] = '1'
-
-                # If we can identify the user from its features:
-                if not is_empty_user:
-                    # First, we store the user.
-                    user_str = ''.join(user)
-
-                    if not users.__contains__(user_str):
-                        user_id = len(users)
-                        users[user_str] = user_id
-                        user_2_item.add_user(user_id)
-                        impr.add_user(user_id)
-                        user_count[user_id] = 1
-                    else:
-                        user_id = users[user_str]
-                        user_count[user_id] += 1
-
-                    # Then, we store the item.
-                    if not items.__contains__(item):
-                        item_id = len(items)
-                        items[item] = item_id
-                        user_2_item.add_item(item_id)
-                        impr.add_item(item_id)
-                    else:
-                        item_id = items[item]
-
-                    user_2_item.rate(user_id, item_id, rating)
-                    user_2_item_ts.add_timepoint(user_id, item_id, timestamp)
-
-                    # Now, we add the impressions:
-                    for item_str in item_list:
-                        if not items.__contains__(item_str):
-                            item_id = len(items)
-                            items[item_str] = item_id
-                            user_2_item.add_item(item_id)
-                            impr.add_item(item_id)
-                        else:
-                            item_id = items[item_str]
-                        impr.add_impression(user_id, item_id)
+                lines += 1
+                if monitor is not None and lines % ReplayerDataset.MONITOR_LINES == 0:
+                    monitor.update(ReplayerDataset.MONITOR_LINES)
+                _, item, _, user, item_list = ReplayerDataset.parse_line(record)
+                if user != 0 and (sampler is None or user in users or
+                                  sampler.contains(user, UserFingerprint.NUM_WORDS)):
+                    users[user] = users.get(user, 0) + 1
+                    items.setdefault(item)
+                    for item_id in item_list:
+                        items.setdefault(item_id)
+            if monitor is not None:
+                monitor.update(lines % ReplayerDataset.MONITOR_LINES)
 
-        # Now, we check whether we want to limit the dataset to those users with, at least, X impressions,
-        # and filter the dataset appropriately.
-        if min_interactions_per_user <= 0:
-            return ReplayerDataset(user_2_item, user_2_item_ts, impr)
+        return {"users": list(users.keys()), "counts": np.array(list(users.values()), dtype=np.int64),
+                "items": list(items.keys()), "lines": lines}
+
+    @staticmethod
+    def count_files(files: typing.List[str],
+                    parallel: bool = False,
+                    num_workers: int = None,
+                    sampler: UserSampler = None,
+                    monitor: ProgressMonitor = None) -> typing.Tuple[IdIndex, np.ndarray, IdIndex]:
+        """
+        Counts the interactions of each user in a list of files of the dataset (see count_file).
+        :param files: the paths of the files.
+        :param parallel: (OPTIONAL) true if the files are read in parallel, in separate processes. By default, the
+                         files are read sequentially.
+        :param num_workers: (OPTIONAL) the number of processes reading the files, when parallel. By default, as many
+                            as the number of processors of the machine.
+        :param sampler: (OPTIONAL) selects the users to count, by their fingerprints. By default, all the users are
+                        counted.
+        :param monitor: (OPTIONAL) receives the progress of the count (see load_yahoo_r6b). By default, none.
+        :return: a tuple containing a) the index of the users, b) the number of interactions of each user, by dense
+                 index, and c) the index of the items. The dense indices are the same as when the files are ingested
+                 (see merge_files).
+        """
+        if parallel:
+            count = partial(ReplayerDataset.count_file, sampler=sampler)
+            with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                partials = ReplayerDataset.track_files(files, list(executor.map(count, files)), monitor)
+        else:
+            count = partial(ReplayerDataset.count_file, sampler=sampler, monitor=monitor)
+            partials = map(count, files)
+
+        user_index = IdIndex()
+        item_index = IdIndex()
+        rows = [np.zeros(0, dtype=np.int64)]
+        counts = [np.zeros(0, dtype=np.int64)]
+        for partial_count in partials:
+            rows.append(user_index.add_all(partial_count["users"]))
+            counts.append(partial_count["counts"])
+            item_index.add_all(partial_count["items"])
+            if monitor is not None:
+                monitor.set_sizes(users=len(user_index), items=len(item_index))
+                monitor.end_file()
+
+        user_count = np.bincount(np.concatenate(rows), weights=np.concatenate(counts), minlength=len(user_index))
+        return user_index, user_count.astype(np.int64), item_index
+
+    @staticmethod
+    def ingest_files(files: typing.List[str],
+                     dataset=None,
+                     user_count: np.ndarray = None,
+                     parallel: bool = False,
+                     num_workers: int = None,
+                     sampler: UserSampler = None,
+                     selected_users: typing.AbstractSet[int] = None,
+                     item_index: IdIndex = None,
+                     monitor: ProgressMonitor = None):
+        """
+        Parses a list of files of the dataset (see parse_file), and merges them, in order, into the dataset (see
+        merge_files).
+        :param files: the paths of the files.
+        :param dataset: (OPTIONAL) a dataset (without filtered users) containing previously ingested files. By default,
+                        a new dataset is built.
+        :param user_count: (OPTIONAL) the number of interactions of each user of the previous dataset, by dense index.
+        :param parallel: (OPTIONAL) true if the files are parsed in parallel, in separate processes. By default, the
+                         files are parsed sequentially.
+        :param num_workers: (OPTIONAL) the number of processes parsing the files, when parallel. By default, as many
+                            as the number of processors of the machine.
+        :param sampler: (OPTIONAL) selects the users to keep, by their fingerprints. By default, all the users are
+                        kept.
+        :param selected_users: (OPTIONAL) the fingerprints of the users to keep. By default, all the users are kept.
+        :param item_index: (OPTIONAL) the index of the items of the new dataset (see merge_files).
+        :param monitor: (OPTIONAL) receives the progress of the ingestion (see load_yahoo_r6b). By default, none.
+        :return: a pair containing a) the dataset and b) the number of interactions of each user, by dense index.
+        """
+        if not parallel:
+            parse = partial(ReplayerDataset.parse_file, sampler=sampler, selected_users=selected_users,
+                            monitor=monitor)
+            return ReplayerDataset.merge_files(map(parse, files), dataset, user_count, item_index, monitor)
+
+        # The workers return their partial results in order of submission, so the merge is deterministic.
+        parse = partial(ReplayerDataset.parse_file, sampler=sampler, selected_users=selected_users)
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            partials = ReplayerDataset.track_files(files, executor.map(parse, files), monitor)
+            return ReplayerDataset.merge_files(partials, dataset, user_count, item_index, monitor)
+
+    @staticmethod
+    def track_files(files: typing.List[str],
+                    partials: typing.Iterable[typing.Dict[str, typing.Any]],
+                    monitor: ProgressMonitor = None) -> typing.Iterator[typing.Dict[str, typing.Any]]:
+        """
+        Notifies the files parsed by other processes to a progress monitor, as their partial results are received.
+        Each file is started and fully read (but not ended, see parse_file) before its partial result is returned.
+        :param files: the paths of the files.
+        :param partials: the partial result of each file, in order (see parse_file and count_file).
+        :param monitor: (OPTIONAL) the progress monitor. By default, none.
+        :return: an iterator over the partial results.
+        """
+        for file_name, file_partial in zip(files, partials):
+            if monitor is not None:
+                monitor.start_file(file_name)
+                monitor.update(file_partial["lines"], monitor.file_size)
+            yield file_partial
+
+    @staticmethod
+    def merge_files(partials: typing.Iterable[typing.Dict[str, typing.Any]],
+                    dataset=None,
+                    user_count: np.ndarray = None,
+                    item_index: IdIndex = None,
+                    monitor: ProgressMonitor = None):
+        """
+        Merges the partial results of parsing the files of the dataset (see parse_file) into the full dataset. The
+        local identifiers of each file are registered in the global indexes in order of file, so the dense indices of
+        users and items are the same as if all the lines were read one after the other.
+        :param partials: the partial result of each file, in order.
+        :param dataset: (OPTIONAL) a dataset (without filtered users) containing previously ingested files. The new
+                        files are added after them. By default, a new dataset is built.
+        :param user_count: (OPTIONAL) the number of interactions of each user of the previous dataset, by dense index.
+        :param item_index: (OPTIONAL) when a new dataset is built, an index of items to start from (for instance, all
+                           the items of the files, see count_files). By default, an empty index.
+        :param monitor: (OPTIONAL) receives the number of users and items after each file, and then, the end of the
+                        file (see parse_file). The number of impressions is notified once the dataset is built. By
+                        default, none.
+        :return: a pair containing a) the dataset and b) the number of interactions of each user, by dense index.
+        """
+        # The users are identified by their feature fingerprints, and the items by their string identifiers. Both
+        # indexes are shared by all the structures of the dataset.
+        if dataset is None:
+            indexes = {"users": IdIndex(), "items": IdIndex() if item_index is None else item_index}
+            user_count = np.zeros(0, dtype=np.int64)
         else:
-            aux_dataset = user_2_item.filter(user_filter=lambda u: user_count[u] >= min_interactions_per_user)
-            aux_dataset_ts = user_2_item_ts.filter(user_filter=lambda u: user_count[u] >= min_interactions_per_user)
-            aux_impr = impr.filter(user_filter=lambda u: user_count[u] >= min_interactions_per_user)
-            return ReplayerDataset(aux_dataset, aux_dataset_ts, aux_impr)
+            indexes = {"users": dataset.user_2_item.user_index, "items": dataset.user_2_item.item_index}
+        engine = IngestionEngine(ReplayerDataset.SCHEMA, indexes)
+
+        for file_partial in partials:
+            # The local indices of each file are the codes of its users and items.
+            dictionaries = {"users": file_partial["users"], "items": file_partial["items"]}
+            engine.add_records({"user": file_partial["rows"], "item": file_partial["cols"],
+                                "rating": file_partial["ratings"], "timestamp": file_partial["timestamps"]},
+                               dictionaries)
+            engine.add_impressions(np.repeat(file_partial["rows"], file_partial["impr_counts"]),
+                                   file_partial["impr_items"], dictionaries)
+
+            if monitor is not None:
+                monitor.set_sizes(users=len(indexes["users"]), items=len(indexes["items"]))
+                monitor.end_file()
+
+        new_user_count = engine.count_users("user_2_item")
+        new_user_count[:len(user_count)] += user_count
+
+        # Once loaded, the dataset is no longer modified: we store it in compact, immutable arrays. Both the users and
+        # the items of the index belong to the three structures.
+        previous = None
+        if dataset is not None:
+            previous = {"user_2_item": dataset.user_2_item, "user_2_item_ts": dataset.user_2_item_ts,
+                        "impressions": dataset.impressions}
+        merged = ReplayerDataset(**engine.build(previous))
+        if monitor is not None:
+            # The impressions repeated across the lines are only removed when the structure is built.
+            monitor.set_sizes(impressions=merged.impressions.get_num_impressions())
+        return merged, new_user_count
+
+    @staticmethod
+    def filter_users(dataset,
+                     user_count: np.ndarray,
+                     min_interactions_per_user: int = 0):
+        """
+        Limits the dataset to those users with, at least, a minimum number of interactions.
+        :param dataset: the dataset (without filtered users).
+        :param user_count: the number of interactions of each user, by dense index.
+        :param min_interactions_per_user: (OPTIONAL) the minimum number of interactions of the users to keep. By
+                                          default, all the users are kept.
+        :return: the dataset if all the users are kept, a view of it otherwise.
+        """
+        if min_interactions_per_user <= 0:
+            return dataset
+
+        # The structures are not copied: we just hide the rest of the users. The counts are indexed by dense index,
+        # so the mask is passed as it is, without looking up the identifiers of the users.
+        user_mask = user_count >= min_interactions_per_user
+        aux_dataset = dataset.user_2_item.view_masks(user_mask=user_mask)
+        aux_dataset_ts = dataset.user_2_item_ts.view_masks(user_mask=user_mask)
+        aux_impr = dataset.impressions.view_masks(user_mask=user_mask)
+        return ReplayerDataset(aux_dataset, aux_dataset_ts, aux_impr)
+
+    @staticmethod
+    def from_arrays(arrays: typing.Dict[str, np.ndarray]):
+        """
+        Rebuilds the dataset from the arrays returned by to_arrays.
+        :param arrays: the arrays of the dataset.
+        :return: the dataset.
+        """
+        user_index = IdIndex.from_ids(UserFingerprint.from_words(arrays["user_ids"]))
+        item_index = IdIndex.from_ids(arrays["item_ids"])
+        return ReplayerDataset(
+            ArrayRatingMatrix.from_arrays(user_index, item_index, ArrayStorage.get_prefix("user_2_item", arrays)),
+            ArrayTemporalDistribution.from_arrays(user_index, item_index,
+                                                  ArrayStorage.get_prefix("user_2_item_ts", arrays)),
+            ArrayImpressions.from_arrays(user_index, item_index, ArrayStorage.get_prefix("impressions", arrays)))
+
+    def to_arrays(self) -> typing.Dict[str, np.ndarray]:
+        """
+        Obtains the arrays storing the dataset, so it can be saved: the identifiers of users (as UserFingerprint
+        words) and items, and the arrays of each structure, prefixed by its name.
+        :return: a dictionary containing the arrays.
+        """
+        arrays = {"user_ids": UserFingerprint.to_words(self.user_2_item.user_index.get_ids_iterator()),
+                  "item_ids": np.array(list(self.user_2_item.item_index.get_ids_iterator()), dtype=str)}
+        arrays.update(ArrayStorage.add_prefix("user_2_item", self.user_2_item.to_arrays()))
+        arrays.update(ArrayStorage.add_prefix("user_2_item_ts", self.user_2_item_ts.to_arrays()))
+        arrays.update(ArrayStorage.add_prefix("impressions", self.impressions.to_arrays()))
+        return arrays
+
+    def save(self,
+             folder: str,
+             key: str = None):
+        """
+        Saves the dataset into a directory of raw NumPy arrays (see ArrayStorage), which can be later opened, by
+        several processes at the same time, without parsing or copying the data.
+        :param folder: the directory.
+        :param key: (OPTIONAL) the key identifying the input files and loading parameters of the dataset (see key),
+                    stored along with the arrays. By default, none is stored.
+        """
+        ArrayStorage.save_directory(folder, self.to_arrays(), ReplayerDataset.NAME, key)
+
+    @staticmethod
+    def open(folder: str,
+             key: str = None):
+        """
+        Opens a dataset saved into a directory. The arrays of the structures are memory-mapped, so they are shared
+        (through the page cache of the operating system) by all the processes opening the same directory. Only the
+        indexes of users and items are built in memory.
+        :param folder: the directory.
+        :param key: (OPTIONAL) the key identifying the input files and loading parameters of the dataset (see key).
+                    By default, the dataset is opened whatever files and parameters it was loaded from.
+        :return: the dataset.
+        :raises ValueError: if the directory does not contain the dataset (loaded with the given key).
+        """
+        return ReplayerDataset.from_arrays(ArrayStorage.open_directory(folder, ReplayerDataset.NAME, key))
+
+    def memory_report(self) -> typing.Dict[str, int]:
+        """
+        Measures the memory used by the dataset, broken down by component. The indexes of users and items, shared by
+        all the structures, are reported separately.
+        :return: the number of bytes used by each component of the dataset (see MemoryUsage.report).
+        """
+        return MemoryUsage.report(self, {"user_index": self.user_2_item.user_index,
+                                         "item_index": self.user_2_item.item_index})
 
     def num_users(self):
         """
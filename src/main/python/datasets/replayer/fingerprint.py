@@ -0,0 +1,82 @@
+"""
+Compact representation of the users of the replayer dataset given by Yahoo.
+"""
+
+__version__ = '0.1'
+__author__ = 'Javier Sanz-Cruzado, Pablo Castells'
+__email__ = 'javier.sanz-cruzado@uam.es, pablo.castells@uam.es'
+__copyright__ = """
+ Copyright (C) 2021 Information Retrieval Group at Universidad Autónoma
+ de Madrid, http://ir.ii.uam.es.
+
+ This Source Code Form is subject to the terms of the Mozilla Public
+ License, v. 2.0. If a copy of the MPL was not distributed with this
+ file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+__license__ = 'Mozilla Public License v. 2.0'
+
+import typing
+
+import numpy as np
+
+
+class UserFingerprint:
+    """
+    The users of the Yahoo! R6B dataset are not identified: we identify them by their (binary) feature vectors. Each
+    vector is encoded as an integer bitmask, where bit k is set when feature k + 2 is active (features 0 and 1 carry no
+    information about the user). Fingerprints are hashable, so they can be directly used as user identifiers, and they
+    can be stored in arrays of three 64-bit words.
+    """
+
+    # Number of (informative) features of a user.
+    NUM_FEATURES = 135
+    # Number of 64-bit words needed to store a fingerprint.
+    NUM_WORDS = 3
+
+    @staticmethod
+    def encode(features: typing.Iterable[str]) -> int:
+        """
+        Builds the fingerprint of a user from its active features.
+        :param features: the indices of the active features, as they appear in the files of the dataset.
+        :return: the fingerprint of the user (0 if the user has no informative features).
+        """
+        fingerprint = 0
+        for idx in map(int, features):
+            fingerprint |= 1 << idx
+        return fingerprint >> 2
+
+    @staticmethod
+    def to_string(fingerprint: int) -> str:
+        """
+        Obtains the feature vector of a user, as a string of '0' and '1' characters.
+        :param fingerprint: the fingerprint of the user.
+        :return: the string, whose k-th character indicates whether feature k + 2 is active.
+        """
+        return format(fingerprint, '0' + str(UserFingerprint.NUM_FEATURES) + 'b')[::-1]
+
+    @staticmethod
+    def to_words(fingerprints: typing.Iterable[int]) -> np.ndarray:
+        """
+        Stores a collection of fingerprints as 64-bit words.
+        :param fingerprints: the fingerprints.
+        :return: an array of shape (number of fingerprints, NUM_WORDS), containing the words of each fingerprint
+                 (least significant first).
+        """
+        fingerprints = list(fingerprints)
+        words = np.empty((len(fingerprints), UserFingerprint.NUM_WORDS), dtype=np.uint64)
+        for word in range(UserFingerprint.NUM_WORDS):
+            words[:, word] = [(fingerprint >> (64 * word)) & 0xFFFFFFFFFFFFFFFF for fingerprint in fingerprints]
+        return words
+
+    @staticmethod
+    def from_words(words: np.ndarray) -> typing.List[int]:
+        """
+        Recovers a collection of fingerprints from their 64-bit words.
+        :param words: an array of shape (number of fingerprints, NUM_WORDS), as returned by to_words.
+        :return: the fingerprints.
+        """
+        fingerprints = [0] * len(words)
+        for word in range(UserFingerprint.NUM_WORDS):
+            fingerprints = [fingerprint | (value << (64 * word))
+                            for fingerprint, value in zip(fingerprints, words[:, word].tolist())]
+        return fingerprints
@@ -0,0 +1,181 @@
+"""
+Storage of the array-backed structures of a dataset on disk.
+"""
+
+__version__ = '0.1'
+__author__ = 'Javier Sanz-Cruzado, Pablo Castells'
+__email__ = 'javier.sanz-cruzado@uam.es, pablo.castells@uam.es'
+__copyright__ = """
+ Copyright (C) 2021 Information Retrieval Group at Universidad Autónoma
+ de Madrid, http://ir.ii.uam.es.
+
+ This Source Code Form is subject to the terms of the Mozilla Public
+ License, v. 2.0. If a copy of the MPL was not distributed with this
+ file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+__license__ = 'Mozilla Public License v. 2.0'
+
+import json
+import os
+import typing
+
+import numpy as np
+
+
+class ArrayStorage:
+    """
+    Saves and reads collections of named NumPy arrays. The arrays of the different structures of a dataset are stored
+    together, their names prefixed by the name of the structure (for instance, "user_2_item.user_indptr").
+
+    Arrays can be stored either in a single .npz file, or in a directory, with the following format:
+    a) one raw NumPy file (<name>.npy) per array, which can be memory-mapped. Scalar values are 0-dimensional arrays.
+    b) a format.json file, written once all the arrays have been saved, containing the version of the format, the
+       name of the dataset, the names of the arrays and, optionally, the key identifying the input files and loading
+       parameters the dataset was built from (see DatasetCache.key).
+    """
+
+    # Version of the stored format. Changing it invalidates the previously stored datasets.
+    FORMAT_VERSION = 2
+    # Name of the file describing the contents of a directory.
+    FORMAT_FILE = "format.json"
+
+    @staticmethod
+    def add_prefix(prefix: str,
+                   arrays: typing.Dict[str, np.ndarray]) -> typing.Dict[str, np.ndarray]:
+        """
+        Prefixes the names of a collection of arrays.
+        :param prefix: the prefix (the name of the structure the arrays belong to).
+        :param arrays: the arrays.
+        :return: a dictionary containing the arrays, with the prefixed names.
+        """
+        return {prefix + "." + name: array for name, array in arrays.items()}
+
+    @staticmethod
+    def get_prefix(prefix: str,
+                   arrays: typing.Dict[str, np.ndarray]) -> typing.Dict[str, np.ndarray]:
+        """
+        Selects the arrays whose names have a given prefix.
+        :param prefix: the prefix (the name of the structure the arrays belong to).
+        :param arrays: the arrays.
+        :return: a dictionary containing the selected arrays, with the prefix removed from their names.
+        """
+        start = len(prefix) + 1
+        return {name[start:]: array for name, array in arrays.items() if name.startswith(prefix + ".")}
+
+    @staticmethod
+    def save_npz(file_name: str,
+                 arrays: typing.Dict[str, np.ndarray]):
+        """
+        Saves a collection of arrays into a single (uncompressed) .npz file. The file is first written under a
+        temporary name, so an interrupted save never leaves an incomplete file behind.
+        :param file_name: the name of the file.
+        :param arrays: the arrays.
+        """
+        temp_file_name = file_name + ".tmp"
+        with open(temp_file_name, mode='wb') as f:
+            np.savez(f, **arrays)
+        os.replace(temp_file_name, file_name)
+
+    @staticmethod
+    def load_npz(file_name: str) -> typing.Dict[str, np.ndarray]:
+        """
+        Reads a collection of arrays from a .npz file.
+        :param file_name: the name of the file.
+        :return: a dictionary containing the arrays.
+        """
+        with np.load(file_name, allow_pickle=False) as f:
+            return {name: f[name] for name in f.files}
+
+    @staticmethod
+    def save_directory(folder: str,
+                       arrays: typing.Dict[str, np.ndarray],
+                       dataset_name: str,
+                       key: str = None):
+        """
+        Saves a collection of arrays into a directory, one .npy file per array.
+        :param folder: the directory. It is created if it does not exist.
+        :param arrays: the arrays.
+        :param dataset_name: the name of the dataset the arrays belong to.
+        :param key: (OPTIONAL) the key identifying the input files and loading parameters of the dataset (see
+                    DatasetCache.key). By default, none is stored.
+        """
+        os.makedirs(folder, exist_ok=True)
+        format_file_name = os.path.join(folder, ArrayStorage.FORMAT_FILE)
+        if os.path.isfile(format_file_name):
+            os.remove(format_file_name)
+
+        for name, array in arrays.items():
+            np.save(os.path.join(folder, name + ".npy"), np.asarray(array), allow_pickle=False)
+        with open(format_file_name, mode='w') as f:
+            json.dump({"format_version": ArrayStorage.FORMAT_VERSION, "dataset": dataset_name,
+                       "arrays": list(arrays.keys()), "key": key}, f, indent=1)
+
+    @staticmethod
+    def read_description(folder: str) -> typing.Optional[typing.Dict[str, typing.Any]]:
+        """
+        Reads the description (format.json file) of a directory of arrays.
+        :param folder: the directory.
+        :return: the description, or None if the directory does not contain a complete saved dataset.
+        """
+        format_file_name = os.path.join(folder, ArrayStorage.FORMAT_FILE)
+        if not os.path.isfile(format_file_name):
+            return None
+        with open(format_file_name, mode='r') as f:
+            return json.load(f)
+
+    @staticmethod
+    def matches(description: typing.Dict[str, typing.Any],
+                dataset_name: str,
+                key: str = None) -> bool:
+        """
+        Checks whether the description of a directory of arrays corresponds to a given dataset.
+        :param description: the description of the directory (see read_description).
+        :param dataset_name: the name of the dataset.
+        :param key: (OPTIONAL) the key identifying the input files and loading parameters of the dataset (see
+                    DatasetCache.key). By default, any stored key is accepted.
+        :return: true if the directory stores the dataset, in the current format (and with the given key), false
+                 otherwise.
+        """
+        return description["format_version"] == ArrayStorage.FORMAT_VERSION and \
+            description["dataset"] == dataset_name and (key is None or description.get("key") == key)
+
+    @staticmethod
+    def is_saved(folder: str,
+                 dataset_name: str,
+                 key: str = None) -> bool:
+        """
+        Checks whether a directory contains a complete saved copy of a dataset, which can be opened (see
+        open_directory).
+        :param folder: the directory.
+        :param dataset_name: the name of the dataset.
+        :param key: (OPTIONAL) the key identifying the input files and loading parameters of the dataset (see
+                    DatasetCache.key). By default, any stored key is accepted.
+        :return: true if the directory contains the dataset, false otherwise.
+        """
+        description = ArrayStorage.read_description(folder)
+        return description is not None and ArrayStorage.matches(description, dataset_name, key)
+
+    @staticmethod
+    def open_directory(folder: str,
+                       dataset_name: str,
+                       key: str = None) -> typing.Dict[str, np.ndarray]:
+        """
+        Opens the arrays stored in a directory as read-only memory maps: nothing is read until it is accessed, and
+        several processes opening the same directory share the pages of the files.
+        :param folder: the directory.
+        :param dataset_name: the name of the dataset the arrays belong to.
+        :param key: (OPTIONAL) the key identifying the input files and loading parameters of the dataset (see
+                    DatasetCache.key). By default, any stored key is accepted.
+        :return: a dictionary containing the (memory-mapped) arrays.
+        :raises ValueError: if the directory does not contain a complete copy of the given dataset, in the current
+                            format (and built with the given key).
+        """
+        description = ArrayStorage.read_description(folder)
+        if description is None:
+            raise ValueError("The directory " + folder + " does not contain a saved dataset")
+        if not ArrayStorage.matches(description, dataset_name, key):
+            raise ValueError("The directory " + folder + " does not contain a saved " + dataset_name + " dataset in "
+                             "the current format, loaded from the given files and parameters")
+
+        return {name: np.load(os.path.join(folder, name + ".npy"), mmap_mode='r', allow_pickle=False)
+                for name in description["arrays"]}
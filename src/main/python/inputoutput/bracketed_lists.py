@@ -0,0 +1,161 @@
+"""
+Reader for CSV columns containing lists of integers between brackets, such as "[12 45 78]".
+"""
+
+__version__ = '0.1'
+__author__ = 'Javier Sanz-Cruzado, Pablo Castells'
+__email__ = 'javier.sanz-cruzado@uam.es, pablo.castells@uam.es'
+__copyright__ = """
+ Copyright (C) 2021 Information Retrieval Group at Universidad Autónoma
+ de Madrid, http://ir.ii.uam.es.
+
+ This Source Code Form is subject to the terms of the Mozilla Public
+ License, v. 2.0. If a copy of the MPL was not distributed with this
+ file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+__license__ = 'Mozilla Public License v. 2.0'
+
+import itertools
+import re
+import typing
+
+import numpy as np
+
+from src.main.python.inputoutput.decompression import Decompression
+from src.main.python.utils.progress import ProgressMonitor
+
+
+class BracketedListReader:
+    """
+    Reads lists of non-negative integers written between brackets, with the integers separated by whitespace. A
+    whole block of lists is parsed at once by NumPy: lists are joined into a single buffer, separated by a negative
+    marker, so no Python work is done per integer. Lists are returned as one flat array plus an array of offsets
+    (list i lies between positions offsets[i] and offsets[i+1] of the flat array).
+    """
+
+    DEFAULT_CHUNK_SIZE = 1000000
+
+    # A list, possibly within quotes (the group captures the contents of the list).
+    LIST_PATTERN = re.compile(r'"?\[([^\]]*)\]"?')
+
+    @staticmethod
+    def parse(lists: typing.Sequence[str]) -> typing.Tuple[np.ndarray, np.ndarray]:
+        """
+        Parses a collection of bracketed lists.
+        :param lists: the lists, as strings (for instance, "[12 45 78]").
+        :return: a pair containing a) the offsets of the lists and b) the flat array of integers.
+        """
+        return BracketedListReader.parse_contents([text.strip()[1:-1] for text in lists])
+
+    @staticmethod
+    def parse_contents(contents: typing.Sequence[str]) -> typing.Tuple[np.ndarray, np.ndarray]:
+        """
+        Parses a collection of lists, once their brackets have been removed.
+        :param contents: the contents of the lists (for instance, "12 45 78").
+        :return: a pair containing a) the offsets of the lists and b) the flat array of integers.
+        """
+        offsets = np.zeros(len(contents) + 1, dtype=np.int64)
+        if len(contents) == 0:
+            return offsets, np.zeros(0, dtype=np.int64)
+
+        values = np.fromstring(" -1 ".join(contents) + " -1", dtype=np.int64, sep=" ")
+        markers = values < 0
+        ends = np.flatnonzero(markers)
+        offsets[1:] = ends - np.arange(len(ends))
+        return offsets, values[~markers]
+
+    @staticmethod
+    def read_chunks(file: typing.TextIO,
+                    key_column: str,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    delimiter: str = ',') -> typing.Iterator[typing.Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Reads an open CSV file (with header) containing one bracketed list per line, together with a numerical
+        key, chunk by chunk. Lists might be quoted, and span several lines.
+        :param file: the file, positioned at its header line.
+        :param key_column: the name of the (integer) column identifying each list.
+        :param chunk_size: (OPTIONAL) the (approximate) maximum number of lines of each chunk. By default, one million.
+        :param delimiter: (OPTIONAL) the delimiter of the fields. By default, a comma.
+        :return: an iterator over the chunks. Each chunk is a tuple containing a) the key of each list, b) the
+                 offsets of the lists and c) the flat array of integers.
+        """
+        header = file.readline().rstrip('\r\n').split(delimiter)
+        key_pos = header.index(key_column)
+
+        while True:
+            text = "".join(itertools.islice(file, chunk_size))
+            if not text:
+                return
+            # The last list of the chunk might continue in the next lines.
+            while text.count('[') > text.count(']'):
+                line = file.readline()
+                if not line:
+                    break
+                text += line
+
+            offsets, values = BracketedListReader.parse_contents(BracketedListReader.LIST_PATTERN.findall(text))
+            rows = BracketedListReader.LIST_PATTERN.sub('0', text).splitlines()
+            keys = np.loadtxt(rows, delimiter=delimiter, usecols=key_pos, dtype=np.int64, ndmin=1)
+            yield keys, offsets, values
+
+    @staticmethod
+    def select_lists(keys: np.ndarray,
+                     offsets: np.ndarray,
+                     values: np.ndarray,
+                     selected: np.ndarray) -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Selects some of the lists of a collection.
+        :param keys: the key of each list.
+        :param offsets: the offsets of the lists.
+        :param values: the flat array of integers.
+        :param selected: a boolean array, true for the lists to keep.
+        :return: a tuple containing a) the keys, b) the offsets and c) the flat array of integers of the selected lists.
+        """
+        lengths = np.diff(offsets)
+        selected_offsets = np.zeros(np.count_nonzero(selected) + 1, dtype=np.int64)
+        np.cumsum(lengths[selected], out=selected_offsets[1:])
+        return keys[selected], selected_offsets, values[np.repeat(selected, lengths)]
+
+    @staticmethod
+    def read_file(file_name: str,
+                  key_column: str,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE,
+                  delimiter: str = ',',
+                  select: typing.Callable[[np.ndarray], np.ndarray] = None,
+                  monitor: ProgressMonitor = None) -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Reads a CSV file (with header) containing one bracketed list per line, together with a numerical key.
+        :param file_name: the name of the file (possibly compressed, see Decompression).
+        :param key_column: the name of the (integer) column identifying each list.
+        :param chunk_size: (OPTIONAL) the (approximate) number of lines parsed at once. By default, one million.
+        :param delimiter: (OPTIONAL) the delimiter of the fields. By default, a comma.
+        :param select: (OPTIONAL) a function receiving the keys of a chunk, and returning a boolean array, true for the
+                       lists to keep. The rest of lists are dropped as soon as their chunk is parsed. By default, all
+                       the lists are kept.
+        :param monitor: (OPTIONAL) receives the number of lists read after each chunk. By default, none.
+        :return: a tuple containing a) the key of each list, b) the offsets of the lists (list i lies between
+                 positions offsets[i] and offsets[i+1] of the next array) and c) the flat array of integers.
+        """
+        keys = []
+        offsets = [np.zeros(1, dtype=np.int64)]
+        values = []
+        num_values = 0
+        with Decompression.open_text(file_name) as file:
+            if monitor is not None:
+                monitor.start_file(file_name, file)
+            for chunk_keys, chunk_offsets, chunk_values in BracketedListReader.read_chunks(file, key_column,
+                                                                                           chunk_size, delimiter):
+                if monitor is not None:
+                    monitor.update(len(chunk_keys))
+                if select is not None:
+                    chunk_keys, chunk_offsets, chunk_values = BracketedListReader.select_lists(
+                        chunk_keys, chunk_offsets, chunk_values, select(chunk_keys))
+                keys.append(chunk_keys)
+                offsets.append(chunk_offsets[1:] + num_values)
+                values.append(chunk_values)
+                num_values += len(chunk_values)
+            if monitor is not None:
+                monitor.end_file()
+
+        return (np.concatenate(keys) if keys else np.zeros(0, dtype=np.int64), np.concatenate(offsets),
+                np.concatenate(values) if values else np.zeros(0, dtype=np.int64))
@@ -0,0 +1,87 @@
+"""
+Reader for CSV files, which parses the selected columns into typed NumPy arrays, block by block.
+"""
+
+__version__ = '0.1'
+__author__ = 'Javier Sanz-Cruzado, Pablo Castells'
+__email__ = 'javier.sanz-cruzado@uam.es, pablo.castells@uam.es'
+__copyright__ = """
+ Copyright (C) 2021 Information Retrieval Group at Universidad Autónoma
+ de Madrid, http://ir.ii.uam.es.
+
+ This Source Code Form is subject to the terms of the Mozilla Public
+ License, v. 2.0. If a copy of the MPL was not distributed with this
+ file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+__license__ = 'Mozilla Public License v. 2.0'
+
+import itertools
+import typing
+
+import numpy as np
+
+from src.main.python.inputoutput.decompression import Decompression
+from src.main.python.utils.progress import ProgressMonitor
+
+
+class ColumnarCsvReader:
+    """
+    Reads numerical columns of a CSV file (with header) in chunks. Each chunk is a dictionary containing one NumPy array
+    per selected column. The text of each chunk is parsed at once by NumPy, instead of building a record per line.
+    """
+
+    DEFAULT_CHUNK_SIZE = 1000000
+
+    @staticmethod
+    def read_chunks(file: typing.TextIO,
+                    columns: typing.Dict[str, typing.Any],
+                    chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    delimiter: str = ',') -> typing.Iterator[typing.Dict[str, np.ndarray]]:
+        """
+        Reads the columns of an open CSV file, chunk by chunk.
+        :param file: the file, positioned at its header line.
+        :param columns: the names of the columns to read, and the NumPy type of each one. Only numerical columns are
+                        supported. The rest of the columns of the file are skipped (they might be empty).
+        :param chunk_size: (OPTIONAL) the maximum number of lines of each chunk. By default, one million.
+        :param delimiter: (OPTIONAL) the delimiter of the fields. By default, a comma.
+        :return: an iterator over the chunks. Each chunk contains an array for each of the selected columns.
+        """
+        header = file.readline().rstrip('\r\n').split(delimiter)
+        positions = [header.index(name) for name in columns.keys()]
+
+        # Integers are parsed as such (timestamps in milliseconds do not fit in smaller types, or in floats exactly).
+        integer = all(np.issubdtype(np.dtype(dtype), np.integer) for dtype in columns.values())
+        parse_type = np.int64 if integer else np.float64
+
+        while True:
+            lines = list(itertools.islice(file, chunk_size))
+            if not lines:
+                return
+            values = np.loadtxt(lines, delimiter=delimiter, usecols=positions, dtype=parse_type, ndmin=2)
+            yield {name: values[:, pos].astype(dtype) for pos, (name, dtype) in enumerate(columns.items())}
+
+    @staticmethod
+    def read_file(file_name: str,
+                  columns: typing.Dict[str, typing.Any],
+                  chunk_size: int = DEFAULT_CHUNK_SIZE,
+                  delimiter: str = ',',
+                  monitor: ProgressMonitor = None) -> typing.Iterator[typing.Dict[str, np.ndarray]]:
+        """
+        Reads the columns of a CSV file, chunk by chunk.
+        :param file_name: the name of the file (possibly compressed, see Decompression).
+        :param columns: the names of the columns to read, and the NumPy type of each one.
+        :param chunk_size: (OPTIONAL) the maximum number of lines of each chunk. By default, one million.
+        :param delimiter: (OPTIONAL) the delimiter of the fields. By default, a comma.
+        :param monitor: (OPTIONAL) receives the number of lines read after each chunk. By default, none.
+        :return: an iterator over the chunks. Each chunk contains an array for each of the selected columns.
+        """
+        with Decompression.open_text(file_name) as file:
+            if monitor is None:
+                yield from ColumnarCsvReader.read_chunks(file, columns, chunk_size, delimiter)
+                return
+
+            monitor.start_file(file_name, file)
+            for chunk in ColumnarCsvReader.read_chunks(file, columns, chunk_size, delimiter):
+                monitor.update(len(next(iter(chunk.values()))))
+                yield chunk
+            monitor.end_file()
@@ -0,0 +1,93 @@
+"""
+Persistent cache of fully loaded datasets.
+"""
+
+__version__ = '0.1'
+__author__ = 'Javier Sanz-Cruzado, Pablo Castells'
+__email__ = 'javier.sanz-cruzado@uam.es, pablo.castells@uam.es'
+__copyright__ = """
+ Copyright (C) 2021 Information Retrieval Group at Universidad Autónoma
+ de Madrid, http://ir.ii.uam.es.
+
+ This Source Code Form is subject to the terms of the Mozilla Public
+ License, v. 2.0. If a copy of the MPL was not distributed with this
+ file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+__license__ = 'Mozilla Public License v. 2.0'
+
+import hashlib
+import json
+import os
+import typing
+
+from src.main.python.inputoutput.array_storage import ArrayStorage
+
+
+class DatasetCache:
+    """
+    Stores fully loaded datasets in a folder, as .npz files (see ArrayStorage), so later runs over the same input
+    files do not need to parse them again. Each file is identified by a key combining the name, size and modification
+    time (or, optionally, the contents) of the input files, the name of the dataset and the loading parameters that
+    change its contents. Datasets must provide a to_arrays method and a static from_arrays method.
+    """
+
+    @staticmethod
+    def key(dataset_name: str,
+            files: typing.List[str],
+            params: typing.Dict[str, typing.Any],
+            hash_contents: bool = False) -> str:
+        """
+        Computes the key identifying a dataset in the cache.
+        :param dataset_name: the name of the dataset.
+        :param files: the input files of the dataset.
+        :param params: the loading parameters that change the contents of the dataset.
+        :param hash_contents: (OPTIONAL) true if the contents of the files are hashed; false if only their sizes and
+                              modification times are considered. By default, false.
+        :return: the key.
+        """
+        fingerprints = []
+        for file_name in files:
+            stat = os.stat(file_name)
+            fingerprint = [os.path.abspath(file_name), stat.st_size]
+            fingerprint.append(DatasetCache.hash_file(file_name) if hash_contents else stat.st_mtime_ns)
+            fingerprints.append(fingerprint)
+
+        description = json.dumps([ArrayStorage.FORMAT_VERSION, dataset_name, fingerprints, params], sort_keys=True)
+        return dataset_name + "-" + hashlib.sha1(description.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def hash_file(file_name: str,
+                  block_size: int = 1 << 20) -> str:
+        """
+        Hashes the contents of a file.
+        :param file_name: the name of the file.
+        :param block_size: (OPTIONAL) the number of bytes read at once. By default, 1 MB.
+        :return: the SHA-1 digest of the file, in hexadecimal.
+        """
+        digest = hashlib.sha1()
+        with open(file_name, mode='rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def get_or_load(cache_folder: str,
+                    key: str,
+                    from_arrays: typing.Callable[[typing.Dict], typing.Any],
+                    loader: typing.Callable[[], typing.Any]):
+        """
+        Obtains a dataset from the cache or, if it is not stored, loads it and stores it.
+        :param cache_folder: the folder containing the stored datasets. It is created if it does not exist.
+        :param key: the key of the dataset (see key).
+        :param from_arrays: function rebuilding the dataset from its stored arrays.
+        :param loader: function loading the dataset from the input files.
+        :return: the dataset.
+        """
+        file_name = os.path.join(cache_folder, key + ".npz")
+        if os.path.isfile(file_name):
+            return from_arrays(ArrayStorage.load_npz(file_name))
+
+        dataset = loader()
+        os.makedirs(cache_folder, exist_ok=True)
+        ArrayStorage.save_npz(file_name, dataset.to_arrays())
+        return dataset
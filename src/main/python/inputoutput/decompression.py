@@ -0,0 +1,167 @@
+"""
+Transparent reading of compressed (gzip, bz2, xz) input files.
+"""
+
+__version__ = '0.1'
+__author__ = 'Javier Sanz-Cruzado, Pablo Castells'
+__email__ = 'javier.sanz-cruzado@uam.es, pablo.castells@uam.es'
+__copyright__ = """
+ Copyright (C) 2021 Information Retrieval Group at Universidad Autónoma
+ de Madrid, http://ir.ii.uam.es.
+
+ This Source Code Form is subject to the terms of the Mozilla Public
+ License, v. 2.0. If a copy of the MPL was not distributed with this
+ file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+__license__ = 'Mozilla Public License v. 2.0'
+
+import bz2
+import gzip
+import io
+import lzma
+import queue
+import threading
+import typing
+
+
+class BackgroundDecompressor(io.RawIOBase):
+    """
+    Binary stream over the decompressed contents of a file. The file is decompressed by a background thread, which
+    feeds blocks of data through a bounded queue, so decompression overlaps with the parsing of the previous blocks
+    (the decompression libraries release the interpreter lock while they work), and at most a few blocks are kept in
+    memory.
+    """
+
+    def __init__(self,
+                 file_name: str,
+                 opener: typing.Callable,
+                 block_size: int = 1 << 20,
+                 queue_size: int = 8):
+        """
+        Starts decompressing a file.
+        :param file_name: the name of the compressed file.
+        :param opener: the function opening the compressed file (gzip.open, bz2.open or lzma.open).
+        :param block_size: (OPTIONAL) the number of decompressed bytes of each block. By default, 1 MB.
+        :param queue_size: (OPTIONAL) the maximum number of decompressed blocks waiting to be read. By default, 8.
+        """
+        super().__init__()
+        self.blocks = queue.Queue(maxsize=queue_size)
+        self.stopped = threading.Event()
+        self.current = memoryview(b'')
+        self.finished = False
+        self.position = 0
+
+        self.thread = threading.Thread(target=self.decompress, args=(file_name, opener, block_size), daemon=True)
+        self.thread.start()
+
+    def decompress(self,
+                   file_name: str,
+                   opener: typing.Callable,
+                   block_size: int):
+        """
+        Decompresses the file, block by block (run by the background thread). An empty block marks the end of the
+        file. If the file cannot be decompressed, the error is passed to the reader.
+        :param file_name: the name of the compressed file.
+        :param opener: the function opening the compressed file.
+        :param block_size: the number of decompressed bytes of each block.
+        """
+        try:
+            with opener(file_name, 'rb') as f:
+                while not self.stopped.is_set():
+                    block = f.read(block_size)
+                    self.put(block)
+                    if not block:
+                        return
+        except Exception as error:
+            self.put(error)
+
+    def put(self, item):
+        """
+        Adds a block to the queue, waiting while the queue is full (unless the stream is closed).
+        :param item: the block (or the error found while decompressing).
+        """
+        while not self.stopped.is_set():
+            try:
+                self.blocks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        """
+        Copies decompressed data into a buffer, waiting for the background thread if needed.
+        :param buffer: the buffer.
+        :return: the number of copied bytes (0 at the end of the file).
+        """
+        if len(self.current) == 0:
+            if self.finished:
+                return 0
+            block = self.blocks.get()
+            if isinstance(block, Exception):
+                raise block
+            if not block:
+                self.finished = True
+                return 0
+            self.current = memoryview(block)
+
+        size = min(len(buffer), len(self.current))
+        buffer[:size] = self.current[:size]
+        self.current = self.current[size:]
+        self.position += size
+        return size
+
+    def tell(self) -> int:
+        """
+        Obtains the position in the decompressed contents.
+        :return: the number of decompressed bytes read so far.
+        """
+        return self.position
+
+    def close(self):
+        """
+        Closes the stream, and stops the background thread.
+        """
+        self.stopped.set()
+        super().close()
+
+
+class Decompression:
+    """
+    Opens input files as text, decompressing them on the fly when they are compressed with gzip, bz2 or xz. The
+    compression format is detected from the first bytes of the file, not from its name.
+    """
+
+    # Initial bytes of the files of each compression format, and the function opening them.
+    FORMATS = ((b'\x1f\x8b', gzip.open),
+               (b'BZh', bz2.open),
+               (b'\xfd7zXZ\x00', lzma.open))
+
+    @staticmethod
+    def get_opener(file_name: str) -> typing.Optional[typing.Callable]:
+        """
+        Detects whether a file is compressed.
+        :param file_name: the name of the file.
+        :return: the function opening the compressed file, or None if the file is not compressed.
+        """
+        with open(file_name, mode='rb') as f:
+            magic = f.read(6)
+        for prefix, opener in Decompression.FORMATS:
+            if magic.startswith(prefix):
+                return opener
+        return None
+
+    @staticmethod
+    def open_text(file_name: str) -> typing.TextIO:
+        """
+        Opens a (possibly compressed) file for reading text. Compressed files are decompressed by a background thread
+        (see BackgroundDecompressor).
+        :param file_name: the name of the file.
+        :return: the text stream.
+        """
+        opener = Decompression.get_opener(file_name)
+        if opener is None:
+            return open(file_name, mode='r')
+        return io.TextIOWrapper(io.BufferedReader(BackgroundDecompressor(file_name, opener)))
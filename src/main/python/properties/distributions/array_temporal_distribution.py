@@ -0,0 +1,282 @@
+"""
+Array-backed (immutable) representation of the temporal distributions of a given dataset.
+"""
+
+__version__ = '0.1'
+__author__ = 'Javier Sanz-Cruzado, Pablo Castells'
+__email__ = 'javier.sanz-cruzado@uam.es, pablo.castells@uam.es'
+__copyright__ = """
+ Copyright (C) 2021 Information Retrieval Group at Universidad Autónoma
+ de Madrid, http://ir.ii.uam.es.
+
+ This Source Code Form is subject to the terms of the Mozilla Public
+ License, v. 2.0. If a copy of the MPL was not distributed with this
+ file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+__license__ = 'Mozilla Public License v. 2.0'
+
+import math
+
+import typing
+
+import numpy as np
+
+from src.main.python.data import IdIndex
+from src.main.python.data.filters import Filter
+from src.main.python.properties.distributions.temporal_distribution_view import TemporalDistributionView
+from src.main.python.utils.memory import MemoryUsage
+
+
+class ArrayTemporalDistribution:
+    """
+    Immutable version of the temporal distribution. The time points are stored as three parallel arrays (dense user
+    index, dense item index and timestamp), sorted by ascending timestamp. Time points sharing the same timestamp keep
+    the order in which they were added.
+    """
+
+    def __init__(self,
+                 user_index: IdIndex,
+                 item_index: IdIndex,
+                 users: np.ndarray,
+                 items: np.ndarray,
+                 timestamps: np.ndarray):
+        """
+        Initializes the temporal distribution.
+        :param user_index: the index of the users.
+        :param item_index: the index of the items.
+        :param users: the dense user index of each time point (in order of arrival).
+        :param items: the dense item index of each time point (in order of arrival).
+        :param timestamps: the timestamp of each time point (in order of arrival).
+        """
+        self.user_index = user_index
+        self.item_index = item_index
+
+        timestamps = np.asarray(timestamps)
+        order = np.argsort(timestamps, kind='stable')
+        self.users = np.asarray(users, dtype=np.int64)[order]
+        self.items = np.asarray(items, dtype=np.int64)[order]
+        self.timestamps = timestamps[order]
+        for array in (self.users, self.items, self.timestamps):
+            array.setflags(write=False)
+
+        self.min_timestamp = self.timestamps[0].item() if len(self.timestamps) > 0 else math.inf
+        self.max_timestamp = self.timestamps[-1].item() if len(self.timestamps) > 0 else -1
+
+    @staticmethod
+    def from_temporal_distribution(distribution,
+                                   user_index: IdIndex = None,
+                                   item_index: IdIndex = None):
+        """
+        Builds the array-backed version of a temporal distribution.
+        :param distribution: the original temporal distribution.
+        :param user_index: (OPTIONAL) the index of the users, shared with other structures of the dataset.
+                           By default, a new index is created.
+        :param item_index: (OPTIONAL) the index of the items, shared with other structures of the dataset.
+                           By default, a new index is created.
+        :return: the array-backed temporal distribution.
+        """
+        user_index = IdIndex() if user_index is None else user_index
+        item_index = IdIndex() if item_index is None else item_index
+        if len(distribution.distribution) == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return ArrayTemporalDistribution(user_index, item_index, empty, empty, empty)
+
+        users, items, timestamps = zip(*distribution.distribution)
+        return ArrayTemporalDistribution(user_index, item_index, user_index.add_all(users), item_index.add_all(items),
+                                         np.array(timestamps))
+
+    @staticmethod
+    def from_arrays(user_index: IdIndex,
+                    item_index: IdIndex,
+                    arrays: typing.Dict[str, np.ndarray]):
+        """
+        Rebuilds an array-backed temporal distribution (or a view of it) from the arrays returned by to_arrays. The
+        arrays are used as they are (they might be memory-mapped), without copying them.
+        :param user_index: the index of the users.
+        :param item_index: the index of the items.
+        :param arrays: the arrays of the distribution.
+        :return: the array-backed temporal distribution or, if the arrays were obtained from a view, the view.
+        """
+        distribution = ArrayTemporalDistribution.__new__(ArrayTemporalDistribution)
+        distribution.user_index = user_index
+        distribution.item_index = item_index
+        distribution.users = arrays["users"]
+        distribution.items = arrays["items"]
+        distribution.timestamps = arrays["timestamps"]
+        for array in (distribution.users, distribution.items, distribution.timestamps):
+            array.setflags(write=False)
+
+        distribution.min_timestamp = distribution.timestamps[0].item() if len(distribution.timestamps) > 0 else math.inf
+        distribution.max_timestamp = distribution.timestamps[-1].item() if len(distribution.timestamps) > 0 else -1
+
+        if "view_mask" in arrays:
+            return TemporalDistributionView(distribution, arrays["view_mask"])
+        return distribution
+
+    def extend(self,
+               users: np.ndarray,
+               items: np.ndarray,
+               timestamps: np.ndarray):
+        """
+        Builds a new temporal distribution containing the time points of this one, plus some new ones. Time points
+        sharing the same timestamp keep the new ones after the old ones.
+        :param users: the dense user index of each new time point.
+        :param items: the dense item index of each new time point.
+        :param timestamps: the timestamp of each new time point.
+        :return: the new array-backed temporal distribution.
+        """
+        return ArrayTemporalDistribution(self.user_index, self.item_index, np.concatenate((self.users, users)),
+                                         np.concatenate((self.items, items)),
+                                         np.concatenate((self.timestamps, timestamps)))
+
+    def to_arrays(self) -> typing.Dict[str, np.ndarray]:
+        """
+        Obtains the arrays storing the distribution, so it can be saved (see from_arrays). The indexes of users and
+        items are not included.
+        :return: a dictionary containing the arrays of the distribution.
+        """
+        return {"users": self.users, "items": self.items, "timestamps": self.timestamps}
+
+    def add_timepoint(self, user_id, item_id, timestamp):
+        """
+        Frozen distributions cannot be modified.
+        :raises TypeError: always.
+        """
+        raise TypeError("An array-backed temporal distribution cannot be modified")
+
+    def get_user_distribution(self):
+        """
+        Obtains the temporal distribution for the users (a list of (user_id, timestamp) pairs, sorted by ascending
+        timestamp.
+        """
+        return list(zip(self.user_index.get_ids(self.users).tolist(), self.timestamps.tolist()))
+
+    def get_item_distribution(self):
+        """
+        Obtains the temporal distribution for the items (a list of (item_id, timestamp) pairs, sorted by ascending
+        timestamp.
+        """
+        return list(zip(self.item_index.get_ids(self.items).tolist(), self.timestamps.tolist()))
+
+    def get_timepoints(self,
+                       positions: np.ndarray):
+        """
+        Obtains some of the time points, given their positions in order of ascending timestamp.
+        :param positions: the positions of the time points.
+        :return: a list of (user_id, item_id, timestamp) triplets.
+        """
+        return list(zip(self.user_index.get_ids(self.users[positions]).tolist(),
+                        self.item_index.get_ids(self.items[positions]).tolist(),
+                        self.timestamps[positions].tolist()))
+
+    def freeze(self):
+        """
+        The distribution is already immutable.
+        :return: the distribution itself.
+        """
+        return self
+
+    def memory_report(self) -> typing.Dict[str, int]:
+        """
+        Measures the memory used by the temporal distribution.
+        :return: the number of bytes used by each of its components (see MemoryUsage.report).
+        """
+        return MemoryUsage.report(self)
+
+    def filter(self,
+               user_filter: typing.Callable[[int], bool] = None,
+               item_filter: typing.Callable[[int], bool] = None,
+               timepoint_filter: typing.Callable[[int, int, int], bool] = None
+               ):
+        """
+        Obtains a temporal distribution containing only a fraction of the time points.
+        :param user_filter: (OPTIONAL) a filter for selecting the users to keep. By default, no filter is applied.
+        :param item_filter: (OPTIONAL) a filter for selecting the items to keep. By default, no filter is applied.
+        :param timepoint_filter: (OPTIONAL) a filter for selecting the (user, item, timestamp) time points to keep
+                                 (for instance, a TimestampWindowFilter). By default, no filter is applied.
+        :returns: an array-backed temporal distribution containing the selected time points.
+        """
+        return self.select(self.filter_mask(user_filter, item_filter, timepoint_filter))
+
+    def filter_mask(self,
+                    user_filter: typing.Callable[[int], bool] = None,
+                    item_filter: typing.Callable[[int], bool] = None,
+                    timepoint_filter: typing.Callable[[int, int, int], bool] = None
+                    ) -> np.ndarray:
+        """
+        Obtains the time points passing a set of filters.
+        :param user_filter: (OPTIONAL) a filter for selecting the users to keep. By default, no filter is applied.
+        :param item_filter: (OPTIONAL) a filter for selecting the items to keep. By default, no filter is applied.
+        :param timepoint_filter: (OPTIONAL) a filter for selecting the (user, item, timestamp) time points to keep.
+                                 By default, no filter is applied.
+        :return: a boolean array, True for the time points passing the filters.
+        """
+        mask = np.ones(len(self.timestamps), dtype=bool)
+        if user_filter is not None:
+            mask &= Filter.to_mask(user_filter, self.user_index.get_ids(self.users))
+        if item_filter is not None:
+            mask &= Filter.to_mask(item_filter, self.item_index.get_ids(self.items))
+        if timepoint_filter is not None:
+            mask &= Filter.to_mask(timepoint_filter, self.user_index.get_ids(self.users),
+                                   self.item_index.get_ids(self.items), self.timestamps)
+        return mask
+
+    def select(self,
+               mask: np.ndarray):
+        """
+        Builds a new temporal distribution containing a subset of the time points.
+        :param mask: boolean array indicating which time points to keep.
+        :return: the new array-backed temporal distribution.
+        """
+        return ArrayTemporalDistribution(self.user_index, self.item_index, self.users[mask], self.items[mask],
+                                         self.timestamps[mask])
+
+    def view(self,
+             user_filter: typing.Callable[[int], bool] = None,
+             item_filter: typing.Callable[[int], bool] = None,
+             timepoint_filter: typing.Callable[[int, int, int], bool] = None):
+        """
+        Obtains a view of the temporal distribution restricted to the time points passing a set of filters. Unlike
+        filter, the time points are not copied.
+        :param user_filter: (OPTIONAL) a filter for selecting the users to keep. By default, no filter is applied.
+        :param item_filter: (OPTIONAL) a filter for selecting the items to keep. By default, no filter is applied.
+        :param timepoint_filter: (OPTIONAL) a filter for selecting the (user, item, timestamp) time points to keep.
+                                 By default, no filter is applied.
+        :return: the view of the temporal distribution.
+        """
+        return TemporalDistributionView(self, self.filter_mask(user_filter, item_filter, timepoint_filter))
+
+    def index_mask(self,
+                   user_mask: np.ndarray = None,
+                   item_mask: np.ndarray = None) -> np.ndarray:
+        """
+        Obtains the time points of the users and items selected by a pair of boolean masks.
+        :param user_mask: (OPTIONAL) boolean array, indexed by dense index, indicating which users to keep. It might be
+                          shorter than the index: the users beyond its end are not kept. By default, all the users are
+                          kept.
+        :param item_mask: (OPTIONAL) boolean array, indexed by dense index, indicating which items to keep. It might be
+                          shorter than the index: the items beyond its end are not kept. By default, all the items are
+                          kept.
+        :return: a boolean array, True for the time points of the selected users and items.
+        """
+        mask = np.ones(len(self.timestamps), dtype=bool)
+        for selected, indices in ((user_mask, self.users), (item_mask, self.items)):
+            if selected is not None:
+                padded = np.zeros(max(len(selected), int(indices.max(initial=-1)) + 1), dtype=bool)
+                padded[:len(selected)] = selected
+                mask &= padded[indices]
+        return mask
+
+    def view_masks(self,
+                   user_mask: np.ndarray = None,
+                   item_mask: np.ndarray = None):
+        """
+        Obtains a view of the temporal distribution restricted to the time points of the users and items selected by
+        a pair of boolean masks. Unlike view, the identifiers of the users and items are not looked up.
+        :param user_mask: (OPTIONAL) boolean array, indexed by dense index, indicating which users to keep. By
+                          default, all the users are kept.
+        :param item_mask: (OPTIONAL) boolean array, indexed by dense index, indicating which items to keep. By
+                          default, all the items are kept.
+        :return: the view of the temporal distribution.
+        """
+        return TemporalDistributionView(self, self.index_mask(user_mask, item_mask))
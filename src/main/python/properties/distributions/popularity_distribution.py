@@ -15,6 +15,8 @@ __copyright__ = """
 """
 __license__ = 'Mozilla Public License v. 2.0'
 
+import numpy as np
+
 from src.main.python.data import RatingMatrix
 
 
@@ -40,12 +42,8 @@ class PopularityDistribution:
         :param relevant: (OPTIONAL) True if we want to limit the distribution to relevant ratings, False otherwise.
         :return: the popularity distribution for the users.
         """
-        distribution = list(map(
-            lambda user_id: self.rating_matrix.get_num_user_ratings(user_id, relevant),
-            self.rating_matrix.get_users())
-        )
-        distribution.sort(reverse=True)
-        return distribution
+        distribution = np.sort(self.rating_matrix.get_user_degrees(relevant))[::-1]
+        return distribution.tolist()
 
     def get_item_distribution(self,
                               relevant: bool = False):
@@ -55,9 +53,5 @@ class PopularityDistribution:
         :param relevant: (OPTIONAL) True if we want to limit the distribution to relevant ratings, False otherwise.
         :return: the popularity distribution for the items.
         """
-        distribution = list(map(
-            lambda item_id: self.rating_matrix.get_num_item_ratings(item_id, relevant),
-            self.rating_matrix.get_items())
-        )
-        distribution.sort(reverse=True)
-        return distribution
+        distribution = np.sort(self.rating_matrix.get_item_degrees(relevant))[::-1]
+        return distribution.tolist()
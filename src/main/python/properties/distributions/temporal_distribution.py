@@ -19,7 +19,13 @@ import math
 
 import typing
 
-from src.main.python.data.filters import UserFilter, ItemFilter
+import numpy as np
+
+from src.main.python.data import IdIndex
+from src.main.python.data.filters import Filter
+from src.main.python.properties.distributions.array_temporal_distribution import ArrayTemporalDistribution
+from src.main.python.properties.distributions.temporal_distribution_view import TemporalDistributionView
+from src.main.python.utils.memory import MemoryUsage
 
 
 class TemporalDistribution:
@@ -52,15 +58,30 @@ class TemporalDistribution:
         if timestamp > self.max_timestamp:
             self.max_timestamp = timestamp
 
+    def add_timepoints(self, user_ids, item_ids, timestamps):
+        """
+        Adds a list of time points to the series.
+        :param user_ids: the user of each time point.
+        :param item_ids: the item of each time point.
+        :param timestamps: the moment of time when each rating is added.
+        """
+        if len(timestamps) == 0:
+            return
+        timestamps = np.asarray(timestamps)
+        self.distribution.extend(zip(np.asarray(user_ids).tolist(), np.asarray(item_ids).tolist(),
+                                     timestamps.tolist()))
+        self.is_sorted = False
+
+        self.min_timestamp = min(self.min_timestamp, timestamps.min().item())
+        self.max_timestamp = max(self.max_timestamp, timestamps.max().item())
+
     def get_user_distribution(self):
         """
         Obtains the temporal distribution for the users (a list of (user_id, timestamp) pairs, sorted by ascending
         timestamp.
         """
 
-        if not self.is_sorted:
-            self.distribution.sort(key=lambda x: x[2])
-            self.is_sorted = True
+        self.sort()
         return [(x[0], x[2]) for x in self.distribution]
 
     def get_item_distribution(self):
@@ -69,31 +90,117 @@ class TemporalDistribution:
         timestamp.
         """
 
+        self.sort()
+        return [(x[1], x[2]) for x in self.distribution]
+
+    def sort(self):
+        """
+        Sorts the time points by ascending timestamp (if they were not already sorted).
+        """
         if not self.is_sorted:
             self.distribution.sort(key=lambda x: x[2])
             self.is_sorted = True
-        return [(x[1], x[2]) for x in self.distribution]
+
+    def get_timepoints(self,
+                       positions: np.ndarray):
+        """
+        Obtains some of the time points, given their positions in order of ascending timestamp.
+        :param positions: the positions of the time points.
+        :return: a list of (user_id, item_id, timestamp) triplets.
+        """
+        self.sort()
+        return [self.distribution[pos] for pos in np.asarray(positions).tolist()]
+
+    def freeze(self,
+               user_index: IdIndex = None,
+               item_index: IdIndex = None):
+        """
+        Obtains an immutable, array-backed copy of the temporal distribution. It is meant to be called once all the
+        time points have been added.
+        :param user_index: (OPTIONAL) the index of the users, shared with other structures of the dataset.
+                           By default, a new index is created.
+        :param item_index: (OPTIONAL) the index of the items, shared with other structures of the dataset.
+                           By default, a new index is created.
+        :return: the array-backed temporal distribution.
+        """
+        return ArrayTemporalDistribution.from_temporal_distribution(self, user_index, item_index)
+
+    def memory_report(self) -> typing.Dict[str, int]:
+        """
+        Measures the memory used by the temporal distribution.
+        :return: the number of bytes used by each of its components (see MemoryUsage.report).
+        """
+        return MemoryUsage.report(self)
 
     def filter(self,
                user_filter: typing.Callable[[int], bool] = None,
                item_filter: typing.Callable[[int], bool] = None,
+               timepoint_filter: typing.Callable[[int, int, int], bool] = None
                ):
         """
-        Obtains a proxy rating matrix containing only a fraction of the ratings.
+        Obtains a temporal distribution containing only a fraction of the time points. Declarative filters (see
+        filters.Filter) are applied as boolean masks over the whole series.
         :param user_filter: (OPTIONAL) a filter for selecting the users to keep. By default, no filter is applied.
         :param item_filter: (OPTIONAL) a filter for selecting the items to keep. By default, no filter is applied.
-        :returns: a rating matrix containing the selected ratings.
+        :param timepoint_filter: (OPTIONAL) a filter for selecting the (user, item, timestamp) time points to keep
+                                 (for instance, a TimestampWindowFilter). By default, no filter is applied.
+        :returns: a temporal distribution containing the selected time points.
         """
+        return self.select(self.filter_mask(user_filter, item_filter, timepoint_filter))
 
-        if user_filter is None:
-            user_filter = UserFilter.default()
-        if item_filter is None:
-            item_filter = ItemFilter.default()
-
+    def filter_mask(self,
+                    user_filter: typing.Callable[[int], bool] = None,
+                    item_filter: typing.Callable[[int], bool] = None,
+                    timepoint_filter: typing.Callable[[int, int, int], bool] = None
+                    ) -> np.ndarray:
+        """
+        Obtains the time points passing a set of filters.
+        :param user_filter: (OPTIONAL) a filter for selecting the users to keep. By default, no filter is applied.
+        :param item_filter: (OPTIONAL) a filter for selecting the items to keep. By default, no filter is applied.
+        :param timepoint_filter: (OPTIONAL) a filter for selecting the (user, item, timestamp) time points to keep.
+                                 By default, no filter is applied.
+        :return: a boolean array, True for the time points passing the filters.
+        """
+        mask = np.ones(len(self.distribution), dtype=bool)
+        if len(self.distribution) == 0:
+            return mask
+
+        users, items, timestamps = (np.asarray(column) for column in zip(*self.distribution))
+        if user_filter is not None:
+            mask &= Filter.to_mask(user_filter, users)
+        if item_filter is not None:
+            mask &= Filter.to_mask(item_filter, items)
+        if timepoint_filter is not None:
+            mask &= Filter.to_mask(timepoint_filter, users, items, timestamps)
+        return mask
+
+    def select(self,
+               mask: np.ndarray):
+        """
+        Builds a new temporal distribution containing a subset of the time points.
+        :param mask: boolean array indicating which time points to keep.
+        :return: the new temporal distribution.
+        """
         aux_matrix = TemporalDistribution()
+        for pos in np.flatnonzero(mask).tolist():
+            user, item, ts = self.distribution[pos]
+            aux_matrix.add_timepoint(user, item, ts)
+        return aux_matrix
 
-        for user, item, ts in self.distribution:
-            if user_filter(user) and item_filter(item):
-                aux_matrix.add_timepoint(user, item, ts)
+    def view(self,
+             user_filter: typing.Callable[[int], bool] = None,
+             item_filter: typing.Callable[[int], bool] = None,
+             timepoint_filter: typing.Callable[[int, int, int], bool] = None):
+        """
+        Obtains a view of the temporal distribution restricted to the time points passing a set of filters. Unlike
+        filter, the time points are not copied. The view is only valid while no time points are added to this
+        distribution.
+        :param user_filter: (OPTIONAL) a filter for selecting the users to keep. By default, no filter is applied.
+        :param item_filter: (OPTIONAL) a filter for selecting the items to keep. By default, no filter is applied.
+        :param timepoint_filter: (OPTIONAL) a filter for selecting the (user, item, timestamp) time points to keep.
+                                 By default, no filter is applied.
+        :return: the view of the temporal distribution.
+        """
+        self.sort()
+        return TemporalDistributionView(self, self.filter_mask(user_filter, item_filter, timepoint_filter))
 
-        return aux_matrix
@@ -0,0 +1,150 @@
+"""
+Filtered view of a temporal distribution, which does not copy the time points.
+"""
+
+__version__ = '0.1'
+__author__ = 'Javier Sanz-Cruzado, Pablo Castells'
+__email__ = 'javier.sanz-cruzado@uam.es, pablo.castells@uam.es'
+__copyright__ = """
+ Copyright (C) 2021 Information Retrieval Group at Universidad Autónoma
+ de Madrid, http://ir.ii.uam.es.
+
+ This Source Code Form is subject to the terms of the Mozilla Public
+ License, v. 2.0. If a copy of the MPL was not distributed with this
+ file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+__license__ = 'Mozilla Public License v. 2.0'
+
+import math
+
+import typing
+
+import numpy as np
+
+from src.main.python.utils.memory import MemoryUsage
+
+
+class TemporalDistributionView:
+    """
+    Read-only view of a temporal distribution (either a TemporalDistribution or an ArrayTemporalDistribution),
+    restricted to a subset of its time points. It only stores a mask over the (sorted) time points of the parent.
+    """
+
+    def __init__(self,
+                 parent,
+                 mask: np.ndarray):
+        """
+        Initializes the view.
+        :param parent: the temporal distribution (with its time points already sorted).
+        :param mask: boolean array indicating which time points of the parent are visible.
+        """
+        self.parent = parent
+        self.mask = mask
+        self.positions = np.flatnonzero(mask)
+
+        if len(self.positions) > 0:
+            self.min_timestamp = parent.get_timepoints(self.positions[:1])[0][2]
+            self.max_timestamp = parent.get_timepoints(self.positions[-1:])[0][2]
+        else:
+            self.min_timestamp = math.inf
+            self.max_timestamp = -1
+
+    def get_user_distribution(self):
+        """
+        Obtains the temporal distribution for the users (a list of (user_id, timestamp) pairs, sorted by ascending
+        timestamp.
+        """
+        return [(user, ts) for user, item, ts in self.parent.get_timepoints(self.positions)]
+
+    def get_item_distribution(self):
+        """
+        Obtains the temporal distribution for the items (a list of (item_id, timestamp) pairs, sorted by ascending
+        timestamp.
+        """
+        return [(item, ts) for user, item, ts in self.parent.get_timepoints(self.positions)]
+
+    def view(self,
+             user_filter: typing.Callable[[int], bool] = None,
+             item_filter: typing.Callable[[int], bool] = None,
+             timepoint_filter: typing.Callable[[int, int, int], bool] = None):
+        """
+        Obtains a narrower view, restricted to the visible time points passing a set of filters.
+        :param user_filter: (OPTIONAL) a filter for selecting the users to keep. By default, no filter is applied.
+        :param item_filter: (OPTIONAL) a filter for selecting the items to keep. By default, no filter is applied.
+        :param timepoint_filter: (OPTIONAL) a filter for selecting the (user, item, timestamp) time points to keep.
+                                 By default, no filter is applied.
+        :return: the view of the parent distribution.
+        """
+        mask = self.mask & self.parent.filter_mask(user_filter, item_filter, timepoint_filter)
+        return TemporalDistributionView(self.parent, mask)
+
+    def view_masks(self,
+                   user_mask: np.ndarray = None,
+                   item_mask: np.ndarray = None):
+        """
+        Obtains a narrower view, restricted to the visible time points of the users and items selected by a pair of
+        boolean masks. Only available when the parent is an ArrayTemporalDistribution (see index_mask).
+        :param user_mask: (OPTIONAL) boolean array, indexed by dense index, indicating which users to keep. By
+                          default, all the users are kept.
+        :param item_mask: (OPTIONAL) boolean array, indexed by dense index, indicating which items to keep. By
+                          default, all the items are kept.
+        :return: the view of the parent distribution.
+        """
+        return TemporalDistributionView(self.parent, self.mask & self.parent.index_mask(user_mask, item_mask))
+
+    def get_timepoints(self,
+                       positions: np.ndarray):
+        """
+        Obtains some of the visible time points, given their positions (among the visible ones) in order of ascending
+        timestamp.
+        :param positions: the positions of the time points.
+        :return: a list of (user_id, item_id, timestamp) triplets.
+        """
+        return self.parent.get_timepoints(self.positions[positions])
+
+    def freeze(self):
+        """
+        Views are already immutable.
+        :return: the view itself.
+        """
+        return self
+
+    def to_arrays(self) -> typing.Dict[str, np.ndarray]:
+        """
+        Obtains the arrays storing the view (those of the parent distribution, which must be an
+        ArrayTemporalDistribution, and the mask of the view), so it can be saved. The view is rebuilt by
+        ArrayTemporalDistribution.from_arrays.
+        :return: a dictionary containing the arrays.
+        """
+        arrays = self.parent.to_arrays()
+        arrays.update(view_mask=self.mask)
+        return arrays
+
+    def memory_report(self) -> typing.Dict[str, int]:
+        """
+        Measures the memory used by the view (including its parent distribution).
+        :return: the number of bytes used by each of its components (see MemoryUsage.report).
+        """
+        return MemoryUsage.report(self)
+
+    def filter(self,
+               user_filter: typing.Callable[[int], bool] = None,
+               item_filter: typing.Callable[[int], bool] = None,
+               timepoint_filter: typing.Callable[[int, int, int], bool] = None
+               ):
+        """
+        Obtains a temporal distribution containing only a fraction of the visible time points.
+        :param user_filter: (OPTIONAL) a filter for selecting the users to keep. By default, no filter is applied.
+        :param item_filter: (OPTIONAL) a filter for selecting the items to keep. By default, no filter is applied.
+        :param timepoint_filter: (OPTIONAL) a filter for selecting the (user, item, timestamp) time points to keep.
+                                 By default, no filter is applied.
+        :returns: a temporal distribution containing the selected time points.
+        """
+        return self.parent.select(self.mask & self.parent.filter_mask(user_filter, item_filter, timepoint_filter))
+
+    def materialize(self):
+        """
+        Copies the visible time points into an independent temporal distribution.
+        :return: the temporal distribution.
+        """
+        return self.parent.select(self.mask)
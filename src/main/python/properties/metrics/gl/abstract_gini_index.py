@@ -17,7 +17,6 @@ __license__ = 'Mozilla Public License v. 2.0'
 
 from abc import abstractmethod
 
-from src.main.python.data.filters import RatingFilter, ItemFilter, UserFilter
 from src.main.python.properties.distributions.popularity_distribution import PopularityDistribution
 from .global_property import GlobalProperty
 
@@ -39,18 +38,14 @@ class AbstractGiniIndex(GlobalProperty):
         if user_filter is None and item_filter is None and rating_filter is None:
             pop = PopularityDistribution(self.rating_matrix)
             return self.compute_index(pop, relevant=relevant)
+        elif rating_filter is None and hasattr(self.rating_matrix, 'view'):
+            # Array-backed matrices do not need to copy the ratings to restrict them to some users and items.
+            aux_matrix = self.rating_matrix.view(user_filter=user_filter, item_filter=item_filter)
         else:
-            if user_filter is None:
-                user_filter = UserFilter.default
-            if item_filter is None:
-                item_filter = ItemFilter.default
-            if rating_filter is None:
-                rating_filter = RatingFilter.default
-
             aux_matrix = self.rating_matrix.filter(user_filter=user_filter, item_filter=item_filter,
                                                    rating_filter=rating_filter)
-            pop = PopularityDistribution(aux_matrix)
-            return self.compute_index(pop, relevant=relevant)
+        pop = PopularityDistribution(aux_matrix)
+        return self.compute_index(pop, relevant=relevant)
 
     @abstractmethod
     def compute_index(self,
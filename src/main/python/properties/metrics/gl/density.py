@@ -40,11 +40,11 @@ class Density(GlobalProperty):
             return float(num_ratings) / float(num_users * num_items)
         else:
             if user_filter is None:
-                user_filter = UserFilter.default
+                user_filter = UserFilter.default()
             if item_filter is None:
-                item_filter = ItemFilter.default
+                item_filter = ItemFilter.default()
             if rating_filter is None:
-                rating_filter = RatingFilter.default
+                rating_filter = RatingFilter.default()
 
         users = list(filter(user_filter, self.rating_matrix.get_users()))
         items = list(filter(item_filter, self.rating_matrix.get_items()))
@@ -20,6 +20,7 @@ import typing
 
 from src.main.python.data import Impressions, RatingMatrix
 from src.main.python.data.filters import *
+from src.main.python.properties.metrics.individual.selection import Selection
 
 
 class Impression:
@@ -53,6 +54,10 @@ class Impression:
         if user_filter is None and item_filter is None and impressions_filter is None:
             return self.impressions.num_impressions()
         # Case 2: we do apply filters, so the amount of ratings is not as easy to find:
+        selection = Selection.build(self.impressions, user_filter, item_filter, impressions_filter)
+        if selection is not None:
+            return float(selection.size())
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -80,6 +85,10 @@ class Impression:
         if user_filter is None and item_filter is None and impressions_filter is None:
             return 1.0 if self.impressions.num_impressions() > 0 else math.nan
 
+        selection = Selection.build(self.impressions, user_filter, item_filter, impressions_filter)
+        if selection is not None:
+            return 1.0 if selection.size() > 0 else math.nan
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -133,6 +142,10 @@ class Impression:
         :param impressions_filter: (OPTIONAL) filter for selecting the impressions. By default, no filter is applied.
         :return: a dictionary containing the total number of impressions of each user.
         """
+        selection = Selection.build(self.impressions, user_filter, item_filter, impressions_filter)
+        if selection is not None:
+            return selection.to_dict(selection.counts())
+
         values = dict()
         if user_filter is None:
             user_filter = UserFilter.default()
@@ -164,6 +177,10 @@ class Impression:
         :param impressions_filter: (OPTIONAL) filter for selecting the impressions. By default, no filter is applied.
         :return: a dictionary containing the average number of impressions of each user.
         """
+        selection = Selection.build(self.impressions, user_filter, item_filter, impressions_filter)
+        if selection is not None:
+            return selection.to_dict(selection.presence())
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -305,6 +322,10 @@ class Impression:
         if user_filter is None and item_filter is None and impressions_filter is None:
             return float(self.impressions.get_num_impressions()) / float(self.impressions.get_num_users())
 
+        selection = Selection.build(self.impressions, user_filter, item_filter, impressions_filter)
+        if selection is not None:
+            return float(selection.size()) / len(selection.ids)
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -334,6 +355,10 @@ class Impression:
         :return: the maximum number of impressions across the users.
         """
 
+        selection = Selection.build(self.impressions, user_filter, item_filter, impressions_filter)
+        if selection is not None:
+            return float(selection.counts().max(initial=-math.inf))
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -358,6 +383,10 @@ class Impression:
         :return: the minimum number of impressions across the users.
         """
 
+        selection = Selection.build(self.impressions, user_filter, item_filter, impressions_filter)
+        if selection is not None:
+            return float(selection.counts().min(initial=math.inf))
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -380,6 +409,10 @@ class Impression:
         :param impressions_filter: (OPTIONAL) filter for selecting the impressions. By default, no filter is applied.
         :return: a dictionary containing the total number of impressions of each item.
         """
+        selection = Selection.build(self.impressions, user_filter, item_filter, impressions_filter, by_item=True)
+        if selection is not None:
+            return selection.to_dict(selection.counts())
+
         values = dict()
         if item_filter is None:
             item_filter = ItemFilter.default()
@@ -412,6 +445,10 @@ class Impression:
         :param impressions_filter: (OPTIONAL) filter for selecting the impressions. By default, no filter is applied.
         :return: a dictionary containing the average number of impressions of each item.
         """
+        selection = Selection.build(self.impressions, user_filter, item_filter, impressions_filter, by_item=True)
+        if selection is not None:
+            return selection.to_dict(selection.presence())
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -553,6 +590,10 @@ class Impression:
         if user_filter is None and item_filter is None and impressions_filter is None:
             return float(self.impressions.get_num_impressions()) / float(self.impressions.get_num_items())
 
+        selection = Selection.build(self.impressions, user_filter, item_filter, impressions_filter, by_item=True)
+        if selection is not None:
+            return float(selection.size()) / len(selection.ids)
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -582,6 +623,10 @@ class Impression:
         :return: the maximum number of impressions across the items.
         """
 
+        selection = Selection.build(self.impressions, user_filter, item_filter, impressions_filter, by_item=True)
+        if selection is not None:
+            return float(selection.counts().max(initial=-math.inf))
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -605,6 +650,10 @@ class Impression:
         :param impressions_filter: (OPTIONAL) filter for selecting the impressions. By default, no filter is applied.
         :return: the minimum number of impressions across the items.
         """
+        selection = Selection.build(self.impressions, user_filter, item_filter, impressions_filter, by_item=True)
+        if selection is not None:
+            return float(selection.counts().min(initial=math.inf))
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
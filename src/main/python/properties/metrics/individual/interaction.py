@@ -20,6 +20,7 @@ import typing
 
 from src.main.python.data.filters import UserFilter, ItemFilter, RatingFilter
 from src.main.python.properties.metrics.individual.individual_property import IndividualProperty
+from src.main.python.properties.metrics.individual.selection import Selection
 
 
 class Interaction(IndividualProperty):
@@ -37,6 +38,10 @@ class Interaction(IndividualProperty):
         if user_filter is None and item_filter is None and rating_filter is None:
             return self.rating_matrix.get_num_ratings(relevant)
         # Case 2: we do apply filters, so the amount of ratings is not as easy to find:
+        selection = Selection.build(self.rating_matrix, user_filter, item_filter, rating_filter, relevant=relevant)
+        if selection is not None:
+            return float(selection.size())
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -62,6 +67,10 @@ class Interaction(IndividualProperty):
             else:
                 return 1.0 if self.rating_matrix.num_ratings() > 0 else math.nan
 
+        selection = Selection.build(self.rating_matrix, user_filter, item_filter, rating_filter, relevant=relevant)
+        if selection is not None:
+            return 1.0 if selection.size() > 0 else math.nan
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -104,6 +113,10 @@ class Interaction(IndividualProperty):
         """
         For each user, finds the number of ratings (in the selection) added to the system.
         """
+        selection = Selection.build(self.rating_matrix, user_filter, item_filter, rating_filter, relevant=relevant)
+        if selection is not None:
+            return selection.to_dict(selection.counts())
+
         values = dict()
         if user_filter is None:
             user_filter = UserFilter.default()
@@ -132,6 +145,10 @@ class Interaction(IndividualProperty):
         """
         For each user value of the ratings he/she introduced in the system.
         """
+        selection = Selection.build(self.rating_matrix, user_filter, item_filter, rating_filter, relevant=relevant)
+        if selection is not None:
+            return selection.to_dict(selection.presence())
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -244,6 +261,10 @@ class Interaction(IndividualProperty):
         if user_filter is None and item_filter is None and rating_filter is None:
             return float(self.rating_matrix.get_num_ratings(relevant)) / float(self.rating_matrix.get_num_users())
 
+        selection = Selection.build(self.rating_matrix, user_filter, item_filter, rating_filter, relevant=relevant)
+        if selection is not None:
+            return float(selection.size()) / len(selection.ids)
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -267,6 +288,10 @@ class Interaction(IndividualProperty):
                        rating_filter: typing.Callable[[int, int, float], bool] = None
                        ):
 
+        selection = Selection.build(self.rating_matrix, user_filter, item_filter, rating_filter, relevant=relevant)
+        if selection is not None:
+            return float(selection.counts().max(initial=-math.inf))
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -290,6 +315,10 @@ class Interaction(IndividualProperty):
                        rating_filter: typing.Callable[[int, int, float], bool] = None
                        ):
 
+        selection = Selection.build(self.rating_matrix, user_filter, item_filter, rating_filter, relevant=relevant)
+        if selection is not None:
+            return float(selection.counts().min(initial=math.inf))
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -314,6 +343,11 @@ class Interaction(IndividualProperty):
         """
         For each user, finds the number of ratings (in the selection) added to the system.
         """
+        selection = Selection.build(self.rating_matrix, user_filter, item_filter, rating_filter,
+                                    by_item=True, relevant=relevant)
+        if selection is not None:
+            return selection.to_dict(selection.counts())
+
         values = dict()
         if item_filter is None:
             item_filter = ItemFilter.default()
@@ -344,6 +378,11 @@ class Interaction(IndividualProperty):
         """
         For each user value of the ratings he/she introduced in the system.
         """
+        selection = Selection.build(self.rating_matrix, user_filter, item_filter, rating_filter,
+                                    by_item=True, relevant=relevant)
+        if selection is not None:
+            return selection.to_dict(selection.presence())
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -453,6 +492,11 @@ class Interaction(IndividualProperty):
                            rating_filter: typing.Callable[[int, int, float], bool] = None
                            ):
 
+        selection = Selection.build(self.rating_matrix, user_filter, item_filter, rating_filter,
+                                    by_item=True, relevant=relevant)
+        if selection is not None:
+            return float(selection.size()) / len(selection.ids)
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -477,6 +521,11 @@ class Interaction(IndividualProperty):
                        rating_filter: typing.Callable[[int, int, float], bool] = None
                        ):
 
+        selection = Selection.build(self.rating_matrix, user_filter, item_filter, rating_filter,
+                                    by_item=True, relevant=relevant)
+        if selection is not None:
+            return float(selection.counts().max(initial=-math.inf))
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -495,6 +544,11 @@ class Interaction(IndividualProperty):
                        rating_filter: typing.Callable[[int, int, float], bool] = None
                        ):
 
+        selection = Selection.build(self.rating_matrix, user_filter, item_filter, rating_filter,
+                                    by_item=True, relevant=relevant)
+        if selection is not None:
+            return float(selection.counts().min(initial=math.inf))
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
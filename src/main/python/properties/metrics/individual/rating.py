@@ -16,6 +16,7 @@ __copyright__ = """
 __license__ = 'Mozilla Public License v. 2.0'
 
 from src.main.python.properties.metrics.individual.individual_property import IndividualProperty
+from src.main.python.properties.metrics.individual.selection import Selection
 from src.main.python.data.filters import *
 
 import math
@@ -35,6 +36,10 @@ class Rating(IndividualProperty):
         """
         Computes the sum of the selected ratings of the matrix.
         """
+        selection = Selection.build(self.rating_matrix, user_filter, item_filter, rating_filter, relevant=relevant)
+        if selection is not None:
+            return float(selection.values.sum())
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -56,6 +61,10 @@ class Rating(IndividualProperty):
         Computes the average value of the ratings in the rating matrix.
         """
 
+        selection = Selection.build(self.rating_matrix, user_filter, item_filter, rating_filter, relevant=relevant)
+        if selection is not None:
+            return float(selection.values.sum()) / selection.size()
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -83,6 +92,10 @@ class Rating(IndividualProperty):
         """
         Computes the maximum value of the ratings of the matrix.
         """
+        selection = Selection.build(self.rating_matrix, user_filter, item_filter, rating_filter, relevant=relevant)
+        if selection is not None:
+            return float(selection.values.max())
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -104,6 +117,10 @@ class Rating(IndividualProperty):
         Computes the minimum value of the ratings of the matrix.
         """
 
+        selection = Selection.build(self.rating_matrix, user_filter, item_filter, rating_filter, relevant=relevant)
+        if selection is not None:
+            return float(selection.values.min())
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -125,6 +142,10 @@ class Rating(IndividualProperty):
         """
         For each user, finds the sum of his/her ratings in the system.
         """
+        selection = Selection.build(self.rating_matrix, user_filter, item_filter, rating_filter, relevant=relevant)
+        if selection is not None:
+            return selection.to_dict(selection.sums())
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -148,6 +169,10 @@ class Rating(IndividualProperty):
         """
         For each user, finds the average value of the ratings he/she introduced in the system.
         """
+        selection = Selection.build(self.rating_matrix, user_filter, item_filter, rating_filter, relevant=relevant)
+        if selection is not None:
+            return selection.to_dict(selection.averages())
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -172,6 +197,10 @@ class Rating(IndividualProperty):
         """
         For each user, finds the maximum value of the ratings he/she introduced in the system.
         """
+        selection = Selection.build(self.rating_matrix, user_filter, item_filter, rating_filter, relevant=relevant)
+        if selection is not None:
+            return selection.to_dict(selection.maxima())
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -198,6 +227,10 @@ class Rating(IndividualProperty):
         """
         For each user, finds the minimum value of the ratings he/she introduced in the system.
         """
+        selection = Selection.build(self.rating_matrix, user_filter, item_filter, rating_filter, relevant=relevant)
+        if selection is not None:
+            return selection.to_dict(selection.minima())
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -306,6 +339,10 @@ class Rating(IndividualProperty):
                            item_filter: typing.Callable[[typing.Any], bool] = None,
                            rating_filter: typing.Callable[[typing.Any, typing.Any, float], bool] = None
                            ):
+        selection = Selection.build(self.rating_matrix, user_filter, item_filter, rating_filter, relevant=relevant)
+        if selection is not None:
+            return float(selection.values.sum()) / len(selection.ids)
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -328,6 +365,10 @@ class Rating(IndividualProperty):
                        item_filter: typing.Callable[[typing.Any], bool] = None,
                        rating_filter: typing.Callable[[typing.Any, typing.Any, float], bool] = None
                        ):
+        selection = Selection.build(self.rating_matrix, user_filter, item_filter, rating_filter, relevant=relevant)
+        if selection is not None:
+            return float(selection.sums().max())
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -345,6 +386,10 @@ class Rating(IndividualProperty):
                        item_filter: typing.Callable[[typing.Any], bool] = None,
                        rating_filter: typing.Callable[[typing.Any, typing.Any, float], bool] = None
                        ):
+        selection = Selection.build(self.rating_matrix, user_filter, item_filter, rating_filter, relevant=relevant)
+        if selection is not None:
+            return float(selection.sums().min())
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -366,6 +411,11 @@ class Rating(IndividualProperty):
         """
         For each user, finds the sum of his/her ratings in the system.
         """
+        selection = Selection.build(self.rating_matrix, user_filter, item_filter, rating_filter,
+                                    by_item=True, relevant=relevant)
+        if selection is not None:
+            return selection.to_dict(selection.sums())
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -389,6 +439,11 @@ class Rating(IndividualProperty):
         """
         For each user, finds the average value of the ratings he/she introduced in the system.
         """
+        selection = Selection.build(self.rating_matrix, user_filter, item_filter, rating_filter,
+                                    by_item=True, relevant=relevant)
+        if selection is not None:
+            return selection.to_dict(selection.averages())
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -412,6 +467,11 @@ class Rating(IndividualProperty):
         """
         For each user, finds the maximum value of the ratings he/she introduced in the system.
         """
+        selection = Selection.build(self.rating_matrix, user_filter, item_filter, rating_filter,
+                                    by_item=True, relevant=relevant)
+        if selection is not None:
+            return selection.to_dict(selection.maxima())
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -438,6 +498,11 @@ class Rating(IndividualProperty):
         """
         For each user, finds the maximum value of the ratings he/she introduced in the system.
         """
+        selection = Selection.build(self.rating_matrix, user_filter, item_filter, rating_filter,
+                                    by_item=True, relevant=relevant)
+        if selection is not None:
+            return selection.to_dict(selection.minima())
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -548,6 +613,11 @@ class Rating(IndividualProperty):
                            item_filter: typing.Callable[[typing.Any], bool] = None,
                            rating_filter: typing.Callable[[typing.Any, typing.Any, float], bool] = None
                            ):
+        selection = Selection.build(self.rating_matrix, user_filter, item_filter, rating_filter,
+                                    by_item=True, relevant=relevant)
+        if selection is not None:
+            return float(selection.values.sum()) / len(selection.ids)
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -570,6 +640,11 @@ class Rating(IndividualProperty):
                        item_filter: typing.Callable[[typing.Any], bool] = None,
                        rating_filter: typing.Callable[[typing.Any, typing.Any, float], bool] = None
                        ):
+        selection = Selection.build(self.rating_matrix, user_filter, item_filter, rating_filter,
+                                    by_item=True, relevant=relevant)
+        if selection is not None:
+            return float(selection.sums().max())
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -587,6 +662,11 @@ class Rating(IndividualProperty):
                        item_filter: typing.Callable[[typing.Any], bool] = None,
                        rating_filter: typing.Callable[[typing.Any, typing.Any, float], bool] = None
                        ):
+        selection = Selection.build(self.rating_matrix, user_filter, item_filter, rating_filter,
+                                    by_item=True, relevant=relevant)
+        if selection is not None:
+            return float(selection.sums().min())
+
         if user_filter is None:
             user_filter = UserFilter.default()
         if item_filter is None:
@@ -0,0 +1,168 @@
+"""
+Vectorized selection of the ratings / impressions over which the individual properties are computed.
+"""
+
+__version__ = '0.1'
+__author__ = 'Javier Sanz-Cruzado, Pablo Castells'
+__email__ = 'javier.sanz-cruzado@uam.es, pablo.castells@uam.es'
+__copyright__ = """
+ Copyright (C) 2021 Information Retrieval Group at Universidad Autónoma
+ de Madrid, http://ir.ii.uam.es.
+
+ This Source Code Form is subject to the terms of the Mozilla Public
+ License, v. 2.0. If a copy of the MPL was not distributed with this
+ file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+__license__ = 'Mozilla Public License v. 2.0'
+
+import typing
+
+import numpy as np
+
+from src.main.python.data.filters import Filter
+
+
+class Selection:
+    """
+    Ratings (or impressions) of an array-backed structure passing a set of declarative filters, grouped by user or by
+    item. The selection is obtained from a view of the structure (see ArrayRatingMatrix.view and
+    ArrayImpressions.view), so the filters are applied as boolean masks over the arrays, and the aggregated values of
+    each group are computed without iterating over the individual ratings.
+    """
+
+    def __init__(self,
+                 ids: list,
+                 groups: np.ndarray,
+                 values: np.ndarray):
+        """
+        Initializes the selection.
+        :param ids: the identifiers of the visible users (or items).
+        :param groups: for each selected rating, the position in ids of its user (or item).
+        :param values: the value of each selected rating (one for impressions).
+        """
+        self.ids = ids
+        self.groups = groups
+        self.values = values
+
+    @staticmethod
+    def build(structure,
+              user_filter: typing.Callable[[int], bool] = None,
+              item_filter: typing.Callable[[int], bool] = None,
+              entry_filter: typing.Callable[..., bool] = None,
+              by_item: bool = False,
+              relevant: bool = False):
+        """
+        Selects the ratings (or impressions) of a structure passing a set of filters.
+        :param structure: the rating matrix or the impressions.
+        :param user_filter: (OPTIONAL) filter for the users. By default, no filter is applied.
+        :param item_filter: (OPTIONAL) filter for the items. By default, no filter is applied.
+        :param entry_filter: (OPTIONAL) filter for the (user, item, rating) triplets, or the (user, item) pairs in the
+                             case of impressions. By default, no filter is applied.
+        :param by_item: (OPTIONAL) True if the ratings are grouped by item, False if they are grouped by user. By
+                        default, they are grouped by user.
+        :param relevant: (OPTIONAL) True if we only consider relevant ratings, False otherwise. By default, False.
+        :return: the selection if the structure is backed by arrays and some filter is given, all of them declarative
+                 (see filters.Filter), None otherwise (the filters have to be applied element by element).
+        """
+        if not hasattr(structure, 'view'):
+            return None
+        if user_filter is None and item_filter is None and entry_filter is None:
+            return None
+        if any(func is not None and not isinstance(func, Filter) for func in (user_filter, item_filter, entry_filter)):
+            return None
+
+        view = structure.view(user_filter=user_filter, item_filter=item_filter)
+        parent = view.parent
+        if by_item:
+            indptr, indices, values = parent.item_indptr, parent.item_indices, getattr(parent, 'item_values', None)
+            group_mask, other_mask, index = view.item_mask, view.user_mask, parent.item_index
+        else:
+            indptr, indices, values = parent.user_indptr, parent.user_indices, getattr(parent, 'user_values', None)
+            group_mask, other_mask, index = view.user_mask, view.item_mask, parent.user_index
+
+        rows = np.repeat(np.arange(len(group_mask), dtype=np.int64), np.diff(indptr))
+        cols = indices.astype(np.int64)
+        if values is None:
+            values = np.ones(len(cols), dtype=np.float64)
+
+        mask = group_mask[rows] & other_mask[cols]
+        if relevant:
+            mask &= parent.is_relevant(values)
+        rows, cols, values = rows[mask], cols[mask], values[mask]
+
+        if entry_filter is not None:
+            users, items = (cols, rows) if by_item else (rows, cols)
+            arrays = (parent.user_index.get_ids(users), parent.item_index.get_ids(items))
+            if hasattr(parent, 'user_values'):
+                arrays += (values,)
+            mask = Filter.to_mask(entry_filter, *arrays)
+            rows, values = rows[mask], values[mask]
+
+        positions = np.flatnonzero(group_mask)
+        return Selection(index.get_ids(positions).tolist(), np.searchsorted(positions, rows), values)
+
+    def size(self) -> int:
+        """
+        Obtains the number of selected ratings.
+        :return: the number of selected ratings.
+        """
+        return len(self.values)
+
+    def counts(self) -> np.ndarray:
+        """
+        Obtains the number of selected ratings of each user (item).
+        :return: an array containing the number of ratings of each user (item), in the same order as ids.
+        """
+        return np.bincount(self.groups, minlength=len(self.ids)).astype(np.float64)
+
+    def sums(self) -> np.ndarray:
+        """
+        Obtains the sum of the selected ratings of each user (item).
+        :return: an array containing the sum of the ratings of each user (item), in the same order as ids.
+        """
+        return np.bincount(self.groups, weights=self.values, minlength=len(self.ids))
+
+    def averages(self) -> np.ndarray:
+        """
+        Obtains the average value of the selected ratings of each user (item).
+        :return: an array containing the average rating of each user (item), NaN for those without ratings.
+        """
+        counts = self.counts()
+        averages = np.full(len(self.ids), np.nan)
+        np.divide(self.sums(), counts, out=averages, where=counts > 0)
+        return averages
+
+    def maxima(self) -> np.ndarray:
+        """
+        Obtains the maximum value of the selected ratings of each user (item).
+        :return: an array containing the maximum rating of each user (item), NaN for those without ratings.
+        """
+        maxima = np.full(len(self.ids), -np.inf)
+        np.maximum.at(maxima, self.groups, self.values)
+        maxima[np.isneginf(maxima)] = np.nan
+        return maxima
+
+    def minima(self) -> np.ndarray:
+        """
+        Obtains the minimum value of the selected ratings of each user (item).
+        :return: an array containing the minimum rating of each user (item), NaN for those without ratings.
+        """
+        minima = np.full(len(self.ids), np.inf)
+        np.minimum.at(minima, self.groups, self.values)
+        minima[np.isposinf(minima)] = np.nan
+        return minima
+
+    def presence(self) -> np.ndarray:
+        """
+        Indicates which users (items) have some selected rating.
+        :return: an array containing 1.0 for the users (items) with some selected rating, NaN for the rest.
+        """
+        return np.where(self.counts() > 0, 1.0, np.nan)
+
+    def to_dict(self, array: np.ndarray) -> dict:
+        """
+        Maps the identifiers of the users (items) to their values.
+        :param array: an array containing a value for each user (item), in the same order as ids.
+        :return: a dictionary containing the value of each user (item).
+        """
+        return dict(zip(self.ids, array.tolist()))
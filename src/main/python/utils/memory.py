@@ -0,0 +1,109 @@
+"""
+Tools for measuring the memory footprint of the structures of a dataset.
+"""
+
+__version__ = '0.1'
+__author__ = 'Javier Sanz-Cruzado, Pablo Castells'
+__email__ = 'javier.sanz-cruzado@uam.es, pablo.castells@uam.es'
+__copyright__ = """
+ Copyright (C) 2021 Information Retrieval Group at Universidad Autónoma
+ de Madrid, http://ir.ii.uam.es.
+
+ This Source Code Form is subject to the terms of the Mozilla Public
+ License, v. 2.0. If a copy of the MPL was not distributed with this
+ file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+__license__ = 'Mozilla Public License v. 2.0'
+
+import sys
+import typing
+
+import numpy as np
+
+
+class MemoryUsage:
+    """
+    Measures the (deep) number of bytes used by Python objects: the object itself, plus everything it references
+    (dictionary keys and values, list elements, attributes, NumPy buffers...). Objects reachable from several places are
+    only counted once per measurement.
+    """
+
+    @staticmethod
+    def deep_size(obj,
+                  seen: typing.Set[int] = None) -> int:
+        """
+        Obtains the number of bytes used by an object and all the objects it references.
+        :param obj: the object.
+        :param seen: (OPTIONAL) identifiers of the objects which have already been counted, and must be skipped. It is
+                     updated with the newly counted objects. By default, no object is skipped.
+        :return: the number of bytes.
+        """
+        if seen is None:
+            seen = set()
+
+        size = 0
+        pending = [obj]
+        while pending:
+            current = pending.pop()
+            if id(current) in seen:
+                continue
+            seen.add(id(current))
+            size += sys.getsizeof(current)
+
+            if isinstance(current, (str, bytes, bytearray, int, float, bool, type)) or current is None:
+                continue
+            elif isinstance(current, np.ndarray):
+                # An array owning its data includes the buffer in getsizeof. Otherwise, the buffer belongs to its base.
+                if current.base is not None:
+                    pending.append(current.base)
+                if current.dtype == object:
+                    pending.extend(current.ravel().tolist())
+            elif isinstance(current, dict):
+                pending.extend(current.keys())
+                pending.extend(current.values())
+            elif isinstance(current, (list, tuple, set, frozenset)):
+                pending.extend(current)
+            else:
+                if hasattr(current, '__dict__'):
+                    pending.append(vars(current))
+                for slot in getattr(type(current), '__slots__', ()):
+                    if hasattr(current, slot):
+                        pending.append(getattr(current, slot))
+        return size
+
+    @staticmethod
+    def report(obj,
+               shared: typing.Dict[str, typing.Any] = None) -> typing.Dict[str, int]:
+        """
+        Obtains the deep number of bytes used by each attribute of an object. Objects reachable from several
+        attributes are counted in the first one.
+        :param obj: the object.
+        :param shared: (OPTIONAL) objects shared by several attributes (for instance, the indexes of users and items),
+                       which are counted first, and reported separately. By default, there are none.
+        :return: a dictionary containing the number of bytes of each shared object, of each attribute, and their total
+                 (under the "total" key).
+        """
+        seen = set()
+        report = dict()
+        for name, value in (shared or dict()).items():
+            report[name] = MemoryUsage.deep_size(value, seen)
+        if hasattr(obj, '__dict__'):
+            attributes = vars(obj)
+            overhead = sys.getsizeof(obj) + sys.getsizeof(attributes)
+        else:
+            attributes = {slot: getattr(obj, slot) for slot in type(obj).__slots__ if hasattr(obj, slot)}
+            overhead = sys.getsizeof(obj)
+        for name, value in attributes.items():
+            report[name] = report.get(name, 0) + MemoryUsage.deep_size(value, seen)
+        report["total"] = sum(report.values()) + overhead
+        return report
+
+    @staticmethod
+    def format(report: typing.Dict[str, int]) -> str:
+        """
+        Transforms a memory report into readable text (one line per component, sizes in megabytes).
+        :param report: the memory report.
+        :return: the text.
+        """
+        return "\n".join("\t" + name + ": " + "{:.2f}".format(size / (1024.0 * 1024.0)) + " MB"
+                         for name, size in report.items())
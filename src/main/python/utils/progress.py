@@ -0,0 +1,195 @@
+"""
+Progress reporting for the dataset loaders.
+"""
+
+__version__ = '0.1'
+__author__ = 'Javier Sanz-Cruzado, Pablo Castells'
+__email__ = 'javier.sanz-cruzado@uam.es, pablo.castells@uam.es'
+__copyright__ = """
+ Copyright (C) 2021 Information Retrieval Group at Universidad Autónoma
+ de Madrid, http://ir.ii.uam.es.
+
+ This Source Code Form is subject to the terms of the Mozilla Public
+ License, v. 2.0. If a copy of the MPL was not distributed with this
+ file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+__license__ = 'Mozilla Public License v. 2.0'
+
+import os
+import sys
+import time
+import typing
+
+
+class ProgressMonitor:
+    """
+    Measures the throughput of a loader while it reads its input files, and periodically reports it to a callback.
+    Each report is a dictionary containing:
+    a) "file", "file_size": the file being read (None between files), and its size on disk (in bytes).
+    b) "file_rows", "file_bytes": the number of rows (lines or records) and bytes read from the current file. For
+       compressed files, bytes are counted after decompression.
+    c) "rows", "bytes", "elapsed": the total number of rows and bytes read, and the time (in seconds) since the monitor
+       was created.
+    d) "rows_per_second", "bytes_per_second": the throughput since the previous report.
+    e) "users", "items", "impressions": the current sizes of the dataset being loaded (as last notified by the
+       loader).
+    Loaders notify the rows they read (see update) every few thousands of rows, and the monitor only builds a report
+    when the configured interval has passed, or a file is finished.
+    """
+
+    def __init__(self,
+                 callback: typing.Callable[[typing.Dict[str, typing.Any]], None] = None,
+                 interval: float = 10.0):
+        """
+        Initializes the monitor.
+        :param callback: (OPTIONAL) the function receiving the reports. By default, reports are printed to the
+                         standard error (see print_report).
+        :param interval: (OPTIONAL) the minimum number of seconds between two periodic reports. By default, 10.
+        """
+        self.callback = ProgressMonitor.print_report if callback is None else callback
+        self.interval = interval
+
+        self.start = time.monotonic()
+        self.last_time = self.start
+        self.last_rows = 0
+        self.last_bytes = 0
+
+        self.file_name = None
+        self.file = None
+        self.file_size = 0
+        self.file_rows = 0
+        self.file_bytes = 0
+        self.done_rows = 0
+        self.done_bytes = 0
+
+        self.sizes = {"users": 0, "items": 0, "impressions": 0}
+
+    def start_file(self,
+                   file_name: str,
+                   file: typing.TextIO = None):
+        """
+        Notifies that the loader starts reading a file.
+        :param file_name: the name of the file.
+        :param file: (OPTIONAL) the open file, whose position is used to count the bytes read. If it is not given, the
+                     loader must provide the position when notifying the read rows.
+        """
+        self.file_name = file_name
+        self.file = file
+        self.file_size = os.path.getsize(file_name)
+        self.file_rows = 0
+        self.file_bytes = 0
+
+    def update(self,
+               rows: int,
+               position: int = None):
+        """
+        Notifies that some rows of the current file have been read, and reports the progress if the interval has
+        passed since the previous report.
+        :param rows: the number of rows read since the previous notification.
+        :param position: (OPTIONAL) the number of bytes of the file read so far. By default, it is obtained from the
+                         open file.
+        """
+        self.file_rows += rows
+        if position is not None:
+            self.file_bytes = position
+        elif self.file is not None:
+            self.file_bytes = self.file.buffer.tell()
+
+        if time.monotonic() - self.last_time >= self.interval:
+            self.report()
+
+    def set_sizes(self,
+                  users: int = None,
+                  items: int = None,
+                  impressions: int = None):
+        """
+        Notifies the current sizes of the dataset being loaded.
+        :param users: (OPTIONAL) the number of users. By default, it is not changed.
+        :param items: (OPTIONAL) the number of items. By default, it is not changed.
+        :param impressions: (OPTIONAL) the number of impressions. By default, it is not changed.
+        """
+        for name, value in (("users", users), ("items", items), ("impressions", impressions)):
+            if value is not None:
+                self.sizes[name] = value
+
+    def end_file(self):
+        """
+        Notifies that the loader has finished reading the current file, and reports the progress.
+        """
+        self.report()
+        self.done_rows += self.file_rows
+        self.done_bytes += self.file_bytes
+        self.file_name = None
+        self.file = None
+        self.file_size = 0
+        self.file_rows = 0
+        self.file_bytes = 0
+
+    def add_file(self,
+                 file_name: str,
+                 rows: int):
+        """
+        Notifies that a whole file has been read at once (for instance, by another process), and reports the
+        progress. The bytes read from the file are its size on disk.
+        :param file_name: the name of the file.
+        :param rows: the number of rows of the file.
+        """
+        self.start_file(file_name)
+        self.update(rows, self.file_size)
+        self.end_file()
+
+    def finish(self) -> typing.Dict[str, typing.Any]:
+        """
+        Notifies that the dataset has been loaded, and reports the final progress.
+        :return: the report.
+        """
+        return self.report()
+
+    def report(self) -> typing.Dict[str, typing.Any]:
+        """
+        Builds a report of the current progress, and sends it to the callback.
+        :return: the report.
+        """
+        now = time.monotonic()
+        rows = self.done_rows + self.file_rows
+        num_bytes = self.done_bytes + self.file_bytes
+        elapsed = max(now - self.last_time, 1e-9)
+
+        report = {"file": self.file_name, "file_size": self.file_size, "file_rows": self.file_rows,
+                  "file_bytes": self.file_bytes, "rows": rows, "bytes": num_bytes, "elapsed": now - self.start,
+                  "rows_per_second": (rows - self.last_rows) / elapsed,
+                  "bytes_per_second": (num_bytes - self.last_bytes) / elapsed}
+        report.update(self.sizes)
+
+        self.last_time = now
+        self.last_rows = rows
+        self.last_bytes = num_bytes
+        self.callback(report)
+        return report
+
+    @staticmethod
+    def format(report: typing.Dict[str, typing.Any]) -> str:
+        """
+        Transforms a progress report into readable text (a single line).
+        :param report: the progress report.
+        :return: the text.
+        """
+        megabyte = 1024.0 * 1024.0
+        text = ""
+        if report["file"] is not None:
+            text = (report["file"] + ": " + "{:.1f}".format(report["file_bytes"] / megabyte) + " MB read (" +
+                    "{:.1f}".format(report["file_size"] / megabyte) + " MB on disk), " + str(report["file_rows"]) +
+                    " rows | ")
+        return (text + "total: " + str(report["rows"]) + " rows, " + "{:.1f}".format(report["bytes"] / megabyte) +
+                " MB in " + "{:.1f}".format(report["elapsed"]) + "s. | " +
+                "{:.0f}".format(report["rows_per_second"]) + " rows/s, " +
+                "{:.2f}".format(report["bytes_per_second"] / megabyte) + " MB/s | users: " + str(report["users"]) +
+                ", items: " + str(report["items"]) + ", impressions: " + str(report["impressions"]))
+
+    @staticmethod
+    def print_report(report: typing.Dict[str, typing.Any]):
+        """
+        Default callback: prints a progress report to the standard error.
+        :param report: the progress report.
+        """
+        print(ProgressMonitor.format(report), file=sys.stderr, flush=True)
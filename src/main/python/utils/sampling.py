@@ -0,0 +1,139 @@
+"""
+Deterministic sampling of the users of a dataset.
+"""
+
+__version__ = '0.1'
+__author__ = 'Javier Sanz-Cruzado, Pablo Castells'
+__email__ = 'javier.sanz-cruzado@uam.es, pablo.castells@uam.es'
+__copyright__ = """
+ Copyright (C) 2021 Information Retrieval Group at Universidad Autónoma
+ de Madrid, http://ir.ii.uam.es.
+
+ This Source Code Form is subject to the terms of the Mozilla Public
+ License, v. 2.0. If a copy of the MPL was not distributed with this
+ file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""
+__license__ = 'Mozilla Public License v. 2.0'
+
+import typing
+
+import numpy as np
+
+
+class UserSampler:
+    """
+    Selects a fraction of the users of a dataset, by a stable hash of their (non-negative, integer) identifiers: a
+    user is selected if the hash, seen as a number in [0,1), is smaller than the fraction. The selection only depends
+    on the identifier, the fraction and the seed, so it is the same in every run, every file and every process, and
+    the records of a user are either all kept or all dropped.
+
+    Identifiers are hashed as sequences of 64-bit words (the least significant first), with the SplitMix64 mixing
+    function, so large identifiers (such as the fingerprints of the Yahoo! R6B users) can also be sampled.
+    """
+
+    MASK = (1 << 64) - 1
+    # Constants of the SplitMix64 function.
+    GAMMA = 0x9E3779B97F4A7C15
+    MIX_1 = 0xBF58476D1CE4E5B9
+    MIX_2 = 0x94D049BB133111EB
+    # Number of bits of the hashes compared with the fraction.
+    PRECISION = 53
+
+    def __init__(self,
+                 fraction: float,
+                 seed: int = 0):
+        """
+        Configures the sampler.
+        :param fraction: the (expected) fraction of users to select, in (0,1].
+        :param seed: (OPTIONAL) the seed of the hash. Different seeds select different users. By default, 0.
+        :raises ValueError: if the fraction is not in (0,1].
+        """
+        if not 0.0 < fraction <= 1.0:
+            raise ValueError("The fraction of sampled users must be in (0,1], but it is " + str(fraction))
+        self.fraction = fraction
+        self.seed = seed
+        self.threshold = int(fraction * (1 << UserSampler.PRECISION))
+        self.initial = UserSampler.mix(seed & UserSampler.MASK)
+
+    @staticmethod
+    def mix(value: int) -> int:
+        """
+        Mixes the bits of a 64-bit value (SplitMix64).
+        :param value: the value.
+        :return: the mixed value.
+        """
+        value = (value + UserSampler.GAMMA) & UserSampler.MASK
+        value = ((value ^ (value >> 30)) * UserSampler.MIX_1) & UserSampler.MASK
+        value = ((value ^ (value >> 27)) * UserSampler.MIX_2) & UserSampler.MASK
+        return value ^ (value >> 31)
+
+    @staticmethod
+    def mix_array(values: np.ndarray) -> np.ndarray:
+        """
+        Mixes the bits of an array of 64-bit values (see mix).
+        :param values: the values (unsigned 64-bit integers).
+        :return: the mixed values.
+        """
+        values = values + np.uint64(UserSampler.GAMMA)
+        values = (values ^ (values >> np.uint64(30))) * np.uint64(UserSampler.MIX_1)
+        values = (values ^ (values >> np.uint64(27))) * np.uint64(UserSampler.MIX_2)
+        return values ^ (values >> np.uint64(31))
+
+    def hash(self,
+             user: int,
+             num_words: int = 1) -> int:
+        """
+        Hashes a user identifier.
+        :param user: the identifier.
+        :param num_words: (OPTIONAL) the number of 64-bit words of the identifiers. By default, 1.
+        :return: the 64-bit hash.
+        """
+        value = self.initial
+        for _ in range(num_words):
+            value = UserSampler.mix(value ^ (user & UserSampler.MASK))
+            user >>= 64
+        return value
+
+    def hash_words(self,
+                   words: np.ndarray) -> np.ndarray:
+        """
+        Hashes an array of user identifiers, split into 64-bit words (see hash).
+        :param words: a matrix with one row per identifier, and one column per word (the least significant first).
+        :return: the 64-bit hash of each identifier.
+        """
+        words = np.asarray(words, dtype=np.uint64).reshape(len(words), -1)
+        values = np.full(len(words), self.initial, dtype=np.uint64)
+        for column in range(words.shape[1]):
+            values = UserSampler.mix_array(values ^ words[:, column])
+        return values
+
+    def contains(self,
+                 user: int,
+                 num_words: int = 1) -> bool:
+        """
+        Checks whether a user is selected.
+        :param user: the identifier of the user.
+        :param num_words: (OPTIONAL) the number of 64-bit words of the identifiers. By default, 1.
+        :return: true if the user is selected, false otherwise.
+        """
+        return (self.hash(user, num_words) >> (64 - UserSampler.PRECISION)) < self.threshold
+
+    def select(self,
+               users: np.ndarray) -> np.ndarray:
+        """
+        Checks which users of an array are selected.
+        :param users: the identifiers of the users (either a one-dimensional array of 64-bit identifiers, or a matrix
+                      of 64-bit words, see hash_words).
+        :return: a boolean array, true for the selected users.
+        """
+        users = np.asarray(users)
+        if users.ndim == 1 and users.dtype != np.uint64:
+            users = users.astype(np.int64).view(np.uint64)
+        return (self.hash_words(users) >> np.uint64(64 - UserSampler.PRECISION)) < self.threshold
+
+    def get_params(self) -> typing.Dict[str, typing.Any]:
+        """
+        Obtains the parameters of the sampler (for instance, to identify the sampled datasets in a cache).
+        :return: a dictionary containing the fraction and the seed.
+        """
+        return {"fraction": self.fraction, "seed": self.seed}